@@ -77,6 +77,9 @@ def run_migrations_online() -> None:
     """
     # Use the existing engine from database.py
     with engine.connect() as connection:
+        # Index builds and data moves may outlast the workers' statement timeout
+        connection.exec_driver_sql("SET statement_timeout = 0")
+        connection.commit()
         context.configure(
             connection=connection,
             target_metadata=target_metadata,
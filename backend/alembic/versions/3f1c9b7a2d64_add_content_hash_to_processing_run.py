@@ -0,0 +1,43 @@
+"""add content_hash and prompt_version to processing run
+
+Revision ID: 3f1c9b7a2d64
+Revises: aea5d2e3e4f4
+Create Date: 2025-12-18 09:10:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1c9b7a2d64"
+down_revision: Union[str, None] = "aea5d2e3e4f4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document_processing_runs",
+        sa.Column("content_hash", sa.String(), nullable=True),
+    )
+    op.add_column(
+        "document_processing_runs",
+        sa.Column("prompt_version", sa.String(), nullable=True),
+    )
+    op.create_index(
+        op.f("ix_document_processing_runs_content_hash"),
+        "document_processing_runs",
+        ["content_hash"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_document_processing_runs_content_hash"),
+        table_name="document_processing_runs",
+    )
+    op.drop_column("document_processing_runs", "prompt_version")
+    op.drop_column("document_processing_runs", "content_hash")
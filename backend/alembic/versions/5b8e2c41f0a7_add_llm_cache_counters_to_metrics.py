@@ -0,0 +1,33 @@
+"""add llm cache hit/miss counters to metrics
+
+Revision ID: 5b8e2c41f0a7
+Revises: 3f1c9b7a2d64
+Create Date: 2025-12-18 11:25:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b8e2c41f0a7"
+down_revision: Union[str, None] = "3f1c9b7a2d64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document_processing_run_metrics",
+        sa.Column("llm_cache_hits", sa.Integer(), nullable=True),
+    )
+    op.add_column(
+        "document_processing_run_metrics",
+        sa.Column("llm_cache_misses", sa.Integer(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("document_processing_run_metrics", "llm_cache_misses")
+    op.drop_column("document_processing_run_metrics", "llm_cache_hits")
@@ -0,0 +1,28 @@
+"""add image_preprocessing to metrics
+
+Revision ID: 8d3a6f19c2e5
+Revises: 5b8e2c41f0a7
+Create Date: 2025-12-19 08:40:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d3a6f19c2e5"
+down_revision: Union[str, None] = "5b8e2c41f0a7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document_processing_run_metrics",
+        sa.Column("image_preprocessing", sa.JSON(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("document_processing_run_metrics", "image_preprocessing")
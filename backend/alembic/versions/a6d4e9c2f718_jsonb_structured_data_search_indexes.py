@@ -0,0 +1,92 @@
+"""jsonb structured_data with structured search indexes
+
+Revision ID: a6d4e9c2f718
+Revises: f3c8d1a6b925
+Create Date: 2025-12-23 11:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a6d4e9c2f718"
+down_revision: Union[str, None] = "f3c8d1a6b925"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rewrites the payloads table under an exclusive lock
+    op.alter_column(
+        "document_processing_run_payloads",
+        "structured_data",
+        type_=postgresql.JSONB(),
+        existing_type=sa.JSON(),
+        postgresql_using="structured_data::jsonb",
+    )
+    # Built concurrently so writes to the tables are not blocked
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_run_payloads_diagnoses",
+            "document_processing_run_payloads",
+            [sa.text("(structured_data -> 'diagnoses') jsonb_path_ops")],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_run_payloads_chronic_conditions",
+            "document_processing_run_payloads",
+            [sa.text("(structured_data -> 'chronic_conditions') jsonb_path_ops")],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_run_payloads_species",
+            "document_processing_run_payloads",
+            [sa.text("lower(structured_data ->> 'species')")],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_documents_latest_run_run_id",
+            "documents_latest_run",
+            ["run_id"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_documents_latest_run_run_id",
+            table_name="documents_latest_run",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_run_payloads_species",
+            table_name="document_processing_run_payloads",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_run_payloads_chronic_conditions",
+            table_name="document_processing_run_payloads",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_run_payloads_diagnoses",
+            table_name="document_processing_run_payloads",
+            postgresql_concurrently=True,
+        )
+    op.alter_column(
+        "document_processing_run_payloads",
+        "structured_data",
+        type_=sa.JSON(),
+        existing_type=postgresql.JSONB(),
+        postgresql_using="structured_data::json",
+    )
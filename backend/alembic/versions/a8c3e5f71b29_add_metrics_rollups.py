@@ -0,0 +1,47 @@
+"""add metrics rollups
+
+Revision ID: a8c3e5f71b29
+Revises: d5f2a8c1e946
+Create Date: 2025-12-29 09:30:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a8c3e5f71b29"
+down_revision: Union[str, None] = "d5f2a8c1e946"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document_processing_run_metrics",
+        sa.Column("model_name", sa.String(), nullable=True),
+    )
+    op.create_table(
+        "document_processing_metrics_rollups",
+        sa.Column("granularity", sa.String(), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+        sa.Column("model_name", sa.String(), nullable=False),
+        sa.Column("run_count", sa.Integer(), nullable=False),
+        sa.Column("processing_time_count", sa.Integer(), nullable=False),
+        sa.Column("processing_time_sum", sa.Float(), nullable=False),
+        sa.Column("processing_time_histogram", postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column("llm_token_cost_sum", sa.Float(), nullable=False),
+        sa.Column("filled_fields_sum", sa.Integer(), nullable=False),
+        sa.Column("field_fill_rate_sum", sa.Float(), nullable=False),
+        sa.Column("field_fill_rate_count", sa.Integer(), nullable=False),
+        sa.Column("prompt_tokens_sum", sa.BigInteger(), nullable=False),
+        sa.Column("completion_tokens_sum", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("granularity", "bucket_start", "model_name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("document_processing_metrics_rollups")
+    op.drop_column("document_processing_run_metrics", "model_name")
@@ -0,0 +1,28 @@
+"""add pipeline_stage to processing run
+
+Revision ID: b71e4d9a3c58
+Revises: 8d3a6f19c2e5
+Create Date: 2025-12-19 11:15:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b71e4d9a3c58"
+down_revision: Union[str, None] = "8d3a6f19c2e5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document_processing_runs",
+        sa.Column("pipeline_stage", sa.String(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("document_processing_runs", "pipeline_stage")
@@ -0,0 +1,53 @@
+"""add generated search_vector to run payloads
+
+Revision ID: b9e1f7a3c460
+Revises: a6d4e9c2f718
+Create Date: 2025-12-27 09:30:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b9e1f7a3c460"
+down_revision: Union[str, None] = "a6d4e9c2f718"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Computes the vector of every existing payload (rewrites the table)
+    op.add_column(
+        "document_processing_run_payloads",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "to_tsvector('english', left(coalesce(extracted_text, ''), 500000))",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_run_payloads_search_vector",
+            "document_processing_run_payloads",
+            ["search_vector"],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_run_payloads_search_vector",
+            table_name="document_processing_run_payloads",
+            postgresql_concurrently=True,
+        )
+    op.drop_column("document_processing_run_payloads", "search_vector")
@@ -0,0 +1,49 @@
+"""add listing indexes to processing run
+
+Revision ID: c94f2a6d1e37
+Revises: b71e4d9a3c58
+Create Date: 2025-12-20 09:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c94f2a6d1e37"
+down_revision: Union[str, None] = "b71e4d9a3c58"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently so writes to a large runs table are not blocked
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_document_processing_runs_created_at_id",
+            "document_processing_runs",
+            ["created_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_document_processing_runs_filename_created_at_id",
+            "document_processing_runs",
+            ["filename", "created_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_document_processing_runs_filename_created_at_id",
+            table_name="document_processing_runs",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_document_processing_runs_created_at_id",
+            table_name="document_processing_runs",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,30 @@
+"""add stage_timings to metrics
+
+Revision ID: d5f2a8c1e946
+Revises: b9e1f7a3c460
+Create Date: 2025-12-28 10:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d5f2a8c1e946"
+down_revision: Union[str, None] = "b9e1f7a3c460"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable without a default: adding it is a catalog-only change, and
+    # metrics recorded before stage timings existed keep NULL
+    op.add_column(
+        "document_processing_run_metrics",
+        sa.Column("stage_timings", sa.JSON(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("document_processing_run_metrics", "stage_timings")
@@ -0,0 +1,66 @@
+"""add documents_latest_run
+
+Revision ID: e2a7b5c8d031
+Revises: c94f2a6d1e37
+Create Date: 2025-12-20 15:30:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e2a7b5c8d031"
+down_revision: Union[str, None] = "c94f2a6d1e37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "documents_latest_run",
+        sa.Column("filename", sa.String(), nullable=False),
+        sa.Column("run_id", sa.String(), nullable=False),
+        sa.Column("document_type", sa.String(), nullable=False),
+        sa.Column("run_status", sa.String(), nullable=False, server_default="uploaded"),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["run_id"], ["document_processing_runs.id"]),
+        sa.PrimaryKeyConstraint("filename"),
+    )
+    op.create_index(
+        "ix_documents_latest_run_created_at_run_id",
+        "documents_latest_run",
+        ["created_at", "run_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_documents_latest_run_run_status_created_at_run_id",
+        "documents_latest_run",
+        ["run_status", "created_at", "run_id"],
+        unique=False,
+    )
+    # The listing no longer scans runs by creation time
+    op.drop_index(
+        "ix_document_processing_runs_created_at_id",
+        table_name="document_processing_runs",
+    )
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_document_processing_runs_created_at_id",
+        "document_processing_runs",
+        ["created_at", "id"],
+        unique=False,
+    )
+    op.drop_index(
+        "ix_documents_latest_run_run_status_created_at_run_id",
+        table_name="documents_latest_run",
+    )
+    op.drop_index(
+        "ix_documents_latest_run_created_at_run_id",
+        table_name="documents_latest_run",
+    )
+    op.drop_table("documents_latest_run")
@@ -0,0 +1,60 @@
+"""move run payloads to document_processing_run_payloads
+
+Revision ID: f3c8d1a6b925
+Revises: e2a7b5c8d031
+Create Date: 2025-12-22 10:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3c8d1a6b925"
+down_revision: Union[str, None] = "e2a7b5c8d031"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "document_processing_run_payloads",
+        sa.Column("run_id", sa.String(), nullable=False),
+        sa.Column("extracted_text", sa.Text(), nullable=True),
+        sa.Column("structured_data", sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(["run_id"], ["document_processing_runs.id"]),
+        sa.PrimaryKeyConstraint("run_id"),
+    )
+    op.execute(
+        """
+        INSERT INTO document_processing_run_payloads (run_id, extracted_text, structured_data)
+        SELECT id, extracted_text, structured_data
+        FROM document_processing_runs
+        WHERE extracted_text IS NOT NULL OR structured_data IS NOT NULL
+        """
+    )
+    # The space of the dropped columns is reclaimed by VACUUM FULL (or pg_repack)
+    op.drop_column("document_processing_runs", "structured_data")
+    op.drop_column("document_processing_runs", "extracted_text")
+
+
+def downgrade() -> None:
+    op.add_column(
+        "document_processing_runs",
+        sa.Column("extracted_text", sa.Text(), nullable=True),
+    )
+    op.add_column(
+        "document_processing_runs",
+        sa.Column("structured_data", sa.JSON(), nullable=True),
+    )
+    op.execute(
+        """
+        UPDATE document_processing_runs AS runs
+        SET extracted_text = payloads.extracted_text,
+            structured_data = payloads.structured_data
+        FROM document_processing_run_payloads AS payloads
+        WHERE payloads.run_id = runs.id
+        """
+    )
+    op.drop_table("document_processing_run_payloads")
@@ -1,8 +1,12 @@
 import os
+import time
 from pathlib import Path
 
 from dotenv import load_dotenv
 from celery import Celery
+from celery.signals import task_postrun, task_prerun, worker_process_shutdown, worker_shutdown
+
+from common.prometheus import mark_process_dead, observe_task_duration
 
 load_dotenv()
 env_local_paths = [
@@ -26,6 +30,40 @@ celery_app = Celery(
     backend=result_backend,
 )
 
+# Pipeline stages run on separate queues so each worker pool can be sized for
+# its workload: CPU-bound extraction on prefork, LLM calls on threads.
+celery_app.conf.task_routes = {
+    "documents.tasks.extract_text_task": {"queue": "extraction"},
+    "documents.tasks.parse_structured_data_task": {"queue": "llm"},
+    "documents.tasks.persist_results_task": {"queue": "persist"},
+    "documents.tasks.record_metrics_task": {"queue": "metrics"},
+}
+
+# Nothing reads task results (chained stages get the previous result in their
+# message), so they are not written to the result backend
+celery_app.conf.task_ignore_result = True
+
+# Start times of the tasks running in this process, by task id
+_task_started_at: dict[str, float] = {}
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, **kwargs) -> None:
+    _task_started_at[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def observe_task_timer(task_id=None, task=None, state=None, **kwargs) -> None:
+    started_at = _task_started_at.pop(task_id, None)
+    if started_at is not None and task is not None:
+        observe_task_duration(task.name, state, time.perf_counter() - started_at)
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def drop_worker_live_metrics(**kwargs) -> None:
+    mark_process_dead()
+
 # Ensure task modules are imported so @shared_task registrations are visible
 try:
     import documents.tasks  # type: ignore[import-not-found]
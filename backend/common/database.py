@@ -1,6 +1,10 @@
 import os
-from typing import Generator
-from sqlmodel import SQLModel, Session, create_engine
+from typing import AsyncGenerator
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from common.prometheus import instrument_engine_pool
 
 
 # Database URL from environment - use psycopg (psycopg3) dialect
@@ -13,14 +17,59 @@ if db_url.startswith("postgresql://") and "+psycopg" not in db_url:
     db_url = db_url.replace("postgresql://", "postgresql+psycopg://", 1)
 DATABASE_URL = db_url
 
-# Create engine with psycopg3 dialect
+# Async engine of the API: many short queries from concurrent requests
+API_DB_POOL_SIZE = int(os.getenv("API_DB_POOL_SIZE", "10"))
+API_DB_MAX_OVERFLOW = int(os.getenv("API_DB_MAX_OVERFLOW", "20"))
+API_DB_POOL_TIMEOUT_SECONDS = float(os.getenv("API_DB_POOL_TIMEOUT_SECONDS", "10"))
+API_DB_STATEMENT_TIMEOUT_MS = int(os.getenv("API_DB_STATEMENT_TIMEOUT_MS", "10000"))
+
+# Sync engine of the Celery workers (and commands): one connection per busy
+# task, so size the pool to the worker's concurrency
+WORKER_DB_POOL_SIZE = int(os.getenv("WORKER_DB_POOL_SIZE", "5"))
+WORKER_DB_MAX_OVERFLOW = int(os.getenv("WORKER_DB_MAX_OVERFLOW", "10"))
+WORKER_DB_POOL_TIMEOUT_SECONDS = float(os.getenv("WORKER_DB_POOL_TIMEOUT_SECONDS", "30"))
+WORKER_DB_STATEMENT_TIMEOUT_MS = int(os.getenv("WORKER_DB_STATEMENT_TIMEOUT_MS", "120000"))
+
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+
+
+def _connect_args(statement_timeout_ms: int) -> dict:
+    return {"options": f"-c statement_timeout={statement_timeout_ms}"}
+
+
 # The +psycopg suffix tells SQLAlchemy to use psycopg3 (not psycopg2)
-engine = create_engine(DATABASE_URL, echo=False)
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_size=WORKER_DB_POOL_SIZE,
+    max_overflow=WORKER_DB_MAX_OVERFLOW,
+    pool_timeout=WORKER_DB_POOL_TIMEOUT_SECONDS,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    pool_recycle=DB_POOL_RECYCLE_SECONDS,
+    connect_args=_connect_args(WORKER_DB_STATEMENT_TIMEOUT_MS),
+)
+
+# psycopg3 runs natively on asyncio, so the API never blocks the event loop on queries
+async_engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_size=API_DB_POOL_SIZE,
+    max_overflow=API_DB_MAX_OVERFLOW,
+    pool_timeout=API_DB_POOL_TIMEOUT_SECONDS,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    pool_recycle=DB_POOL_RECYCLE_SECONDS,
+    connect_args=_connect_args(API_DB_STATEMENT_TIMEOUT_MS),
+)
+
+instrument_engine_pool(engine, "worker", WORKER_DB_POOL_SIZE + WORKER_DB_MAX_OVERFLOW)
+instrument_engine_pool(async_engine.sync_engine, "api", API_DB_POOL_SIZE + API_DB_MAX_OVERFLOW)
 
 
-def get_session() -> Generator[Session, None, None]:
-    """Dependency to get database session."""
-    with Session(engine) as session:
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency to get an async database session for API handlers."""
+    # Not expired on commit: handlers read the committed objects afterwards
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
         yield session
 
 
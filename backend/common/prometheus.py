@@ -0,0 +1,197 @@
+import glob
+import os
+import time
+from typing import Any, Iterable, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from prometheus_client.metrics_core import Metric
+from prometheus_client.registry import Collector
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Read by prometheus_client itself: each process writes its samples to files in
+# this directory instead of keeping them in memory. Give every container its own
+# directory (process ids repeat across containers).
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+# Directory tree merged by /metrics; defaults to this process's own directory
+PROMETHEUS_METRICS_ROOT = os.getenv("PROMETHEUS_METRICS_ROOT", PROMETHEUS_MULTIPROC_DIR)
+
+if PROMETHEUS_MULTIPROC_DIR:
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+# Every metric is labelled, so its files are only created on first use (after
+# a prefork worker has forked)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time until the response headers are sent, per route template",
+    ["method", "route", "status"],
+)
+CELERY_TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Celery task run time",
+    ["task", "state"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+PIPELINE_QUEUE_WAIT = Histogram(
+    "pipeline_queue_wait_seconds",
+    "Time a processing run waited in the queue before a pipeline stage started",
+    ["stage"],
+    buckets=(0.01, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900),
+)
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds",
+    "LLM completion request latency (rate limiter waits excluded)",
+    ["model", "outcome"],
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120),
+)
+LLM_TOKENS = Counter("llm_tokens", "LLM tokens used", ["model", "type"])
+OCR_PAGE_DURATION = Histogram(
+    "ocr_page_duration_seconds",
+    "OCR time per page (pages/s: rate of the _count)",
+    ["source"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+CACHE_LOOKUPS = Counter("cache_lookups", "Cache lookups", ["cache", "result"])
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Database connections per engine: open, checked_out and capacity (pool size + overflow)",
+    ["engine", "state"],
+    multiprocess_mode="livesum",
+)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    HTTP_REQUEST_DURATION.labels(method, route, str(status)).observe(seconds)
+
+
+def observe_task_duration(task: str, state: Optional[str], seconds: float) -> None:
+    CELERY_TASK_DURATION.labels(task, state or "UNKNOWN").observe(seconds)
+
+
+def observe_queue_wait(stage: str, seconds: float) -> None:
+    PIPELINE_QUEUE_WAIT.labels(stage).observe(seconds)
+
+
+def observe_llm_request(model: str, seconds: float, response: Any) -> None:
+    """Record one completion request; `response` is None when it failed."""
+    LLM_REQUEST_DURATION.labels(model, "ok" if response is not None else "error").observe(seconds)
+    usage = getattr(response, "usage", None)
+    if usage:
+        LLM_TOKENS.labels(model, "prompt").inc(usage.prompt_tokens or 0)
+        LLM_TOKENS.labels(model, "completion").inc(usage.completion_tokens or 0)
+
+
+def observe_ocr_page(source: str, seconds: float) -> None:
+    OCR_PAGE_DURATION.labels(source).observe(seconds)
+
+
+def count_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def instrument_engine_pool(engine: Engine, name: str, capacity: int) -> None:
+    """Track open and checked-out connections of an engine's pool."""
+    open_connections = DB_POOL_CONNECTIONS.labels(name, "open")
+    checked_out = DB_POOL_CONNECTIONS.labels(name, "checked_out")
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record) -> None:
+        # Set on first use, so engines a process never uses report no capacity
+        DB_POOL_CONNECTIONS.labels(name, "capacity").set(capacity)
+        open_connections.inc()
+
+    @event.listens_for(engine, "close")
+    def on_close(dbapi_connection, connection_record) -> None:
+        open_connections.dec()
+
+    @event.listens_for(engine, "detach")
+    def on_detach(dbapi_connection, connection_record) -> None:
+        open_connections.dec()
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        checked_out.inc()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record) -> None:
+        checked_out.dec()
+
+
+def mark_process_dead() -> None:
+    """Drop this process's live gauges from the aggregate once it exits."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class _DirectoryTreeCollector(Collector):
+    """Merge the metric files of every process under a directory tree."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def collect(self) -> Iterable[Metric]:
+        files = glob.glob(os.path.join(self.root, "**", "*.db"), recursive=True)
+        return multiprocess.MultiProcessCollector.merge(files, accumulate=True)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Return the metrics exposition and its content type."""
+    if PROMETHEUS_METRICS_ROOT:
+        registry = CollectorRegistry()
+        registry.register(_DirectoryTreeCollector(PROMETHEUS_METRICS_ROOT))
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+class PrometheusMiddleware:
+    """
+    Observe the latency of every HTTP request, labelled by route template.
+
+    Latency is measured until the response headers are sent, so streaming
+    responses (run events) count their setup rather than their lifetime.
+    Requests matching no route share the "unmatched" label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        observed = False
+
+        def observe(status: int) -> None:
+            nonlocal observed
+            observed = True
+            # The router adds the matched route to the (shared) scope
+            route = scope.get("route")
+            observe_request(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status,
+                time.perf_counter() - start,
+            )
+
+        async def send_and_observe(message):
+            if message["type"] == "http.response.start" and not observed:
+                observe(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_observe)
+        finally:
+            if not observed:
+                observe(500)
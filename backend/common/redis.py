@@ -0,0 +1,40 @@
+import os
+from typing import Optional
+
+import redis
+import redis.asyncio
+
+
+# Defaults to the Celery broker so no extra service is needed in docker-compose
+REDIS_URL = os.getenv(
+    "REDIS_URL", os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0")
+)
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "2"))
+
+_redis_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    """Return the process-wide Redis client (connections are opened lazily)."""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(
+            REDIS_URL,
+            socket_timeout=REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+        )
+    return _redis_client
+
+
+_async_redis_client: Optional[redis.asyncio.Redis] = None
+
+
+def get_async_redis() -> redis.asyncio.Redis:
+    """Return the process-wide asyncio Redis client, used by streaming endpoints."""
+    global _async_redis_client
+    if _async_redis_client is None:
+        _async_redis_client = redis.asyncio.Redis.from_url(
+            REDIS_URL,
+            socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+        )
+    return _async_redis_client
@@ -0,0 +1,25 @@
+"""Build the documents_latest_run projection from the existing run history.
+
+Usage: python -m documents.commands.backfill_latest_runs
+"""
+import logging
+
+from sqlmodel import Session
+
+from common.database import engine
+from common.logging import setup_logging
+from documents.services.latest_run.projection import backfill_latest_runs
+
+
+logger = logging.getLogger("documents.commands")
+
+
+def main() -> None:
+    setup_logging()
+    with Session(engine) as session:
+        count = backfill_latest_runs(session)
+    logger.info(f"Backfilled latest runs of {count} documents")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""Rebuild the metrics rollups from the existing processing metrics.
+
+Usage: python -m documents.commands.backfill_metrics_rollups
+"""
+import logging
+
+from common.database import engine
+from common.logging import setup_logging
+from metrics.rollups import rebuild_rollups
+
+
+logger = logging.getLogger("documents.commands")
+
+
+def main() -> None:
+    setup_logging()
+    with engine.begin() as connection:
+        count = rebuild_rollups(connection)
+    logger.info(f"Rebuilt metrics rollups from {count} metrics rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Compare status-poll latency with inline vs. separate run payloads.
+
+Builds two scratch layouts in temporary tables (dropped with the connection):
+runs carrying extracted text and structured data inline, as before
+`document_processing_run_payloads`, and narrow runs with the payload in its
+own table. Then times the status poll query of each layout.
+
+Usage: python -m documents.commands.benchmark_status_poll [--runs N] [--polls N] [--text-kb N]
+"""
+import argparse
+import logging
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+
+from common.database import engine
+from common.logging import setup_logging
+
+
+logger = logging.getLogger("documents.commands")
+
+SETUP_SQL = [
+    """
+    CREATE TEMP TABLE bench_wide_runs (
+        id varchar PRIMARY KEY,
+        filename varchar NOT NULL,
+        document_type varchar NOT NULL,
+        file_path varchar,
+        content_hash varchar,
+        prompt_version varchar,
+        extracted_text text,
+        structured_data json,
+        run_status varchar NOT NULL,
+        pipeline_stage varchar,
+        created_at timestamptz NOT NULL,
+        updated_at timestamptz NOT NULL
+    )
+    """,
+    """
+    INSERT INTO bench_wide_runs
+    SELECT
+        'run-' || i, 'file-' || i || '.pdf', '.pdf', '/data/file-' || i || '.pdf',
+        md5(i::text), 'v1',
+        (SELECT string_agg(md5(i::text || '-' || j), ' ') FROM generate_series(1, :chunks) j),
+        json_build_object('pet_name', 'Rex ' || i, 'species', 'dog', 'notes', repeat('n', 2000)),
+        'completed', 'persisted', now(), now()
+    FROM generate_series(1, :runs) i
+    """,
+    """
+    CREATE TEMP TABLE bench_narrow_runs AS
+    SELECT id, filename, document_type, file_path, content_hash, prompt_version,
+           run_status, pipeline_stage, created_at, updated_at
+    FROM bench_wide_runs
+    """,
+    "ALTER TABLE bench_narrow_runs ADD PRIMARY KEY (id)",
+    """
+    CREATE TEMP TABLE bench_run_payloads AS
+    SELECT id AS run_id, extracted_text, structured_data FROM bench_wide_runs
+    """,
+    "ALTER TABLE bench_run_payloads ADD PRIMARY KEY (run_id)",
+    "ANALYZE bench_wide_runs",
+    "ANALYZE bench_narrow_runs",
+    "ANALYZE bench_run_payloads",
+]
+
+# What the status endpoint ran before (the full run entity) and runs now
+QUERIES = {
+    "inline payload, full row": "SELECT * FROM bench_wide_runs WHERE id = :id",
+    "separate payload, status column": "SELECT run_status FROM bench_narrow_runs WHERE id = :id",
+}
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_benchmark(runs: int, polls: int, text_kb: int) -> dict[str, dict[str, float]]:
+    """Return mean, p50 and p95 status-poll latency (ms) per layout."""
+    # Each md5 chunk is 33 characters, random enough that TOAST barely compresses it
+    chunks = max(1, text_kb * 1024 // 33)
+    ids = [f"run-{random.randint(1, runs)}" for _ in range(polls)]
+    results: dict[str, dict[str, float]] = {}
+
+    with engine.connect() as connection:
+        for setup in SETUP_SQL:
+            connection.execute(text(setup), {"runs": runs, "chunks": chunks})
+
+        for label, query in QUERIES.items():
+            statement = text(query)
+            # Warm the buffer cache so both layouts are timed from memory
+            for run_id in ids[:100]:
+                connection.execute(statement, {"id": run_id}).all()
+            samples = []
+            for run_id in ids:
+                start = time.perf_counter()
+                connection.execute(statement, {"id": run_id}).all()
+                samples.append((time.perf_counter() - start) * 1000)
+            results[label] = {
+                "mean_ms": statistics.mean(samples),
+                "p50_ms": _percentile(samples, 0.50),
+                "p95_ms": _percentile(samples, 0.95),
+            }
+        connection.rollback()
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5000)
+    parser.add_argument("--polls", type=int, default=2000)
+    parser.add_argument("--text-kb", type=int, default=32)
+    args = parser.parse_args()
+
+    setup_logging()
+    results = run_benchmark(args.runs, args.polls, args.text_kb)
+    for label, timings in results.items():
+        logger.info(
+            f"{label}: mean {timings['mean_ms']:.3f} ms, "
+            f"p50 {timings['p50_ms']:.3f} ms, p95 {timings['p95_ms']:.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
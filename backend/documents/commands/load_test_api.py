@@ -0,0 +1,113 @@
+"""Load test the upload, status and list endpoints of a running API.
+
+Keeps `--concurrency` requests in flight against one endpoint for
+`--duration` seconds and reports throughput and latency percentiles.
+
+Usage: python -m documents.commands.load_test_api [--base-url URL] [--endpoint upload|status|list]
+       [--concurrency N] [--duration SECONDS]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import time
+
+import httpx
+
+from common.logging import setup_logging
+
+
+logger = logging.getLogger("documents.commands")
+
+STATUS_RUNS = 20
+
+
+def _pdf_bytes() -> bytes:
+    # Random body so uploads are not deduplicated against each other
+    return b"%PDF-1.4\n" + os.urandom(16 * 1024)
+
+
+async def _upload(client: httpx.AsyncClient) -> httpx.Response:
+    return await client.post(
+        "/api/documents/upload",
+        files={"file": ("load-test.pdf", _pdf_bytes(), "application/pdf")},
+    )
+
+
+async def _worker(
+    client: httpx.AsyncClient, request, deadline: float, samples: list, errors: list
+) -> None:
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await request(client)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            samples.append((time.perf_counter() - start) * 1000)
+        else:
+            errors.append(1)
+
+
+async def run_load_test(
+    base_url: str, endpoint: str, concurrency: int, duration: float
+) -> dict[str, float]:
+    """Return requests/s, mean/p50/p99 latency (ms) and the error count."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        if endpoint == "upload":
+            request = _upload
+        elif endpoint == "status":
+            run_ids = [(await _upload(client)).json()["id"] for _ in range(STATUS_RUNS)]
+
+            async def request(client: httpx.AsyncClient) -> httpx.Response:
+                run_id = run_ids[int(time.perf_counter() * 1000) % len(run_ids)]
+                return await client.get(f"/api/documents/{run_id}/status")
+
+        else:
+
+            async def request(client: httpx.AsyncClient) -> httpx.Response:
+                return await client.get("/api/documents", params={"limit": 50})
+
+        samples: list[float] = []
+        errors: list[int] = []
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(_worker(client, request, deadline, samples, errors) for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - started
+
+    ordered = sorted(samples) or [0.0]
+    return {
+        "requests_per_second": len(samples) / elapsed,
+        "mean_ms": statistics.mean(ordered),
+        "p50_ms": ordered[len(ordered) // 2],
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+        "errors": len(errors),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--endpoint", choices=["upload", "status", "list"], default="status")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20)
+    args = parser.parse_args()
+
+    setup_logging()
+    result = asyncio.run(
+        run_load_test(args.base_url, args.endpoint, args.concurrency, args.duration)
+    )
+    logger.info(
+        f"{args.endpoint}: {result['requests_per_second']:.1f} req/s, "
+        f"mean {result['mean_ms']:.1f} ms, p50 {result['p50_ms']:.1f} ms, "
+        f"p99 {result['p99_ms']:.1f} ms, {result['errors']} errors"
+    )
+
+
+if __name__ == "__main__":
+    main()
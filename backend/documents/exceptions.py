@@ -12,3 +12,7 @@ class TextExtractionError(Exception):
 
 class UnsupportedFileTypeError(Exception):
     pass
+
+
+class LLMRateLimitedError(Exception):
+    pass
@@ -2,7 +2,9 @@ import uuid
 from datetime import datetime, UTC
 from enum import Enum
 from typing import Optional, Dict, Any
-from sqlmodel import SQLModel, Field, Column, JSON, Text
+from sqlalchemy import Computed, text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlmodel import SQLModel, Field, Column, Index, Relationship, Text
 
 
 class RunStatus(str, Enum):
@@ -12,6 +14,12 @@ class RunStatus(str, Enum):
     FAILED = "failed"
 
 
+class PipelineStage(str, Enum):
+    EXTRACTED = "extracted"
+    PARSED = "parsed"
+    PERSISTED = "persisted"
+
+
 class DocumentProcessingRun(SQLModel, table=True):
     """Database model for a single processing run of a veterinary medical record document.
     
@@ -20,18 +28,118 @@ class DocumentProcessingRun(SQLModel, table=True):
     """
 
     __tablename__ = "document_processing_runs"
+    __table_args__ = (
+        # Latest run per filename (backfill of documents_latest_run)
+        Index(
+            "ix_document_processing_runs_filename_created_at_id",
+            "filename",
+            "created_at",
+            "id",
+        ),
+    )
 
     id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
     filename: str
     document_type: str = Field(description="File extension/type (e.g., .pdf, .docx)")
     file_path: Optional[str] = Field(default=None, description="Path to stored file")
-    extracted_text: Optional[str] = Field(default=None, sa_column=Column(Text))
-    structured_data: Optional[Dict[str, Any]] = Field(
-        default=None, sa_column=Column(JSON)
+    content_hash: Optional[str] = Field(
+        default=None, index=True, description="SHA-256 hex digest of the file content"
+    )
+    prompt_version: Optional[str] = Field(
+        default=None, description="Version of the LLM prompts that produced structured_data"
     )
     run_status: RunStatus = Field(
         default=RunStatus.UPLOADED,
         description="Processing status: uploaded|processing|completed|failed",
     )
+    pipeline_stage: Optional[PipelineStage] = Field(
+        default=None,
+        description="Last finished processing stage: extracted|parsed|persisted",
+    )
     created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+
+    # Loaded only when accessed, so status and list queries stay narrow
+    payload: Optional["DocumentProcessingRunPayload"] = Relationship(
+        sa_relationship_kwargs={"uselist": False, "cascade": "all, delete-orphan"}
+    )
+
+
+# Text search configuration of `search_vector`; queries must use the same one
+TEXT_SEARCH_CONFIG = "english"
+# Longer texts are indexed up to this length (a tsvector is limited to 1 MB)
+MAX_SEARCH_TEXT_LENGTH = 500_000
+
+
+class DocumentProcessingRunPayload(SQLModel, table=True):
+    """Extracted text and structured data of a processing run.
+
+    Kept out of `document_processing_runs` so that the rows read by status
+    polls and listings stay small. `structured_data` is JSONB, indexed on the
+    paths the structured search filters on. `search_vector` is generated by
+    Postgres whenever the row is written, so full-text indexing needs no
+    extra step in the pipeline; it is not mapped, so loading a payload never
+    reads it.
+    """
+
+    __tablename__ = "document_processing_run_payloads"
+    __table_args__ = (
+        Index(
+            "ix_run_payloads_diagnoses",
+            text("(structured_data -> 'diagnoses') jsonb_path_ops"),
+            postgresql_using="gin",
+        ),
+        Index(
+            "ix_run_payloads_chronic_conditions",
+            text("(structured_data -> 'chronic_conditions') jsonb_path_ops"),
+            postgresql_using="gin",
+        ),
+        Index("ix_run_payloads_species", text("lower(structured_data ->> 'species')")),
+        Index("ix_run_payloads_search_vector", "search_vector", postgresql_using="gin"),
+    )
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
+
+    run_id: str = Field(foreign_key="document_processing_runs.id", primary_key=True)
+    extracted_text: Optional[str] = Field(default=None, sa_column=Column(Text))
+    structured_data: Optional[Dict[str, Any]] = Field(
+        default=None, sa_column=Column(JSONB)
+    )
+    search_vector: Optional[str] = Field(
+        default=None,
+        sa_column=Column(
+            TSVECTOR,
+            Computed(
+                f"to_tsvector('{TEXT_SEARCH_CONFIG}', "
+                f"left(coalesce(extracted_text, ''), {MAX_SEARCH_TEXT_LENGTH}))",
+                persisted=True,
+            ),
+        ),
+    )
+
+
+class DocumentLatestRun(SQLModel, table=True):
+    """Projection of the latest processing run of each document (by filename).
+
+    Maintained in the same transaction as the run inserts and status changes,
+    so listing documents is a single index scan instead of a join over the
+    whole run history.
+    """
+
+    __tablename__ = "documents_latest_run"
+    __table_args__ = (
+        Index("ix_documents_latest_run_created_at_run_id", "created_at", "run_id"),
+        Index(
+            "ix_documents_latest_run_run_status_created_at_run_id",
+            "run_status",
+            "created_at",
+            "run_id",
+        ),
+        Index("ix_documents_latest_run_run_id", "run_id", unique=True),
+    )
+
+    filename: str = Field(primary_key=True)
+    run_id: str = Field(foreign_key="document_processing_runs.id")
+    document_type: str
+    run_status: RunStatus = Field(default=RunStatus.UPLOADED)
+    created_at: datetime
+    updated_at: datetime
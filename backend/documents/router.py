@@ -1,23 +1,62 @@
+import asyncio
 import uuid
 import time
 
+import redis
 from common.logging import get_logger
+from common.redis import get_async_redis
 from documents.storage import storage
-from fastapi import APIRouter, Body, Depends, File, HTTPException, UploadFile
-from fastapi.responses import JSONResponse
-from sqlmodel import Session, select
-from sqlalchemy import desc, func
+from fastapi import APIRouter, Body, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import desc, null, tuple_
 from datetime import datetime, UTC
+from typing import Optional
 
-from common.database import get_session
+from common.database import get_async_session
 from .exceptions import (
     FileValidationError,
     TextExtractionError,
     UnsupportedFileTypeError,
 )
-from .models import DocumentProcessingRun
-from .schemas import ProcessRequest, ValidatedFile
-from .tasks import process_document_task
+from .models import (
+    DocumentLatestRun,
+    DocumentProcessingRun,
+    DocumentProcessingRunPayload,
+    PipelineStage,
+    RunStatus,
+)
+from .services.deduplication.content_hash import find_stored_blob_run
+from .services.latest_run.projection import upsert_latest_run
+from .services.search.filters import search_matches
+from .services.search.full_text import text_snippets
+from .services.run_cache.payloads import (
+    detail_key,
+    fill_run_payload,
+    get_run_payload,
+    invalidate_run_payloads,
+    serialize_run_detail,
+    serialize_run_status,
+    status_key,
+)
+from .services.events.run_events import (
+    build_run_event,
+    get_run_snapshot,
+    publish_run_event,
+    stream_run_events,
+)
+from .schemas import (
+    LIST_PAGE_SIZE,
+    MAX_LIST_PAGE_SIZE,
+    ProcessRequest,
+    StreamingFileValidator,
+    decode_list_cursor,
+    decode_search_cursor,
+    encode_list_cursor,
+    encode_search_cursor,
+)
+from .tasks import build_processing_pipeline
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
@@ -26,39 +65,61 @@ router = APIRouter(prefix="/documents", tags=["documents"])
 async def upload_document(
     file: UploadFile = File(...),
     logger=Depends(get_logger),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    """Upload a document file and create a processing run."""
-    content = await file.read()
+    """Upload a document file and create a processing run.
 
+    The body is streamed in fixed-size chunks to a staged file while it is
+    validated and hashed, then moved into place once fully received.
+    """
     try:
-        validated = ValidatedFile(
-            filename=file.filename,
-            content=content,
-            content_type=file.content_type,
+        validated = StreamingFileValidator(
+            filename=file.filename or "", content_type=file.content_type
         )
+        staged_path = await storage.stage(validated.iter_chunks(file))
     except FileValidationError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
 
     file_id = str(uuid.uuid4())
     original_filename = file.filename
-
-    try:
-        safe_filename = await storage.save(
-            file_id, validated.content, validated.file_ext
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+    content_hash = validated.content_hash
+
+    # Identical bytes already stored: point the new run at the existing blob
+    blob_run = await session.run_sync(find_stored_blob_run, content_hash)
+    blob_path = (
+        await storage.find_file(blob_run.id, blob_run.document_type, blob_run.file_path)
+        if blob_run
+        else None
+    )
+    deduplicated = blob_path is not None
+    if blob_run and blob_path:
+        await storage.discard(staged_path)
+        file_path = str(blob_path)
+        safe_filename = blob_path.name
+        logger.info(f"Upload {file_id} deduplicated to stored file of run {blob_run.id}")
+    else:
+        try:
+            safe_filename = await storage.commit(
+                staged_path, file_id, validated.file_ext
+            )
+        except Exception as e:
+            await storage.discard(staged_path)
+            raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+        file_path = str(storage.get_full_path(file_id, validated.file_ext))
 
     processing_run = DocumentProcessingRun(
         id=file_id,
         filename=original_filename,
         document_type=validated.file_ext,
-        file_path=str(storage.get_full_path(file_id, validated.file_ext)),
+        file_path=file_path,
+        content_hash=content_hash,
     )
     session.add(processing_run)
-    session.commit()
-    session.refresh(processing_run)
+    await session.flush()
+    await session.run_sync(upsert_latest_run, processing_run)
+    await session.commit()
 
     logger.info(f"Processing run created: {file_id} - {validated.filename}")
 
@@ -68,8 +129,10 @@ async def upload_document(
             "id": file_id,
             "filename": validated.filename,
             "saved_filename": safe_filename,
-            "size": len(validated.content),
+            "size": validated.size,
             "content_type": validated.content_type,
+            "content_hash": content_hash,
+            "deduplicated": deduplicated,
             "message": "File uploaded successfully",
         },
     )
@@ -79,30 +142,41 @@ async def upload_document(
 async def process_document(
     request: ProcessRequest = Body(...),
     logger=Depends(get_logger),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     """Process a document processing run to extract text and structured data."""
     file_id = request.file_id
 
     statement = select(DocumentProcessingRun).where(DocumentProcessingRun.id == file_id)
-    processing_run = session.exec(statement).first()
+    processing_run = (await session.exec(statement)).first()
 
     if not processing_run:
         raise HTTPException(
             status_code=404, detail=f"Processing run with ID {file_id} not found"
         )
 
-    file_path = await storage.find_file(file_id)
+    file_path = await storage.find_file(
+        file_id, processing_run.document_type, processing_run.file_path
+    )
     if not file_path:
         raise HTTPException(
             status_code=404, detail=f"File not found for file_id: {file_id}"
         )
 
     try:
-        processing_run.run_status = "processing"
+        if processing_run.run_status == RunStatus.COMPLETED:
+            # Reprocessing a completed run starts the pipeline from scratch;
+            # failed runs keep their stage and resume after it
+            processing_run.pipeline_stage = None
+        processing_run.run_status = RunStatus.PROCESSING
         processing_run.updated_at = datetime.now(UTC)
         session.add(processing_run)
-        session.commit()
+        await session.flush()
+        await session.run_sync(upsert_latest_run, processing_run)
+        await session.commit()
+        await asyncio.to_thread(invalidate_run_payloads, file_id)
+        # Replaces the snapshot of a previous run so streams wait for this one
+        await asyncio.to_thread(publish_run_event, file_id, "processing")
 
         await send_process_document_task(file_id, file_path)
 
@@ -114,6 +188,7 @@ async def process_document(
                 "file_id": file_id,
                 "status": "processing",
                 "status_url": poll_url,
+                "events_url": f"/api/documents/{file_id}/events",
             },
         )
     except UnsupportedFileTypeError as e:
@@ -127,98 +202,288 @@ async def process_document(
 
 
 async def send_process_document_task(file_id, file_path):
-    process_document_task.apply_async(
-        args=[
-            file_id,
-            str(file_path),
-        ]
-    )
+    build_processing_pipeline(file_id, str(file_path)).apply_async()
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat datetimes given without a timezone as UTC."""
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
+
+
+def _paginate_latest_runs(statement, cursor: Optional[str], limit: int):
+    """Keyset pagination over documents_latest_run, newest first."""
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_list_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        statement = statement.where(
+            tuple_(DocumentLatestRun.created_at, DocumentLatestRun.run_id)
+            < tuple_(cursor_created_at, cursor_id)
+        )
+    return statement.order_by(
+        col(DocumentLatestRun.created_at).desc(),
+        col(DocumentLatestRun.run_id).desc(),
+    ).limit(limit + 1)
+
+
+def _paginate_ranked(statement, rank, cursor: Optional[str], limit: int):
+    """Keyset pagination over ranked search hits, best first."""
+    if cursor:
+        try:
+            cursor_rank, cursor_id = decode_search_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        statement = statement.where(
+            tuple_(rank, DocumentLatestRun.run_id) < tuple_(cursor_rank, cursor_id)
+        )
+    return statement.order_by(
+        desc(rank),
+        col(DocumentLatestRun.run_id).desc(),
+    ).limit(limit + 1)
+
+
+def _next_cursor(page: list[DocumentLatestRun], has_more: bool) -> Optional[str]:
+    return encode_list_cursor(page[-1].created_at, page[-1].run_id) if has_more else None
+
+
+def _latest_run_item(run: DocumentLatestRun) -> dict:
+    return {
+        "id": run.run_id,
+        "filename": run.filename,
+        "document_type": run.document_type,
+        "created_at": run.created_at.isoformat() if run.created_at else None,
+        "updated_at": run.updated_at.isoformat() if run.updated_at else None,
+        "status": run.run_status,
+    }
 
 
 @router.get("")
 async def list_documents(
-    session: Session = Depends(get_session),
+    limit: int = Query(default=LIST_PAGE_SIZE, ge=1, le=MAX_LIST_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None),
+    status: Optional[RunStatus] = Query(default=None),
+    created_after: Optional[datetime] = Query(default=None),
+    created_before: Optional[datetime] = Query(default=None),
+    session: AsyncSession = Depends(get_async_session),
     logger=Depends(get_logger),
 ):
-    """List the latest document processing run for each unique filename."""
-    subquery = (
-        select(
-            DocumentProcessingRun.filename,
-            func.max(DocumentProcessingRun.created_at).label("max_created_at")
-        )
-        .group_by(DocumentProcessingRun.filename)
-    ).subquery()
+    """List the latest document processing run for each unique filename.
+
+    Runs are listed newest first, one page at a time: pass the returned
+    `next_cursor` to get the next page. `status` and the created_at range
+    filter the latest runs.
+    """
+    # One row per document, kept up to date with its latest run
+    statement = select(DocumentLatestRun)
+    if status:
+        statement = statement.where(DocumentLatestRun.run_status == status)
+    if created_after:
+        statement = statement.where(DocumentLatestRun.created_at >= _as_utc(created_after))
+    if created_before:
+        statement = statement.where(DocumentLatestRun.created_at < _as_utc(created_before))
+    statement = _paginate_latest_runs(statement, cursor, limit)
+
+    latest_runs = (await session.exec(statement)).all()
+    page = latest_runs[:limit]
+    result = [_latest_run_item(run) for run in page]
 
-    statement = (
-        select(DocumentProcessingRun)
-        .join(
-            subquery,
-            (DocumentProcessingRun.filename == subquery.c.filename)
-            & (DocumentProcessingRun.created_at == subquery.c.max_created_at)
+    logger.info(f"Listed {len(result)} latest processing runs (grouped by filename)")
+
+    return JSONResponse(
+        status_code=200,
+        content={"documents": result, "next_cursor": _next_cursor(page, len(latest_runs) > limit)},
+    )
+
+
+@router.get("/search")
+async def search_documents(
+    icd_code: Optional[str] = Query(default=None),
+    species: Optional[str] = Query(default=None),
+    chronic_condition: Optional[str] = Query(default=None),
+    q: Optional[str] = Query(default=None),
+    limit: int = Query(default=LIST_PAGE_SIZE, ge=1, le=MAX_LIST_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None),
+    session: AsyncSession = Depends(get_async_session),
+    logger=Depends(get_logger),
+):
+    """Search the latest run of each document by its structured data and text.
+
+    Filters are combined with AND and evaluated in Postgres (see
+    `search_matches`). With `q`, the extracted text is searched too and hits
+    are ranked best first, each with a highlighted snippet; otherwise results
+    are listed newest first. Results are paginated like the document listing.
+    """
+    q = q.strip() if q and q.strip() else None
+    matches = search_matches(
+        icd_code=icd_code, species=species, chronic_condition=chronic_condition, q=q
+    )
+    if matches is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Provide at least one of q, icd_code, species or chronic_condition",
         )
-        .order_by(desc(DocumentProcessingRun.created_at))  # type: ignore[arg-type]
+
+    statement = select(
+        DocumentLatestRun,
+        matches.c.pet_name,
+        matches.c.species,
+        matches.c.rank if q else null(),
+    ).join(matches, matches.c.run_id == DocumentLatestRun.run_id)
+    if q:
+        statement = _paginate_ranked(statement, matches.c.rank, cursor, limit)
+    else:
+        statement = _paginate_latest_runs(statement, cursor, limit)
+
+    rows = (await session.exec(statement)).all()
+    page = rows[:limit]
+    snippets = (
+        await session.run_sync(text_snippets, [run.run_id for run, *_ in page], q) if q else {}
     )
-    processing_runs = session.exec(statement).all()
-
-    result = [
-        {
-            "id": run.id,
-            "filename": run.filename,
-            "document_type": run.document_type,
-            "created_at": run.created_at.isoformat() if run.created_at else None,
-            "updated_at": run.updated_at.isoformat() if run.updated_at else None,
-            "status": run.run_status,
-        }
-        for run in processing_runs
-    ]
+    result = []
+    for run, pet_name, pet_species, rank in page:
+        item = {**_latest_run_item(run), "pet_name": pet_name, "species": pet_species}
+        if q:
+            item.update(rank=rank, snippet=snippets.get(run.run_id))
+        result.append(item)
+
+    next_cursor = None
+    if len(rows) > limit:
+        last_run, _, _, last_rank = page[-1]
+        next_cursor = (
+            encode_search_cursor(last_rank, last_run.run_id)
+            if q
+            else encode_list_cursor(last_run.created_at, last_run.run_id)
+        )
 
-    logger.info(f"Listed {len(result)} latest processing runs (grouped by filename)")
+    logger.info(f"Search matched {len(result)} documents on this page")
 
-    return JSONResponse(status_code=200, content={"documents": result})
+    return JSONResponse(
+        status_code=200, content={"documents": result, "next_cursor": next_cursor}
+    )
 
 
 @router.get("/{file_id}")
 async def retrieve_document(
     file_id: str,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    """Retrieve a document processing run and its results."""
-    statement = select(DocumentProcessingRun).where(DocumentProcessingRun.id == file_id)
-    processing_run = session.exec(statement).first()
+    """Retrieve a document processing run and its results.
 
-    if not processing_run:
+    Served from the pre-serialized payload cached in Redis when present.
+    """
+    redis_client = get_async_redis()
+    cached = await get_run_payload(detail_key(file_id), redis_client)
+    if cached is not None:
+        return Response(status_code=200, content=cached, media_type="application/json")
+
+    statement = (
+        select(
+            DocumentProcessingRun.filename,
+            DocumentProcessingRun.run_status,
+            DocumentProcessingRunPayload.extracted_text,
+            DocumentProcessingRunPayload.structured_data,
+        )
+        .outerjoin(
+            DocumentProcessingRunPayload,
+            col(DocumentProcessingRunPayload.run_id) == col(DocumentProcessingRun.id),
+        )
+        .where(DocumentProcessingRun.id == file_id)
+    )
+    row = (await session.exec(statement)).first()
+
+    if not row:
         raise HTTPException(
             status_code=404,
             detail=f"Processing run with ID {file_id} not found",
         )
 
-    result_data = {
-        "file_id": processing_run.id,
-        "filename": processing_run.filename,
-        "extracted_text": processing_run.extracted_text,
-        "structured_data": processing_run.structured_data,
-        "status": processing_run.run_status,
-    }
+    filename, run_status, extracted_text, structured_data = row
+    payload = serialize_run_detail(
+        file_id,
+        filename,
+        run_status,
+        extracted_text,
+        dict(structured_data) if structured_data is not None else None,
+    )
+    await fill_run_payload(detail_key(file_id), payload, run_status, redis_client)
 
-    return JSONResponse(status_code=200, content=result_data)
+    return Response(status_code=200, content=payload, media_type="application/json")
 
 
 @router.get("/{file_id}/status")
 async def retrieve_document_status(
     file_id: str,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    """Retrieve processing status for a document processing run."""
-    statement = select(DocumentProcessingRun).where(DocumentProcessingRun.id == file_id)
-    processing_run = session.exec(statement).first()
+    """Retrieve processing status for a document processing run.
 
-    if not processing_run:
+    Served from the pre-serialized payload cached in Redis when present.
+    """
+    redis_client = get_async_redis()
+    cached = await get_run_payload(status_key(file_id), redis_client)
+    if cached is not None:
+        return Response(status_code=200, content=cached, media_type="application/json")
+
+    statement = select(DocumentProcessingRun.run_status).where(
+        DocumentProcessingRun.id == file_id
+    )
+    run_status = (await session.exec(statement)).first()
+
+    if run_status is None:
         raise HTTPException(
             status_code=404,
             detail=f"Processing run with ID {file_id} not found",
         )
 
-    return JSONResponse(
-        status_code=200,
-        content={"file_id": processing_run.id, "status": processing_run.run_status},
+    payload = serialize_run_status(file_id, run_status)
+    await fill_run_payload(status_key(file_id), payload, run_status, redis_client)
+
+    return Response(status_code=200, content=payload, media_type="application/json")
+
+
+@router.get("/{file_id}/events")
+async def stream_document_events(
+    file_id: str,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Stream status and stage transitions of a processing run as Server-Sent Events.
+
+    Transitions are pushed from the Celery tasks over Redis pub/sub. The
+    database is read only when Redis has no status snapshot for the run, and
+    never while the client waits. The status endpoint remains the fallback.
+    """
+    redis_client = get_async_redis()
+    try:
+        snapshot = await get_run_snapshot(file_id, redis_client)
+    except redis.RedisError:
+        raise HTTPException(
+            status_code=503,
+            detail="Status events unavailable, poll the status endpoint instead",
+        )
+
+    initial_event = None
+    if snapshot is None:
+        statement = select(
+            DocumentProcessingRun.run_status, DocumentProcessingRun.pipeline_stage
+        ).where(DocumentProcessingRun.id == file_id)
+        row = (await session.exec(statement)).first()
+        # Release the connection before streaming
+        await session.close()
+        if not row:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Processing run with ID {file_id} not found",
+            )
+        run_status, pipeline_stage = row
+        initial_event = build_run_event(
+            file_id,
+            RunStatus(run_status).value,
+            PipelineStage(pipeline_stage).value if pipeline_stage else None,
+        )
+
+    return StreamingResponse(
+        stream_run_events(file_id, redis_client, initial_event),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
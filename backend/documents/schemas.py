@@ -1,44 +1,128 @@
+import base64
+import hashlib
+import json
+from datetime import datetime
 from pathlib import Path
+from typing import AsyncIterator, Optional
 
-from pydantic import BaseModel, ValidationError, model_validator
+from fastapi import UploadFile
+from pydantic import BaseModel
 
 from .exceptions import FileValidationError
 
 
 ALLOWED_EXTENSIONS = {".pdf", ".doc", ".docx", ".jpg", ".jpeg", ".png"}
 MAX_FILE_SIZE = 50 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
+# Leading bytes ("magic numbers") expected for each allowed extension
+FILE_SIGNATURES: dict[str, tuple[bytes, ...]] = {
+    ".pdf": (b"%PDF-",),
+    ".png": (b"\x89PNG\r\n\x1a\n",),
+    ".jpg": (b"\xff\xd8\xff",),
+    ".jpeg": (b"\xff\xd8\xff",),
+    ".doc": (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1",),
+    ".docx": (b"PK\x03\x04",),
+}
+SIGNATURE_LENGTH = max(len(sig) for sigs in FILE_SIGNATURES.values() for sig in sigs)
 
-class ValidatedFile(BaseModel):
-    filename: str
-    content: bytes
-    content_type: str
+LIST_PAGE_SIZE = 50
+MAX_LIST_PAGE_SIZE = 200
 
-    def __init__(self, **data):
-        try:
-            super().__init__(**data)
-        except ValidationError as e:
-            raise FileValidationError(e.errors()[0]["msg"])
 
-    @model_validator(mode="after")
-    def validate_file(self):
-        file_ext = Path(self.filename).suffix.lower()
-        if file_ext not in ALLOWED_EXTENSIONS:
+class StreamingFileValidator:
+    """
+    Validate an upload incrementally while it is streamed to storage.
+
+    Size limits, the file signature and the SHA-256 content hash are computed
+    chunk by chunk, so the whole file is never held in memory.
+    """
+
+    def __init__(self, filename: str, content_type: Optional[str] = None):
+        self.filename = filename
+        self.content_type = content_type
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._head = b""
+        self._signature_checked = False
+
+        if self.file_ext not in ALLOWED_EXTENSIONS:
             raise FileValidationError(
                 f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
             )
-        if len(self.content) == 0:
-            raise FileValidationError("File is empty")
-        if len(self.content) > MAX_FILE_SIZE:
-            raise FileValidationError(
-                f"File too large. Maximum size: {MAX_FILE_SIZE / (1024 * 1024):.0f} MB"
-            )
-        return self
 
     @property
     def file_ext(self) -> str:
         return Path(self.filename).suffix.lower()
 
+    @property
+    def content_hash(self) -> str:
+        return self._hash.hexdigest()
+
+    def update(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > MAX_FILE_SIZE:
+            raise FileValidationError(
+                f"File too large. Maximum size: {MAX_FILE_SIZE / (1024 * 1024):.0f} MB"
+            )
+
+        if not self._signature_checked:
+            self._head += chunk[: SIGNATURE_LENGTH - len(self._head)]
+            if len(self._head) >= SIGNATURE_LENGTH:
+                self._check_signature()
+
+        self._hash.update(chunk)
+
+    def finalize(self) -> None:
+        if self.size == 0:
+            raise FileValidationError("File is empty")
+        if not self._signature_checked:
+            self._check_signature()
+
+    def _check_signature(self) -> None:
+        self._signature_checked = True
+        if not self._head.startswith(FILE_SIGNATURES[self.file_ext]):
+            raise FileValidationError(
+                f"File content does not match the {self.file_ext} file type"
+            )
+
+    async def iter_chunks(
+        self, file: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        """Yield validated chunks of the upload, finalizing once it is consumed."""
+        while chunk := await file.read(chunk_size):
+            self.update(chunk)
+            yield chunk
+        self.finalize()
+
 
 class ProcessRequest(BaseModel):
     file_id: str
+
+
+def encode_list_cursor(created_at: datetime, run_id: str) -> str:
+    """Encode the (created_at, id) keyset position of the last listed run."""
+    payload = json.dumps({"created_at": created_at.isoformat(), "id": run_id})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_list_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(payload["created_at"]), str(payload["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def encode_search_cursor(rank: float, run_id: str) -> str:
+    """Encode the (rank, id) keyset position of the last ranked search hit."""
+    payload = json.dumps({"rank": rank, "id": run_id})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, str]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(payload["rank"]), str(payload["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,47 @@
+from typing import Optional
+
+from sqlalchemy.orm import Session
+from sqlmodel import col, select
+
+from documents.models import DocumentProcessingRun, RunStatus
+
+
+def find_stored_blob_run(
+    session: Session, content_hash: str
+) -> Optional[DocumentProcessingRun]:
+    """Return the latest run whose stored file has the given content hash."""
+    statement = (
+        select(DocumentProcessingRun)
+        .where(DocumentProcessingRun.content_hash == content_hash)
+        .where(DocumentProcessingRun.file_path.is_not(None))  # type: ignore[union-attr]
+        .order_by(col(DocumentProcessingRun.created_at).desc())
+        .limit(1)
+    )
+    return session.scalars(statement).first()
+
+
+def find_reusable_run(
+    session: Session,
+    content_hash: Optional[str],
+    prompt_version: str,
+    exclude_id: Optional[str] = None,
+) -> Optional[DocumentProcessingRun]:
+    """
+    Return the latest completed run with the same content hash and prompt version.
+
+    Its extracted text and structured data can be reused instead of running
+    text extraction and the LLM again.
+    """
+    if not content_hash:
+        return None
+
+    statement = (
+        select(DocumentProcessingRun)
+        .where(DocumentProcessingRun.content_hash == content_hash)
+        .where(DocumentProcessingRun.prompt_version == prompt_version)
+        .where(DocumentProcessingRun.run_status == RunStatus.COMPLETED)
+    )
+    if exclude_id:
+        statement = statement.where(DocumentProcessingRun.id != exclude_id)
+    statement = statement.order_by(col(DocumentProcessingRun.created_at).desc()).limit(1)
+    return session.scalars(statement).first()
@@ -0,0 +1,105 @@
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Optional
+
+import redis
+import redis.asyncio
+
+from common.redis import get_redis
+
+
+RUN_EVENTS_ENABLED = os.getenv("RUN_EVENTS_ENABLED", "true").lower() == "true"
+RUN_STATUS_SNAPSHOT_TTL_SECONDS = int(os.getenv("RUN_STATUS_SNAPSHOT_TTL_SECONDS", str(24 * 3600)))
+RUN_EVENTS_HEARTBEAT_SECONDS = float(os.getenv("RUN_EVENTS_HEARTBEAT_SECONDS", "15"))
+RUN_EVENTS_MAX_STREAM_SECONDS = float(os.getenv("RUN_EVENTS_MAX_STREAM_SECONDS", "600"))
+
+CHANNEL_PREFIX = "run_events:"
+SNAPSHOT_PREFIX = "run_status:"
+TERMINAL_STATUSES = {"completed", "failed"}
+
+logger = logging.getLogger("documents.run_events")
+
+
+def build_run_event(
+    file_id: str, status: str, stage: Optional[str] = None
+) -> dict[str, Any]:
+    return {"file_id": file_id, "status": status, "stage": stage, "timestamp": time.time()}
+
+
+def publish_run_event(
+    file_id: str,
+    status: str,
+    stage: Optional[str] = None,
+    redis_client: Optional[redis.Redis] = None,
+) -> None:
+    """
+    Publish a run status/stage transition and store it as the run's snapshot.
+
+    The snapshot lets clients that subscribe late get the current state
+    without a database query. Redis errors are logged and ignored; the
+    polling endpoint still reports the status from the database.
+    """
+    if not RUN_EVENTS_ENABLED:
+        return
+    client = redis_client or get_redis()
+    payload = json.dumps(build_run_event(file_id, status, stage))
+    try:
+        pipe = client.pipeline()
+        pipe.set(f"{SNAPSHOT_PREFIX}{file_id}", payload, ex=RUN_STATUS_SNAPSHOT_TTL_SECONDS)
+        pipe.publish(f"{CHANNEL_PREFIX}{file_id}", payload)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Failed to publish run event for {file_id}: {str(e)}")
+
+
+async def get_run_snapshot(
+    file_id: str, redis_client: redis.asyncio.Redis
+) -> Optional[dict[str, Any]]:
+    raw = await redis_client.get(f"{SNAPSHOT_PREFIX}{file_id}")
+    return json.loads(raw) if raw else None
+
+
+def format_sse(event: dict[str, Any]) -> str:
+    return f"event: status\ndata: {json.dumps(event)}\n\n"
+
+
+async def stream_run_events(
+    file_id: str,
+    redis_client: redis.asyncio.Redis,
+    initial_event: Optional[dict[str, Any]] = None,
+    heartbeat_seconds: float = RUN_EVENTS_HEARTBEAT_SECONDS,
+    max_stream_seconds: float = RUN_EVENTS_MAX_STREAM_SECONDS,
+) -> AsyncIterator[str]:
+    """
+    Yield Server-Sent Events for a run until it completes or fails.
+
+    The channel is subscribed before the snapshot is read so no transition
+    can be missed in between. Comments are sent as heartbeats so proxies
+    keep the connection open.
+    """
+    pubsub = redis_client.pubsub()
+    await pubsub.subscribe(f"{CHANNEL_PREFIX}{file_id}")
+    try:
+        event = await get_run_snapshot(file_id, redis_client) or initial_event
+        if event:
+            yield format_sse(event)
+            if event["status"] in TERMINAL_STATUSES:
+                return
+
+        deadline = time.monotonic() + max_stream_seconds
+        while time.monotonic() < deadline:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=heartbeat_seconds
+            )
+            if message is None:
+                yield ": keep-alive\n\n"
+                continue
+            event = json.loads(message["data"])
+            yield format_sse(event)
+            if event["status"] in TERMINAL_STATUSES:
+                return
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
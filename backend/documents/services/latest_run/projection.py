@@ -0,0 +1,62 @@
+from typing import cast
+
+from sqlalchemy import CursorResult, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from documents.models import DocumentLatestRun, DocumentProcessingRun
+
+
+def upsert_latest_run(session: Session, processing_run: DocumentProcessingRun) -> None:
+    """
+    Record `processing_run` as the latest run of its document, in the session's transaction.
+
+    The row is only replaced by the same run or a newer one, so a status update
+    of an older run never hides a newer upload of the same document. The run
+    must already be flushed.
+    """
+    values = {
+        "filename": processing_run.filename,
+        "run_id": processing_run.id,
+        "document_type": processing_run.document_type,
+        "run_status": processing_run.run_status,
+        "created_at": processing_run.created_at,
+        "updated_at": processing_run.updated_at,
+    }
+    statement = insert(DocumentLatestRun).values(**values)
+    latest = DocumentLatestRun.__table__.c  # type: ignore[attr-defined]
+    statement = statement.on_conflict_do_update(
+        index_elements=[latest.filename],
+        set_={
+            column: statement.excluded[column]
+            for column in ("run_id", "document_type", "run_status", "created_at", "updated_at")
+        },
+        where=tuple_(latest.created_at, latest.run_id)
+        <= tuple_(statement.excluded.created_at, statement.excluded.run_id),
+    )
+    session.execute(statement)
+
+
+BACKFILL_LATEST_RUNS_SQL = text(
+    """
+    INSERT INTO documents_latest_run
+        (filename, run_id, document_type, run_status, created_at, updated_at)
+    SELECT DISTINCT ON (filename)
+        filename, id, document_type, run_status, created_at, updated_at
+    FROM document_processing_runs
+    ORDER BY filename, created_at DESC, id DESC
+    ON CONFLICT (filename) DO UPDATE SET
+        run_id = EXCLUDED.run_id,
+        document_type = EXCLUDED.document_type,
+        run_status = EXCLUDED.run_status,
+        created_at = EXCLUDED.created_at,
+        updated_at = EXCLUDED.updated_at
+    """
+)
+
+
+def backfill_latest_runs(session: Session) -> int:
+    """Rebuild the latest-run projection from the full run history."""
+    result = cast(CursorResult, session.execute(BACKFILL_LATEST_RUNS_SQL))
+    session.commit()
+    return result.rowcount
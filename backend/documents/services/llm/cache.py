@@ -0,0 +1,157 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import redis
+
+from common.redis import get_redis
+
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_REDIS_ENABLED = os.getenv("LLM_CACHE_REDIS_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "256"))
+LLM_CACHE_REDIS_MAX_ENTRIES = int(os.getenv("LLM_CACHE_REDIS_MAX_ENTRIES", "100000"))
+LLM_CACHE_MAX_ENTRY_BYTES = int(os.getenv("LLM_CACHE_MAX_ENTRY_BYTES", str(256 * 1024)))
+
+KEY_PREFIX = "llm_response:"
+INDEX_KEY = "llm_response_index"
+
+logger = logging.getLogger("documents.llm_cache")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so re-scans differing only in layout share a cache key."""
+    return " ".join(text.split())
+
+
+def build_cache_key(system_prompt: str, user_prompt: str, model: str, text: str) -> str:
+    """Hash the prompts, model and normalized text into a cache key."""
+    digest = hashlib.sha256()
+    for part in (system_prompt, user_prompt, model, normalize_text(text)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return f"{KEY_PREFIX}{digest.hexdigest()}"
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LLMResponseCache:
+    """
+    Two-tier LLM response cache: an in-process LRU in front of Redis.
+
+    Redis entries expire after the TTL, and the oldest entries are evicted once
+    more than `redis_max_entries` are stored. Redis errors are logged and
+    treated as cache misses so the LLM call still goes through.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+        max_entry_bytes: int = LLM_CACHE_MAX_ENTRY_BYTES,
+        redis_client: Optional[redis.Redis] = None,
+        redis_max_entries: int = LLM_CACHE_REDIS_MAX_ENTRIES,
+    ):
+        self.local = LRUCache(max_entries, ttl_seconds)
+        self.ttl_seconds = ttl_seconds
+        self.max_entry_bytes = max_entry_bytes
+        self.redis_client = redis_client
+        self.redis_max_entries = redis_max_entries
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        value = self.local.get(key)
+        if value is not None or self.redis_client is None:
+            return value
+
+        try:
+            raw = self.redis_client.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"LLM cache read failed: {str(e)}")
+            return None
+        if raw is None:
+            return None
+
+        value = json.loads(raw)
+        self.local.set(key, value)
+        return value
+
+    def set(self, key: str, value: dict[str, Any]) -> None:
+        self.local.set(key, value)
+        if self.redis_client is None:
+            return
+
+        payload = json.dumps(value)
+        if len(payload) > self.max_entry_bytes:
+            return
+
+        now = time.time()
+        try:
+            pipe = self.redis_client.pipeline()
+            pipe.set(key, payload, ex=self.ttl_seconds)
+            pipe.zadd(INDEX_KEY, {key: now})
+            pipe.zremrangebyscore(INDEX_KEY, "-inf", now - self.ttl_seconds)
+            pipe.zcard(INDEX_KEY)
+            size = pipe.execute()[-1]
+            if size > self.redis_max_entries:
+                self._evict_oldest(size - self.redis_max_entries)
+        except redis.RedisError as e:
+            logger.warning(f"LLM cache write failed: {str(e)}")
+
+    def _evict_oldest(self, count: int) -> None:
+        assert self.redis_client is not None
+        oldest = self.redis_client.zrange(INDEX_KEY, 0, count - 1)
+        if oldest:
+            pipe = self.redis_client.pipeline()
+            pipe.delete(*oldest)
+            pipe.zrem(INDEX_KEY, *oldest)
+            pipe.execute()
+
+
+_llm_response_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_response_cache() -> Optional[LLMResponseCache]:
+    """Return the process-wide LLM response cache, or None when disabled."""
+    global _llm_response_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _llm_response_cache is None:
+        redis_client = get_redis() if LLM_CACHE_REDIS_ENABLED else None
+        _llm_response_cache = LLMResponseCache(redis_client=redis_client)
+    return _llm_response_cache
@@ -1,10 +1,79 @@
 import os
+import threading
 from typing import Optional
 
+import httpx
 from openai import OpenAI
 
+from documents.services.llm.rate_limit import LLM_RATE_LIMIT_ENABLED, get_llm_rate_limiter
+
+
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "64"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "32"))
+OPENAI_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_SECONDS", "60"))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "120"))
+OPENAI_CONNECT_TIMEOUT_SECONDS = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "10"))
+# SDK retries; only used without the LLM rate limiter, which handles 429s itself
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+_lock = threading.Lock()
+_client: Optional[OpenAI] = None
+_client_pid: Optional[int] = None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(OPENAI_TIMEOUT_SECONDS, connect=OPENAI_CONNECT_TIMEOUT_SECONDS)
+
+
+def _observe_rate_limit_headers(response: httpx.Response) -> None:
+    rate_limiter = get_llm_rate_limiter()
+    if rate_limiter:
+        rate_limiter.observe_headers(response.headers)
+
 
 def get_openai_client() -> Optional[OpenAI]:
-    """Dependency to get OpenAI client."""
+    """
+    Return the process-wide OpenAI client, or None if no API key is configured.
+
+    The client keeps one pooled HTTP client per process, so connections (and
+    their TLS sessions) are reused across documents. A forked worker gets its
+    own client instead of sharing the parent's sockets.
+    """
+    global _client, _client_pid
     api_key = os.getenv("OPENAI_API_KEY")
-    return OpenAI(api_key=api_key) if api_key else None
+    if not api_key:
+        return None
+
+    with _lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = OpenAI(
+                api_key=api_key,
+                # Retried requests would bypass the limiter's token bucket and
+                # hide 429s from its concurrency backoff
+                max_retries=0 if LLM_RATE_LIMIT_ENABLED else OPENAI_MAX_RETRIES,
+                http_client=httpx.Client(
+                    limits=_limits(),
+                    timeout=_timeout(),
+                    event_hooks={"response": [_observe_rate_limit_headers]},
+                ),
+            )
+            _client_pid = os.getpid()
+        return _client
+
+
+def close_openai_client() -> None:
+    """Close the pooled client of this process (e.g. at worker shutdown)."""
+    global _client, _client_pid
+    with _lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
@@ -0,0 +1,367 @@
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Mapping, Optional, TypeVar
+
+import openai
+import redis
+
+from common.redis import get_redis
+from documents.exceptions import LLMRateLimitedError
+
+
+LLM_RATE_LIMIT_ENABLED = os.getenv("LLM_RATE_LIMIT_ENABLED", "true").lower() == "true"
+# Account limits shared by every worker (requests and tokens per minute)
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_INITIAL_CONCURRENCY = int(os.getenv("LLM_INITIAL_CONCURRENCY", "8"))
+LLM_TARGET_LATENCY_SECONDS = float(os.getenv("LLM_TARGET_LATENCY_SECONDS", "30"))
+# Counted against tokens/min before the response reports the real usage
+LLM_COMPLETION_TOKENS_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKENS_ESTIMATE", "1000"))
+# Remaining share of a limit (from response headers) below which we back off
+LLM_RATE_LIMIT_HEADROOM = float(os.getenv("LLM_RATE_LIMIT_HEADROOM", "0.1"))
+LLM_RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("LLM_RATE_LIMIT_MAX_WAIT_SECONDS", "120"))
+LLM_RATE_LIMIT_RETRIES = int(os.getenv("LLM_RATE_LIMIT_RETRIES", "4"))
+# Celery retries of the parse stage once the limiter gives up
+LLM_RATE_LIMIT_TASK_RETRIES = int(os.getenv("LLM_RATE_LIMIT_TASK_RETRIES", "5"))
+LLM_RATE_LIMIT_TASK_RETRY_DELAY_SECONDS = int(
+    os.getenv("LLM_RATE_LIMIT_TASK_RETRY_DELAY_SECONDS", "60")
+)
+
+REQUESTS_BUCKET_KEY = "llm_rate_limit:requests"
+TOKENS_BUCKET_KEY = "llm_rate_limit:tokens"
+PAUSE_KEY = "llm_rate_limit:paused"
+BUCKET_TTL_SECONDS = 120
+
+logger = logging.getLogger("documents.llm_rate_limit")
+
+T = TypeVar("T")
+
+# Refills both buckets from the Redis clock and takes one request plus the
+# estimated tokens only if both have enough. Returns the seconds to wait
+# (0 when acquired) as a string, since Lua numbers are truncated to integers.
+ACQUIRE_SCRIPT = """
+local pause_ms = redis.call('PTTL', KEYS[3])
+if pause_ms > 0 then
+  return tostring(pause_ms / 1000)
+end
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local request_capacity = tonumber(ARGV[1])
+local token_capacity = tonumber(ARGV[2])
+local needed_tokens = math.min(tonumber(ARGV[3]), token_capacity)
+
+local function refill(key, capacity)
+  local state = redis.call('HMGET', key, 'tokens', 'ts')
+  local available = tonumber(state[1]) or capacity
+  local updated_at = tonumber(state[2]) or now
+  return math.min(capacity, available + math.max(0, now - updated_at) * capacity / 60)
+end
+
+local requests = refill(KEYS[1], request_capacity)
+local tokens = refill(KEYS[2], token_capacity)
+local wait = 0
+if requests < 1 then
+  wait = (1 - requests) * 60 / request_capacity
+end
+if tokens < needed_tokens then
+  wait = math.max(wait, (needed_tokens - tokens) * 60 / token_capacity)
+end
+if wait == 0 then
+  requests = requests - 1
+  tokens = tokens - needed_tokens
+end
+
+redis.call('HSET', KEYS[1], 'tokens', requests, 'ts', now)
+redis.call('HSET', KEYS[2], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return tostring(wait)
+"""
+
+# Adds ARGV[2] tokens to a bucket (negative to charge more), then caps it at
+# ARGV[3] when given, e.g. the remaining quota reported by the API.
+ADJUST_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local capacity = tonumber(ARGV[1])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local available = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+available = math.min(capacity, available + math.max(0, now - updated_at) * capacity / 60)
+available = math.max(-capacity, math.min(capacity, available + tonumber(ARGV[2])))
+if tonumber(ARGV[3]) >= 0 then
+  available = math.min(available, tonumber(ARGV[3]))
+end
+redis.call('HSET', KEYS[1], 'tokens', available, 'ts', now)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return tostring(available)
+"""
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Parse OpenAI reset durations such as "1s", "6m0s" or "120ms" into seconds."""
+    if not value:
+        return None
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    parts = re.findall(r"([\d.]+)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    return sum(float(amount) * units[unit] for amount, unit in parts)
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    try:
+        return int(headers[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def _retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    retry_after_ms = _header_int(headers, "retry-after-ms")
+    if retry_after_ms is not None:
+        return retry_after_ms / 1000
+    try:
+        return float(headers["retry-after"])
+    except (KeyError, ValueError):
+        return parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+
+
+class TokenBucketLimiter:
+    """
+    Requests/min and tokens/min buckets shared by all workers through Redis.
+
+    Buckets refill continuously and are updated atomically by Lua scripts.
+    Redis errors are logged and let the call through, so an unavailable
+    Redis never blocks document processing.
+    """
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis],
+        requests_per_minute: int = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = LLM_TOKENS_PER_MINUTE,
+    ):
+        self.redis_client = redis_client
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._acquire = redis_client.register_script(ACQUIRE_SCRIPT) if redis_client else None
+        self._adjust = redis_client.register_script(ADJUST_SCRIPT) if redis_client else None
+
+    def try_acquire(self, tokens: int) -> float:
+        """Take one request and `tokens` tokens; return 0, or the seconds to wait."""
+        if self._acquire is None:
+            return 0.0
+        try:
+            return float(
+                self._acquire(
+                    keys=[REQUESTS_BUCKET_KEY, TOKENS_BUCKET_KEY, PAUSE_KEY],
+                    args=[
+                        self.requests_per_minute,
+                        self.tokens_per_minute,
+                        tokens,
+                        BUCKET_TTL_SECONDS,
+                    ],
+                )
+            )
+        except redis.RedisError as e:
+            logger.warning(f"LLM rate limiter unavailable: {str(e)}")
+            return 0.0
+
+    def adjust(
+        self,
+        request_delta: float = 0,
+        token_delta: float = 0,
+        remaining_requests: Optional[int] = None,
+        remaining_tokens: Optional[int] = None,
+    ) -> None:
+        """Refund/charge bucket tokens and cap them at the API's remaining quota."""
+        if self._adjust is None:
+            return
+        buckets = [
+            (REQUESTS_BUCKET_KEY, self.requests_per_minute, request_delta, remaining_requests),
+            (TOKENS_BUCKET_KEY, self.tokens_per_minute, token_delta, remaining_tokens),
+        ]
+        try:
+            for key, capacity, delta, remaining in buckets:
+                if delta or remaining is not None:
+                    self._adjust(
+                        keys=[key],
+                        args=[
+                            capacity,
+                            delta,
+                            -1 if remaining is None else remaining,
+                            BUCKET_TTL_SECONDS,
+                        ],
+                    )
+        except redis.RedisError as e:
+            logger.warning(f"LLM rate limiter unavailable: {str(e)}")
+
+    def pause(self, seconds: float) -> None:
+        """Stop every worker from calling the API for `seconds` (e.g. after a 429)."""
+        if self.redis_client is None:
+            return
+        try:
+            self.redis_client.set(PAUSE_KEY, 1, px=max(1, int(seconds * 1000)))
+        except redis.RedisError as e:
+            logger.warning(f"LLM rate limiter unavailable: {str(e)}")
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Per-process cap on in-flight LLM calls, adjusted AIMD-style.
+
+    The limit grows by one per window of fast successful calls and is halved
+    on rate limiting, or reduced when latency exceeds the target or the API
+    reports little remaining quota.
+    """
+
+    def __init__(
+        self,
+        initial: int = LLM_INITIAL_CONCURRENCY,
+        min_limit: int = LLM_MIN_CONCURRENCY,
+        max_limit: int = LLM_MAX_CONCURRENCY,
+        target_latency: float = LLM_TARGET_LATENCY_SECONDS,
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        with self._condition:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def acquire(self) -> None:
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency: Optional[float] = None, throttled: bool = False) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.min_limit, self.limit / 2)
+            elif latency is not None and latency > self.target_latency:
+                self.limit = max(self.min_limit, self.limit * 0.9)
+            elif latency is not None:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+    def decrease(self) -> None:
+        with self._condition:
+            self.limit = max(self.min_limit, self.limit * 0.9)
+
+
+class LLMRateLimiter:
+    """
+    Gate for LLM calls: cluster-wide token buckets plus adaptive concurrency.
+
+    Each call waits for request and token budget sized from the estimated
+    prompt, then for a concurrency slot. 429 responses pause all workers for
+    the Retry-After period and the call is retried. LLMRateLimitedError is
+    raised once retries or the maximum wait are exhausted, so callers never
+    silently fall back on rate limiting.
+    """
+
+    def __init__(
+        self,
+        buckets: TokenBucketLimiter,
+        concurrency: AdaptiveConcurrencyLimiter,
+        max_retries: int = LLM_RATE_LIMIT_RETRIES,
+        max_wait: float = LLM_RATE_LIMIT_MAX_WAIT_SECONDS,
+    ):
+        self.buckets = buckets
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+
+    def _next_wait(self, estimated_tokens: int, waited: float) -> float:
+        wait = self.buckets.try_acquire(estimated_tokens)
+        if wait and waited + wait > self.max_wait:
+            raise LLMRateLimitedError(
+                f"LLM rate limit budget not available within {self.max_wait:.0f}s"
+            )
+        return wait
+
+    def _settle(self, estimated_tokens: int, response: Any) -> None:
+        usage = getattr(response, "usage", None)
+        total_tokens = getattr(usage, "total_tokens", None)
+        if isinstance(total_tokens, int):
+            self.buckets.adjust(token_delta=estimated_tokens - total_tokens)
+
+    def _on_rate_limited(self, error: openai.RateLimitError, attempt: int) -> None:
+        headers = error.response.headers if error.response is not None else {}
+        seconds = _retry_after_seconds(headers) or min(60.0, 2.0**attempt)
+        logger.warning(f"LLM rate limited (attempt {attempt + 1}), pausing {seconds:.1f}s")
+        self.buckets.pause(seconds)
+
+    def call(self, request: Callable[[], T], estimated_tokens: int) -> T:
+        for attempt in range(self.max_retries + 1):
+            waited = 0.0
+            while wait := self._next_wait(estimated_tokens, waited):
+                time.sleep(wait)
+                waited += wait
+            self.concurrency.acquire()
+            start = time.monotonic()
+            try:
+                response = request()
+            except openai.RateLimitError as e:
+                self.concurrency.release(throttled=True)
+                self._on_rate_limited(e, attempt)
+                continue
+            except Exception:
+                self.concurrency.release()
+                raise
+            self.concurrency.release(latency=time.monotonic() - start)
+            self._settle(estimated_tokens, response)
+            return response
+        raise LLMRateLimitedError(f"LLM still rate limited after {self.max_retries} retries")
+
+    def observe_headers(self, headers: Mapping[str, str]) -> None:
+        """Sync the buckets and concurrency with the x-ratelimit-* response headers."""
+        remaining_requests = _header_int(headers, "x-ratelimit-remaining-requests")
+        remaining_tokens = _header_int(headers, "x-ratelimit-remaining-tokens")
+        if remaining_requests is None and remaining_tokens is None:
+            return
+        self.buckets.adjust(
+            remaining_requests=remaining_requests, remaining_tokens=remaining_tokens
+        )
+
+        limits = [
+            (remaining_requests, _header_int(headers, "x-ratelimit-limit-requests")),
+            (remaining_tokens, _header_int(headers, "x-ratelimit-limit-tokens")),
+        ]
+        if any(
+            remaining is not None and limit and remaining / limit < LLM_RATE_LIMIT_HEADROOM
+            for remaining, limit in limits
+        ):
+            self.concurrency.decrease()
+
+
+_llm_rate_limiter: Optional[LLMRateLimiter] = None
+_llm_rate_limiter_lock = threading.Lock()
+
+
+def get_llm_rate_limiter() -> Optional[LLMRateLimiter]:
+    """Return the process-wide LLM rate limiter, or None when disabled."""
+    global _llm_rate_limiter
+    if not LLM_RATE_LIMIT_ENABLED:
+        return None
+    with _llm_rate_limiter_lock:
+        if _llm_rate_limiter is None:
+            _llm_rate_limiter = LLMRateLimiter(
+                TokenBucketLimiter(get_redis()), AdaptiveConcurrencyLimiter()
+            )
+        return _llm_rate_limiter
@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+from typing import Any, Optional
+
+import redis
+import redis.asyncio
+
+from common.prometheus import count_cache_lookup
+from common.redis import get_redis
+from documents.models import DocumentProcessingRun, RunStatus
+
+
+RUN_CACHE_ENABLED = os.getenv("RUN_CACHE_ENABLED", "true").lower() == "true"
+# Completed runs never change until reprocessed, which invalidates them
+RUN_CACHE_TTL_SECONDS = int(os.getenv("RUN_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+RUN_CACHE_ACTIVE_TTL_SECONDS = int(os.getenv("RUN_CACHE_ACTIVE_TTL_SECONDS", "600"))
+
+STATUS_KEY_PREFIX = "run_status_payload:"
+DETAIL_KEY_PREFIX = "run_detail_payload:"
+
+logger = logging.getLogger("documents.run_cache")
+
+
+def status_key(file_id: str) -> str:
+    return f"{STATUS_KEY_PREFIX}{file_id}"
+
+
+def detail_key(file_id: str) -> str:
+    return f"{DETAIL_KEY_PREFIX}{file_id}"
+
+
+def _status_value(run_status: RunStatus | str) -> str:
+    return RunStatus(run_status).value
+
+
+def _ttl(status: str) -> int:
+    if status == RunStatus.COMPLETED.value:
+        return RUN_CACHE_TTL_SECONDS
+    return RUN_CACHE_ACTIVE_TTL_SECONDS
+
+
+def serialize_run_status(file_id: str, run_status: RunStatus | str) -> bytes:
+    return json.dumps({"file_id": file_id, "status": _status_value(run_status)}).encode("utf-8")
+
+
+def serialize_run_detail(
+    file_id: str,
+    filename: str,
+    run_status: RunStatus | str,
+    extracted_text: Optional[str],
+    structured_data: Optional[dict[str, Any]],
+) -> bytes:
+    return json.dumps(
+        {
+            "file_id": file_id,
+            "filename": filename,
+            "extracted_text": extracted_text,
+            "structured_data": structured_data,
+            "status": _status_value(run_status),
+        }
+    ).encode("utf-8")
+
+
+def build_run_payloads(processing_run: DocumentProcessingRun) -> dict[str, bytes]:
+    """Serialize the status and detail responses of a run, keyed by cache key."""
+    payload = processing_run.payload
+    return {
+        status_key(processing_run.id): serialize_run_status(
+            processing_run.id, processing_run.run_status
+        ),
+        detail_key(processing_run.id): serialize_run_detail(
+            processing_run.id,
+            processing_run.filename,
+            processing_run.run_status,
+            payload.extracted_text if payload else None,
+            payload.structured_data if payload else None,
+        ),
+    }
+
+
+def store_run_payloads(
+    payloads: dict[str, bytes],
+    status: str,
+    redis_client: Optional[redis.Redis] = None,
+) -> None:
+    """Write-through: overwrite the cached payloads after the run is committed."""
+    if not RUN_CACHE_ENABLED:
+        return
+    client = redis_client or get_redis()
+    try:
+        pipe = client.pipeline()
+        for key, payload in payloads.items():
+            pipe.set(key, payload, ex=_ttl(status))
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Run cache write failed: {str(e)}")
+
+
+def invalidate_run_payloads(file_id: str, redis_client: Optional[redis.Redis] = None) -> None:
+    if not RUN_CACHE_ENABLED:
+        return
+    client = redis_client or get_redis()
+    try:
+        client.delete(status_key(file_id), detail_key(file_id))
+    except redis.RedisError as e:
+        logger.warning(f"Run cache invalidation failed for {file_id}: {str(e)}")
+
+
+async def get_run_payload(key: str, redis_client: redis.asyncio.Redis) -> Optional[bytes]:
+    """Return a cached JSON payload, or None on a miss or Redis error."""
+    if not RUN_CACHE_ENABLED:
+        return None
+    try:
+        payload = await redis_client.get(key)
+    except redis.RedisError as e:
+        logger.warning(f"Run cache read failed: {str(e)}")
+        payload = None
+    count_cache_lookup("run", payload is not None)
+    # Only a client created with decode_responses returns str
+    return payload.encode() if isinstance(payload, str) else payload
+
+
+async def fill_run_payload(
+    key: str, payload: bytes, status: str, redis_client: redis.asyncio.Redis
+) -> None:
+    """
+    Read-through fill after a cache miss.
+
+    Uses SET NX so a payload read from the database before a concurrent task
+    update never overwrites the newer payload written by the task.
+    """
+    if not RUN_CACHE_ENABLED:
+        return
+    try:
+        await redis_client.set(key, payload, ex=_ttl(status), nx=True)
+    except redis.RedisError as e:
+        logger.warning(f"Run cache write failed: {str(e)}")
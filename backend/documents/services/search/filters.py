@@ -0,0 +1,87 @@
+from typing import Optional
+
+from sqlalchemy import CTE, ColumnElement, String, func, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import col
+
+from documents.models import DocumentProcessingRunPayload
+from documents.services.search.full_text import text_match, text_rank
+
+
+def structured_field(key: str, as_text: bool = False) -> ColumnElement:
+    """
+    `structured_data -> key` (or `->> key` as text) on the run payloads.
+
+    The key is rendered inline rather than bound, so the expression matches
+    the expression indexes on `document_processing_run_payloads`.
+    """
+    if as_text:
+        return col(DocumentProcessingRunPayload.structured_data).op("->>", return_type=String)(
+            literal_column(f"'{key}'")
+        )
+    return col(DocumentProcessingRunPayload.structured_data).op("->", return_type=JSONB)(
+        literal_column(f"'{key}'")
+    )
+
+
+def _contains(key: str, value: list) -> ColumnElement[bool]:
+    return structured_field(key).op("@>", is_comparison=True)(literal(value, JSONB))
+
+
+def structured_data_filters(
+    icd_code: Optional[str] = None,
+    species: Optional[str] = None,
+    chronic_condition: Optional[str] = None,
+) -> list[ColumnElement[bool]]:
+    """
+    Build the WHERE clauses of a structured search.
+
+    - icd_code: a diagnosis with this exact code (GIN containment on `diagnoses`)
+    - species: case-insensitive match (btree on `lower(species)`)
+    - chronic_condition: exact entry of `chronic_conditions` (GIN containment)
+    """
+    filters: list[ColumnElement[bool]] = []
+    if icd_code:
+        filters.append(_contains("diagnoses", [{"icd_code": icd_code.strip()}]))
+    if species:
+        filters.append(
+            func.lower(structured_field("species", as_text=True)) == species.strip().lower()
+        )
+    if chronic_condition:
+        filters.append(_contains("chronic_conditions", [chronic_condition.strip()]))
+    return filters
+
+
+def search_matches(
+    icd_code: Optional[str] = None,
+    species: Optional[str] = None,
+    chronic_condition: Optional[str] = None,
+    q: Optional[str] = None,
+) -> Optional[CTE]:
+    """
+    CTE of the payloads matching the filters (`run_id`, `pet_name`, `species`,
+    and `rank` when searching the text with `q`), or None when no filter is given.
+
+    The planner cannot estimate JSONB containment or text matches, so with a
+    LIMIT it may walk every document in listing order looking for a page of
+    matches. With such a filter the CTE is materialized, so the GIN lookups
+    run first and only their matches are sorted.
+    """
+    filters = structured_data_filters(
+        icd_code=icd_code, species=species, chronic_condition=chronic_condition
+    )
+    columns: list[ColumnElement] = [
+        col(DocumentProcessingRunPayload.run_id).label("run_id"),
+        structured_field("pet_name", as_text=True).label("pet_name"),
+        structured_field("species", as_text=True).label("species"),
+    ]
+    if q:
+        filters.append(text_match(q))
+        columns.append(text_rank(q).label("rank"))
+    if not filters:
+        return None
+
+    matches = select(*columns).where(*filters).cte("search_matches")
+    if icd_code or chronic_condition or q:
+        matches = matches.prefix_with("MATERIALIZED")
+    return matches
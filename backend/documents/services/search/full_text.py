@@ -0,0 +1,75 @@
+from html import escape
+
+from sqlalchemy import ColumnElement, Float, cast, func, inspect, literal_column, select
+from sqlalchemy.orm import Session
+from sqlmodel import col
+
+from documents.models import (
+    MAX_SEARCH_TEXT_LENGTH,
+    TEXT_SEARCH_CONFIG,
+    DocumentProcessingRunPayload,
+)
+
+
+# Private-use characters mark the highlights, so the raw text can be escaped
+# before they are swapped for <mark> tags
+_START_SEL = "\ue000"
+_STOP_SEL = "\ue001"
+SNIPPET_OPTIONS = (
+    f'StartSel="{_START_SEL}", StopSel="{_STOP_SEL}", MaxFragments=2, MaxWords=25, '
+    'MinWords=8, FragmentDelimiter=" ... "'
+)
+
+# Not mapped on the model (see DocumentProcessingRunPayload)
+search_vector = inspect(DocumentProcessingRunPayload).local_table.c.search_vector
+
+
+def _config() -> ColumnElement:
+    # Rendered inline: a bound string would not resolve to the regconfig overloads
+    return literal_column(f"'{TEXT_SEARCH_CONFIG}'::regconfig")
+
+
+def text_query(q: str) -> ColumnElement:
+    """Parse a user query (quoted phrases, `or`, `-term`) into a tsquery."""
+    return func.websearch_to_tsquery(_config(), q)
+
+
+def text_match(q: str) -> ColumnElement[bool]:
+    return search_vector.op("@@", is_comparison=True)(text_query(q))
+
+
+def text_rank(q: str) -> ColumnElement[float]:
+    # Double precision, so the rank round-trips exactly through search cursors
+    return cast(func.ts_rank_cd(search_vector, text_query(q)), Float(precision=53))
+
+
+def _highlight(headline: str) -> str:
+    return (
+        escape(headline).replace(_START_SEL, "<mark>").replace(_STOP_SEL, "</mark>")
+    )
+
+
+def text_snippets(session: Session, run_ids: list[str], q: str) -> dict[str, str]:
+    """
+    HTML fragments of the extracted text of each run matching `q`, with the
+    text escaped and the matches wrapped in <mark>.
+
+    ts_headline re-parses the whole text, so it only runs for one page of hits.
+    """
+    if not run_ids:
+        return {}
+    # Sentinels already in the text would otherwise turn into stray tags
+    text = func.translate(
+        func.left(col(DocumentProcessingRunPayload.extracted_text), MAX_SEARCH_TEXT_LENGTH),
+        _START_SEL + _STOP_SEL,
+        "",
+    )
+    statement = select(
+        col(DocumentProcessingRunPayload.run_id),
+        func.ts_headline(_config(), text, text_query(q), SNIPPET_OPTIONS),
+    ).where(col(DocumentProcessingRunPayload.run_id).in_(run_ids))
+    return {
+        run_id: _highlight(headline)
+        for run_id, headline in session.execute(statement).all()
+        if headline is not None
+    }
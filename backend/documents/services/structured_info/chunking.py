@@ -0,0 +1,152 @@
+import math
+import os
+import re
+from typing import Any, Optional
+
+
+# Rough average for English text with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+LLM_CHUNK_MAX_TOKENS = int(os.getenv("LLM_CHUNK_MAX_TOKENS", "6000"))
+LLM_CHUNKED_EXTRACTION_MIN_TOKENS = int(
+    os.getenv("LLM_CHUNKED_EXTRACTION_MIN_TOKENS", "8000")
+)
+LLM_CHUNK_CONCURRENCY = int(os.getenv("LLM_CHUNK_CONCURRENCY", "4"))
+
+SCALAR_FIELDS = ("pet_name", "species", "breed", "weight")
+STRING_LIST_FIELDS = ("past_medical_issues", "chronic_conditions")
+# List fields deduplicated by (name, date field)
+RECORD_LIST_FIELDS = {
+    "diagnoses": "date",
+    "procedures": "date",
+    "medications": "start_date",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _split_on(text: str, pattern: str) -> list[str]:
+    return [part for part in re.split(pattern, text) if part.strip()]
+
+
+def _split_to_fit(text: str, max_chars: int) -> list[str]:
+    """Split text into pieces no longer than max_chars, preferring coarse boundaries."""
+    if len(text) <= max_chars:
+        return [text]
+    # Page breaks, then blank-line separated sections, then lines
+    for pattern in (r"\s*\f\s*", r"\n\s*\n", r"\n"):
+        parts = _split_on(text, pattern)
+        if len(parts) > 1:
+            return [piece for part in parts for piece in _split_to_fit(part, max_chars)]
+    return [text[start : start + max_chars] for start in range(0, len(text), max_chars)]
+
+
+def split_text_into_chunks(text: str, max_tokens: int = LLM_CHUNK_MAX_TOKENS) -> list[str]:
+    """
+    Split text on page/section boundaries into chunks of at most max_tokens.
+
+    Consecutive pieces are packed together so chunks stay close to the limit.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks: list[str] = []
+    current = ""
+    for piece in _split_to_fit(text, max_chars):
+        candidate = f"{current}\n\n{piece}" if current else piece
+        if len(candidate) <= max_chars:
+            current = candidate
+        else:
+            chunks.append(current)
+            current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _normalize(value: Any) -> str:
+    return " ".join(str(value).lower().split()) if value is not None else ""
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _merge_record_list(records: list[dict], date_field: str) -> list[dict]:
+    merged: dict[tuple[str, str], dict] = {}
+    for record in records:
+        if not isinstance(record, dict) or not record.get("name"):
+            continue
+        key = (_normalize(record.get("name")), _normalize(record.get(date_field)))
+        existing = merged.get(key)
+        if existing is None:
+            merged[key] = dict(record)
+            continue
+        for field, value in record.items():
+            if _is_empty(existing.get(field)) and not _is_empty(value):
+                existing[field] = value
+        if "is_chronic" in record:
+            existing["is_chronic"] = bool(existing.get("is_chronic")) or bool(
+                record["is_chronic"]
+            )
+    return list(merged.values())
+
+
+def _merge_string_list(values: list[Any]) -> list[Any]:
+    seen: set[str] = set()
+    merged = []
+    for value in values:
+        key = _normalize(value)
+        if key and key not in seen:
+            seen.add(key)
+            merged.append(value)
+    return merged
+
+
+def merge_structured_records(records: list[dict]) -> dict[str, Any]:
+    """
+    Merge partial structured records extracted from chunks of one document.
+
+    Diagnoses and procedures are deduplicated by name and date, medications by
+    name and start date. Scalars keep the first non-empty value, and the
+    symptom onset date keeps the earliest date.
+    """
+    merged: dict[str, Any] = {}
+
+    for field in SCALAR_FIELDS:
+        merged[field] = next(
+            (record[field] for record in records if not _is_empty(record.get(field))),
+            None,
+        )
+
+    for field, date_field in RECORD_LIST_FIELDS.items():
+        merged[field] = _merge_record_list(
+            [item for record in records for item in record.get(field) or []], date_field
+        )
+
+    for field in STRING_LIST_FIELDS:
+        merged[field] = _merge_string_list(
+            [item for record in records for item in record.get(field) or []]
+        )
+
+    onset_dates = [
+        record["symptom_onset_date"] for record in records if record.get("symptom_onset_date")
+    ]
+    merged["symptom_onset_date"] = min(onset_dates) if onset_dates else None
+
+    merged["notes"] = "\n".join(
+        _merge_string_list([record.get("notes") for record in records])
+    )
+
+    clinic_info: dict[str, Optional[Any]] = {
+        "name": None,
+        "address": None,
+        "phone": None,
+        "veterinarian": None,
+    }
+    for record in records:
+        for key, value in (record.get("clinic_info") or {}).items():
+            if _is_empty(clinic_info.get(key)):
+                clinic_info[key] = value
+    merged["clinic_info"] = clinic_info
+
+    return merged
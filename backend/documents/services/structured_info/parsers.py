@@ -1,9 +1,43 @@
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Optional
 
-from openai import OpenAI
+from openai import OpenAI, RateLimitError
 
+from common.prometheus import count_cache_lookup, observe_llm_request
+from documents.exceptions import LLMRateLimitedError
+
+from documents.services.llm.cache import (
+    LLMResponseCache,
+    build_cache_key,
+    get_llm_response_cache,
+)
 from documents.services.llm.openai import get_openai_client
+from documents.services.llm.rate_limit import (
+    LLM_COMPLETION_TOKENS_ESTIMATE,
+    LLMRateLimiter,
+    get_llm_rate_limiter,
+)
+from documents.services.structured_info.chunking import (
+    LLM_CHUNK_CONCURRENCY,
+    LLM_CHUNKED_EXTRACTION_MIN_TOKENS,
+    estimate_tokens,
+    merge_structured_records,
+    split_text_into_chunks,
+)
+
+# Bump whenever SYSTEM_PROMPT_V0/USER_PROMPT_V0 change so stored results
+# produced with older prompts are not reused for new runs.
+PROMPT_VERSION = "v0"
+DEFAULT_LLM_MODEL = "gpt-4o-mini"
+# Counters kept in the optional `stats` dict, summed over chunks
+STATS_COUNTERS: dict[str, Any] = {
+    "llm_cache_hits": 0,
+    "llm_cache_misses": 0,
+    "llm_request_seconds": 0.0,
+    "json_decode_seconds": 0.0,
+}
 
 USER_PROMPT_V0 = (
     "Extract medical information from this veterinary record for insurance "
@@ -63,52 +97,9 @@ IMPORTANT: Extract dates whenever possible as they are critical for:
 Extract CPT/ICD codes if mentioned in the document. Extract costs if included."""
 
 
-def parse_structured_data(
-    text: str, logger, client: Optional[OpenAI] = None, model: str = "gpt-4o-mini"
-) -> tuple[dict, Optional[int], Optional[int], str]:
-    """
-    Parse extracted text into structured medical record data using OpenAI.
-    
-    Args:
-        text: Extracted text to parse
-        logger: Logger instance
-        client: Optional OpenAI client (uses default if not provided)
-        model: LLM model name to use (default: "gpt-4o-mini")
-    
-    Returns:
-        Tuple of (structured_data_dict, prompt_tokens, completion_tokens, model_name)
-    """
-    logger.info("Parsing structured data from extracted text")
-
-    llm_client = client or get_openai_client()
-
-    if llm_client:
-        user_prompt = USER_PROMPT_V0.format(text=text)
-        try:
-            response = llm_client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT_V0},
-                    {"role": "user", "content": user_prompt},
-                ],
-                response_format={"type": "json_object"},
-            )
-            content = response.choices[0].message.content or "{}"
-            result = json.loads(content)
-            logger.info(f"Parsed structured data: {result}")
-            
-            prompt_tokens = response.usage.prompt_tokens if response.usage else None
-            completion_tokens = response.usage.completion_tokens if response.usage else None
-            actual_model = response.model
-            
-            return result, prompt_tokens, completion_tokens, actual_model
-        except Exception as e:
-            logger.warning(f"OpenAI parsing failed, using fallback: {str(e)}")
-    else:
-        logger.warning("OpenAI API key not configured, using basic extraction")
-
-    # Fallback to basic extraction with neutral placeholders
-    fallback: dict[str, Any] = {
+def build_fallback_record(text: str) -> dict[str, Any]:
+    """Basic extraction with neutral placeholders, used when the LLM is unavailable."""
+    return {
         "pet_name": None,
         "species": None,
         "breed": None,
@@ -127,4 +118,217 @@ def parse_structured_data(
             "veterinarian": None,
         },
     }
-    return fallback, None, None, model
+
+
+def _build_messages(text: str) -> list[dict[str, str]]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT_V0},
+        {"role": "user", "content": USER_PROMPT_V0.format(text=text)},
+    ]
+
+
+def _estimate_request_tokens(text: str) -> int:
+    prompt = SYSTEM_PROMPT_V0 + USER_PROMPT_V0.format(text=text)
+    return estimate_tokens(prompt) + LLM_COMPLETION_TOKENS_ESTIMATE
+
+
+def _observe_request(model: str, seconds: float, response, stats: dict[str, Any]) -> None:
+    stats["llm_request_seconds"] += seconds
+    observe_llm_request(model, seconds, response)
+
+
+def _from_cache(
+    cached: Optional[dict[str, Any]], logger, stats: dict[str, Any]
+) -> Optional[tuple[dict, Optional[int], Optional[int], str]]:
+    count_cache_lookup("llm_response", cached is not None)
+    if cached is None:
+        stats["llm_cache_misses"] += 1
+        return None
+    stats["llm_cache_hits"] += 1
+    logger.info("Structured data served from LLM response cache")
+    return cached["structured_data"], 0, 0, cached["model"]
+
+
+def _read_response(
+    response, logger, stats: dict[str, Any]
+) -> tuple[dict, Optional[int], Optional[int], str]:
+    content = response.choices[0].message.content or "{}"
+    decode_start = time.perf_counter()
+    result = json.loads(content)
+    stats["json_decode_seconds"] += time.perf_counter() - decode_start
+    logger.info(f"Parsed structured data: {result}")
+
+    prompt_tokens = response.usage.prompt_tokens if response.usage else None
+    completion_tokens = response.usage.completion_tokens if response.usage else None
+    return result, prompt_tokens, completion_tokens, response.model
+
+
+def _parse_text(
+    text: str,
+    logger,
+    llm_client: Optional[OpenAI],
+    model: str,
+    response_cache: Optional[LLMResponseCache],
+    rate_limiter: Optional[LLMRateLimiter],
+    stats: dict[str, Any],
+) -> tuple[dict, Optional[int], Optional[int], str]:
+    cache_key = build_cache_key(SYSTEM_PROMPT_V0, USER_PROMPT_V0, model, text)
+    if response_cache:
+        cached = _from_cache(response_cache.get(cache_key), logger, stats)
+        if cached is not None:
+            return cached
+
+    if llm_client:
+        def create_completion():
+            # Timed here so rate limiter waits are not counted as request time
+            request_start = time.perf_counter()
+            response = None
+            try:
+                response = llm_client.chat.completions.create(
+                    model=model,
+                    messages=_build_messages(text),
+                    response_format={"type": "json_object"},
+                )
+                return response
+            finally:
+                _observe_request(model, time.perf_counter() - request_start, response, stats)
+
+        try:
+            if rate_limiter:
+                response = rate_limiter.call(create_completion, _estimate_request_tokens(text))
+            else:
+                response = create_completion()
+            parsed = _read_response(response, logger, stats)
+            if response_cache:
+                response_cache.set(
+                    cache_key, {"structured_data": parsed[0], "model": parsed[3]}
+                )
+            return parsed
+        except LLMRateLimitedError:
+            raise
+        except RateLimitError as e:
+            # A fallback record would be stored as the result; let the caller retry
+            raise LLMRateLimitedError(str(e)) from e
+        except Exception as e:
+            logger.warning(f"OpenAI parsing failed, using fallback: {str(e)}")
+    else:
+        logger.warning("OpenAI API key not configured, using basic extraction")
+
+    return build_fallback_record(text), None, None, model
+
+
+def _sum_tokens(values: list[Optional[int]]) -> Optional[int]:
+    known = [value for value in values if value is not None]
+    return sum(known) if known else None
+
+
+def _merge_chunk_results(
+    text: str,
+    model: str,
+    results: list[tuple[dict, Optional[int], Optional[int], str]],
+    chunk_stats: list[dict[str, Any]],
+    stats: dict[str, Any],
+) -> tuple[dict, Optional[int], Optional[int], str]:
+    for key in STATS_COUNTERS:
+        stats[key] += sum(chunk[key] for chunk in chunk_stats)
+    stats["llm_chunks"] = len(results)
+
+    # Fallback records only carry placeholders, so leave them out of the merge.
+    # The merged record then misses those chunks and is counted as partial.
+    parsed = [result for result in results if result[1] is not None]
+    stats["llm_failed_chunks"] = len(results) - len(parsed)
+    if not parsed:
+        return build_fallback_record(text), None, None, model
+
+    merged = merge_structured_records([result[0] for result in parsed])
+    prompt_tokens = _sum_tokens([result[1] for result in parsed])
+    completion_tokens = _sum_tokens([result[2] for result in parsed])
+    return merged, prompt_tokens, completion_tokens, parsed[0][3]
+
+
+def _parse_text_in_chunks(
+    text: str,
+    logger,
+    llm_client: Optional[OpenAI],
+    model: str,
+    response_cache: Optional[LLMResponseCache],
+    rate_limiter: Optional[LLMRateLimiter],
+    stats: dict[str, Any],
+) -> tuple[dict, Optional[int], Optional[int], str]:
+    chunks = split_text_into_chunks(text)
+    logger.info(f"Parsing structured data in {len(chunks)} chunks")
+    chunk_stats = [_init_stats(None) for _ in chunks]
+
+    with ThreadPoolExecutor(max_workers=max(1, LLM_CHUNK_CONCURRENCY)) as executor:
+        futures = [
+            executor.submit(
+                _parse_text,
+                chunk,
+                logger,
+                llm_client,
+                model,
+                response_cache,
+                rate_limiter,
+                chunk_stat,
+            )
+            for chunk, chunk_stat in zip(chunks, chunk_stats)
+        ]
+        results = [future.result() for future in futures]
+
+    return _merge_chunk_results(text, model, results, chunk_stats, stats)
+
+
+def _init_stats(stats: Optional[dict[str, Any]]) -> dict[str, Any]:
+    stats = stats if stats is not None else {}
+    for key, initial in STATS_COUNTERS.items():
+        stats.setdefault(key, initial)
+    return stats
+
+
+def parse_structured_data(
+    text: str,
+    logger,
+    client: Optional[OpenAI] = None,
+    model: str = DEFAULT_LLM_MODEL,
+    cache: Optional[LLMResponseCache] = None,
+    stats: Optional[dict[str, Any]] = None,
+    rate_limiter: Optional[LLMRateLimiter] = None,
+) -> tuple[dict, Optional[int], Optional[int], str]:
+    """
+    Parse extracted text into structured medical record data using OpenAI.
+
+    Texts estimated above LLM_CHUNKED_EXTRACTION_MIN_TOKENS are split into
+    bounded chunks that are extracted concurrently and merged into one record.
+    
+    Args:
+        text: Extracted text to parse
+        logger: Logger instance
+        client: Optional OpenAI client (uses the pooled process client if not provided)
+        model: LLM model name to use (default: "gpt-4o-mini")
+        cache: Optional LLM response cache (uses default if not provided)
+        stats: Optional dict updated with llm_cache_hits/llm_cache_misses counters,
+            llm_request_seconds/json_decode_seconds (summed over chunks) and, for
+            chunked texts, llm_chunks/llm_failed_chunks. A record with failed
+            chunks misses their content and should not be reused.
+        rate_limiter: Optional LLM rate limiter (uses the shared limiter if not provided)
+    
+    Returns:
+        Tuple of (structured_data_dict, prompt_tokens, completion_tokens, model_name).
+        Cached responses report zero tokens since no LLM call was made.
+
+    Raises:
+        LLMRateLimitedError: The API kept rate limiting the request; no
+            fallback record is returned so the caller can retry later.
+    """
+    logger.info("Parsing structured data from extracted text")
+
+    stats = _init_stats(stats)
+    llm_client = client or get_openai_client()
+    response_cache = cache or get_llm_response_cache()
+    limiter = rate_limiter or get_llm_rate_limiter()
+
+    if estimate_tokens(text) > LLM_CHUNKED_EXTRACTION_MIN_TOKENS:
+        return _parse_text_in_chunks(
+            text, logger, llm_client, model, response_cache, limiter, stats
+        )
+    return _parse_text(text, logger, llm_client, model, response_cache, limiter, stats)
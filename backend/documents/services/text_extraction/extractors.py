@@ -1,33 +1,301 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, Optional
 
-import pytesseract  # type: ignore[import-untyped]
+from billiard import Pipe, Process  # type: ignore[import-untyped]
+from billiard.connection import wait  # type: ignore[import-untyped]
 from PIL import Image  # type: ignore[import-untyped]
 from pypdf import PdfReader  # type: ignore[import-untyped]
 
+from common.prometheus import observe_ocr_page
 from documents.exceptions import TextExtractionError, UnsupportedFileTypeError
+from documents.services.text_extraction.ocr import OCR_ENGINE_POOL_SIZE, ocr_image
+from documents.services.text_extraction.preprocessing import (
+    merge_preprocessing_records,
+    preprocess_image,
+)
 
 
-def extract_text_from_file(file_path: Path) -> str:
-    """Extract text from various file types."""
+PDF_EXTRACTION_WORKERS = int(
+    os.getenv("PDF_EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+PDF_PAGE_TIMEOUT_SECONDS = float(os.getenv("PDF_PAGE_TIMEOUT_SECONDS", "30"))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "4"))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+PDF_OCR_FALLBACK_ENABLED = os.getenv("PDF_OCR_FALLBACK_ENABLED", "true").lower() == "true"
+PDF_OCR_WORKERS = int(os.getenv("PDF_OCR_WORKERS", str(OCR_ENGINE_POOL_SIZE)))
+PDF_MIN_TEXT_CHARS = int(os.getenv("PDF_MIN_TEXT_CHARS", "20"))
+PDF_MIN_READABLE_RATIO = float(os.getenv("PDF_MIN_READABLE_RATIO", "0.7"))
+# Form feed between pages, so the LLM chunker can split on page boundaries
+PDF_PAGE_SEPARATOR = "\n\f\n"
+READABLE_PUNCTUATION = set(".,;:!?-_/\\()[]%$#&*+='\"")
+
+logger = logging.getLogger("documents.text_extraction")
+
+
+def _extract_page_range(
+    file_path_str: str, start: int, end: int
+) -> list[tuple[int, str, float]]:
+    """Extract pages [start, end) returning (page_index, text, seconds) per page."""
+    reader = PdfReader(file_path_str)
+    results = []
+    for index in range(start, end):
+        page_start = time.perf_counter()
+        text = reader.pages[index].extract_text() or ""
+        results.append((index, text, time.perf_counter() - page_start))
+    return results
+
+
+def split_page_ranges(page_count: int, pages_per_task: int) -> list[tuple[int, int]]:
+    """Split page indexes into consecutive [start, end) ranges."""
+    step = max(1, pages_per_task)
+    return [
+        (start, min(start + step, page_count)) for start in range(0, page_count, step)
+    ]
+
+
+def _send_page_range(
+    connection: Any, file_path_str: str, start: int, end: int
+) -> None:
+    """Worker process body: send the extracted pages (or the error) back."""
+    try:
+        connection.send(_extract_page_range(file_path_str, start, end))
+    except Exception as e:
+        connection.send(e)
+    finally:
+        connection.close()
+
+
+def _extract_page_ranges(
+    file_path: Path, ranges: list[tuple[int, int]], workers: int, page_timeout: float
+) -> list[tuple[int, str, Optional[float]]]:
+    """
+    Extract page ranges in up to `workers` processes, one per range.
+
+    Processes come from billiard (Celery's fork of multiprocessing), which
+    can start them inside daemonic processes such as Celery prefork children.
+    Each range has `page_timeout` seconds per page from when its process
+    starts; a range that runs over has its process terminated and its pages
+    come back empty.
+    """
+    results: list[tuple[int, str, Optional[float]]] = []
+    queued = list(ranges)
+    running: dict[Any, tuple[Process, int, int, float]] = {}
+    try:
+        while queued or running:
+            while queued and len(running) < max(1, workers):
+                start, end = queued.pop(0)
+                reader, writer = Pipe(duplex=False)
+                process = Process(
+                    target=_send_page_range,
+                    args=(writer, str(file_path), start, end),
+                    daemon=True,
+                )
+                process.start()
+                writer.close()
+                deadline = time.monotonic() + page_timeout * (end - start)
+                running[reader] = (process, start, end, deadline)
+
+            next_deadline = min(deadline for _, _, _, deadline in running.values())
+            for reader in wait(list(running), max(0.0, next_deadline - time.monotonic())):
+                process, start, end, _ = running.pop(reader)
+                try:
+                    outcome = reader.recv()
+                except EOFError:
+                    outcome = RuntimeError(
+                        f"Worker extracting pages {start + 1}-{end} exited with code {process.exitcode}"
+                    )
+                reader.close()
+                process.join()
+                if isinstance(outcome, Exception):
+                    raise outcome
+                results.extend(outcome)
+
+            now = time.monotonic()
+            for reader, (process, start, end, deadline) in list(running.items()):
+                if deadline > now:
+                    continue
+                del running[reader]
+                logger.warning(
+                    f"Timed out extracting pages {start + 1}-{end} of {file_path.name}"
+                )
+                process.terminate()
+                process.join()
+                reader.close()
+                results.extend((index, "", None) for index in range(start, end))
+    finally:
+        for reader, (process, _, _, _) in running.items():
+            process.terminate()
+            process.join()
+            reader.close()
+
+    return results
+
+
+def extract_pdf_pages(
+    file_path: Path,
+    workers: int = PDF_EXTRACTION_WORKERS,
+    page_timeout: float = PDF_PAGE_TIMEOUT_SECONDS,
+    stats: Optional[dict[str, Any]] = None,
+) -> tuple[list[str], list[dict[str, Any]]]:
+    """
+    Extract the text of every PDF page, in page order.
+
+    Pages are extracted in worker processes: long documents have their page
+    ranges split across up to `workers` processes, shorter ones go to a
+    single process. Either way, pages that exceed `page_timeout` come back
+    empty instead of stalling the whole document. Returns (page_texts,
+    page_timings). If `stats` is given, the time spent reading the file and
+    its page tree is recorded under "file_read_seconds".
+    """
+    read_start = time.perf_counter()
+    page_count = len(PdfReader(file_path).pages)
+    if stats is not None:
+        stats["file_read_seconds"] = time.perf_counter() - read_start
+
+    if workers > 1 and page_count >= PDF_PARALLEL_MIN_PAGES:
+        ranges = split_page_ranges(page_count, PDF_PAGES_PER_TASK)
+    else:
+        ranges = split_page_ranges(page_count, page_count)
+    results = _extract_page_ranges(file_path, ranges, workers, page_timeout)
+
+    results.sort(key=lambda result: result[0])
+    page_texts = [text for _, text, _ in results]
+    page_timings = [
+        {"page": index + 1, "seconds": seconds, "timed_out": seconds is None}
+        for index, _, seconds in results
+    ]
+    return page_texts, page_timings
+
+
+def needs_ocr(page_text: str) -> bool:
+    """Return True when a page has no usable text layer (empty or garbage)."""
+    text = "".join(page_text.split())
+    if len(text) < PDF_MIN_TEXT_CHARS:
+        return True
+    readable = sum(1 for char in text if char.isalnum() or char in READABLE_PUNCTUATION)
+    return readable / len(text) < PDF_MIN_READABLE_RATIO
+
+
+def preprocess_and_ocr(image: Image.Image) -> tuple[str, dict[str, Any]]:
+    """Preprocess an image and OCR it, returning the text and preprocessing record."""
+    image, preprocessing = preprocess_image(image)
+    ocr_start = time.perf_counter()
+    text = ocr_image(image)
+    preprocessing["ocr_seconds"] = time.perf_counter() - ocr_start
+    return text, preprocessing
+
+
+def _ocr_page_images(
+    file_path: Path, page_index: int
+) -> tuple[str, float, list[dict[str, Any]]]:
+    page_start = time.perf_counter()
+    page = PdfReader(file_path).pages[page_index]
+    # ImageFile.image is None for images pypdf could not decode
+    results = [
+        preprocess_and_ocr(page_image.image)
+        for page_image in page.images
+        if page_image.image is not None
+    ]
+    text = "\n".join(text for text, _ in results if text)
+    seconds = time.perf_counter() - page_start
+    observe_ocr_page("pdf", seconds)
+    return text, seconds, [record for _, record in results]
+
+
+def ocr_pages_without_text_layer(
+    file_path: Path,
+    page_texts: list[str],
+    page_timings: list[dict[str, Any]],
+    workers: int = PDF_OCR_WORKERS,
+) -> list[str]:
+    """
+    OCR the embedded images of pages whose text layer is empty or garbage.
+
+    Only those pages are sent to OCR, in parallel, so the cost scales with the
+    number of scanned pages rather than the total page count. Pages whose OCR
+    fails keep their original text.
+    """
+    scanned_pages = [
+        index
+        for index, text in enumerate(page_texts)
+        if needs_ocr(text) and not page_timings[index]["timed_out"]
+    ]
+    if not scanned_pages:
+        return page_texts
+
+    page_texts = list(page_texts)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            index: executor.submit(_ocr_page_images, file_path, index)
+            for index in scanned_pages
+        }
+        for index, future in futures.items():
+            try:
+                ocr_text, seconds, preprocessing = future.result()
+            except Exception as e:
+                logger.warning(f"OCR failed for page {index + 1} of {file_path.name}: {str(e)}")
+                continue
+            if ocr_text:
+                page_texts[index] = ocr_text
+            page_timings[index]["ocr_seconds"] = seconds
+            if preprocessing:
+                page_timings[index]["preprocessing"] = merge_preprocessing_records(
+                    preprocessing
+                )
+
+    logger.info(f"OCR fallback ran on {len(scanned_pages)} of {len(page_texts)} pages")
+    return page_texts
+
+
+def extract_text_from_file(
+    file_path: Path, stats: Optional[dict[str, Any]] = None
+) -> str:
+    """
+    Extract text from various file types.
+
+    PDF pages without a usable text layer are OCRed from their embedded
+    images, and images are preprocessed before OCR. If `stats` is given,
+    the time spent reading the file is recorded under "file_read_seconds",
+    per-page timings under "page_timings" and preprocessing timings and pixel
+    counts under "image_preprocessing".
+    """
     file_ext = file_path.suffix.lower()
 
     if file_ext == ".pdf":
         try:
-            reader = PdfReader(file_path)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text.strip()
+            page_texts, page_timings = extract_pdf_pages(file_path, stats=stats)
+            if PDF_OCR_FALLBACK_ENABLED:
+                page_texts = ocr_pages_without_text_layer(
+                    file_path, page_texts, page_timings
+                )
         except Exception as e:
             raise TextExtractionError(f"Failed to extract text from PDF: {str(e)}")
+        if stats is not None:
+            stats["page_timings"] = page_timings
+            preprocessing = [
+                timing["preprocessing"] for timing in page_timings if "preprocessing" in timing
+            ]
+            if preprocessing:
+                stats["image_preprocessing"] = merge_preprocessing_records(preprocessing)
+        return PDF_PAGE_SEPARATOR.join(page_texts).strip()
 
     elif file_ext in {".jpg", ".jpeg", ".png"}:
         try:
+            read_start = time.perf_counter()
             image = Image.open(file_path)
-            if image.mode not in ("RGB", "L"):
-                image = image.convert("RGB")  # type: ignore[assignment]
-            text = pytesseract.image_to_string(image, config="--psm 6")
-            return text.strip()
+            image.load()
+            read_seconds = time.perf_counter() - read_start
+            ocr_start = time.perf_counter()
+            text, image_record = preprocess_and_ocr(image)
+            observe_ocr_page("image", time.perf_counter() - ocr_start)
+            if stats is not None:
+                stats["file_read_seconds"] = read_seconds
+                stats["image_preprocessing"] = image_record
+            return text
         except Exception as e:
             raise TextExtractionError(f"Failed to extract text from image: {str(e)}")
 
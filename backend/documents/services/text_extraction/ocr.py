@@ -0,0 +1,136 @@
+import logging
+import os
+import queue
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+import pytesseract  # type: ignore[import-untyped]
+from PIL import Image  # type: ignore[import-untyped]
+
+try:
+    import tesserocr  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - depends on the optional "ocr" extra
+    tesserocr = None
+
+
+OCR_ENGINE_POOL_SIZE = int(os.getenv("OCR_ENGINE_POOL_SIZE", "4"))
+OCR_LANGUAGE = os.getenv("OCR_LANGUAGE", "eng")
+# Page segmentation mode 6: assume a single uniform block of text (`--psm 6`)
+OCR_PAGE_SEGMENTATION_MODE = 6
+
+logger = logging.getLogger("documents.ocr")
+
+
+class OCREngine(ABC):
+    @abstractmethod
+    def image_to_string(self, image: Image.Image) -> str:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class TesseractAPIEngine(OCREngine):
+    """Tesseract loaded in-process through tesserocr.
+
+    Language data is loaded once when the engine is created and reused for
+    every image, instead of starting a tesseract process per call.
+    """
+
+    def __init__(self, language: str = OCR_LANGUAGE):
+        self._api = tesserocr.PyTessBaseAPI(
+            lang=language, psm=tesserocr.PSM(OCR_PAGE_SEGMENTATION_MODE)
+        )
+
+    def image_to_string(self, image: Image.Image) -> str:
+        self._api.SetImage(image)
+        return self._api.GetUTF8Text()
+
+    def close(self) -> None:
+        self._api.End()
+
+
+class PytesseractEngine(OCREngine):
+    """Fallback engine running the tesseract CLI once per image."""
+
+    def __init__(self, language: str = OCR_LANGUAGE):
+        self.language = language
+
+    def image_to_string(self, image: Image.Image) -> str:
+        return pytesseract.image_to_string(
+            image, lang=self.language, config=f"--psm {OCR_PAGE_SEGMENTATION_MODE}"
+        )
+
+
+def default_engine_factory() -> OCREngine:
+    if tesserocr is not None:
+        return TesseractAPIEngine()
+    return PytesseractEngine()
+
+
+class OCREnginePool:
+    """Fixed-size pool of warm OCR engines shared by the threads of a process."""
+
+    def __init__(
+        self,
+        size: int = OCR_ENGINE_POOL_SIZE,
+        engine_factory: Callable[[], OCREngine] = default_engine_factory,
+    ):
+        self.size = max(1, size)
+        self._engines: queue.Queue[OCREngine] = queue.Queue()
+        for _ in range(self.size):
+            self._engines.put(engine_factory())
+
+    @contextmanager
+    def acquire(self) -> Iterator[OCREngine]:
+        engine = self._engines.get()
+        try:
+            yield engine
+        finally:
+            self._engines.put(engine)
+
+    def close(self) -> None:
+        while not self._engines.empty():
+            self._engines.get_nowait().close()
+
+
+_lock = threading.Lock()
+_engine_pool: Optional[OCREnginePool] = None
+_engine_pool_pid: Optional[int] = None
+
+
+def init_ocr_engine_pool(size: int = OCR_ENGINE_POOL_SIZE) -> OCREnginePool:
+    """Create the OCR engine pool of the current process (e.g. at worker start)."""
+    global _engine_pool, _engine_pool_pid
+    engine_pool = _engine_pool
+    if engine_pool is not None and _engine_pool_pid == os.getpid():
+        return engine_pool
+    # Threads OCRing their first pages at once must not each build a pool
+    with _lock:
+        if _engine_pool is None or _engine_pool_pid != os.getpid():
+            _engine_pool = OCREnginePool(size=size)
+            _engine_pool_pid = os.getpid()
+            logger.info(
+                f"Initialized {_engine_pool.size} OCR engines "
+                f"({'tesserocr' if tesserocr is not None else 'pytesseract'})"
+            )
+        return _engine_pool
+
+
+def close_ocr_engine_pool() -> None:
+    global _engine_pool, _engine_pool_pid
+    with _lock:
+        if _engine_pool is not None and _engine_pool_pid == os.getpid():
+            _engine_pool.close()
+        _engine_pool = None
+        _engine_pool_pid = None
+
+
+def ocr_image(image: Image.Image) -> str:
+    """OCR a single image with a warm engine from the process pool."""
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")  # type: ignore[assignment]
+    with init_ocr_engine_pool().acquire() as engine:
+        return engine.image_to_string(image).strip()
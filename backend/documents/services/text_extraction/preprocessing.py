@@ -0,0 +1,131 @@
+import os
+import time
+from typing import Any, Callable
+
+from PIL import Image, ImageOps  # type: ignore[import-untyped]
+
+
+IMAGE_PREPROCESSING_ENABLED = (
+    os.getenv("IMAGE_PREPROCESSING_ENABLED", "true").lower() == "true"
+)
+OCR_EXIF_ROTATE_ENABLED = os.getenv("OCR_EXIF_ROTATE_ENABLED", "true").lower() == "true"
+OCR_DOWNSCALE_ENABLED = os.getenv("OCR_DOWNSCALE_ENABLED", "true").lower() == "true"
+OCR_GRAYSCALE_ENABLED = os.getenv("OCR_GRAYSCALE_ENABLED", "true").lower() == "true"
+OCR_BINARIZE_ENABLED = os.getenv("OCR_BINARIZE_ENABLED", "false").lower() == "true"
+OCR_CROP_BORDERS_ENABLED = os.getenv("OCR_CROP_BORDERS_ENABLED", "true").lower() == "true"
+
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI", "300"))
+# Longest side of an A4 page; caps photos whose DPI metadata is missing or bogus
+OCR_MAX_PAGE_INCHES = float(os.getenv("OCR_MAX_PAGE_INCHES", "11.7"))
+OCR_BINARIZE_THRESHOLD = int(os.getenv("OCR_BINARIZE_THRESHOLD", "160"))
+OCR_BORDER_THRESHOLD = int(os.getenv("OCR_BORDER_THRESHOLD", "245"))
+OCR_BORDER_MARGIN = int(os.getenv("OCR_BORDER_MARGIN", "10"))
+
+
+def exif_rotate(image: Image.Image) -> Image.Image:
+    """Apply the EXIF orientation so phone photos are upright."""
+    return ImageOps.exif_transpose(image) or image
+
+
+def downscale_to_target_dpi(image: Image.Image) -> Image.Image:
+    """Downscale (never upscale) to roughly OCR_TARGET_DPI."""
+    scale = (OCR_TARGET_DPI * OCR_MAX_PAGE_INCHES) / max(image.size)
+    dpi = image.info.get("dpi")
+    if dpi and dpi[0] > OCR_TARGET_DPI:
+        scale = min(scale, OCR_TARGET_DPI / float(dpi[0]))
+    if scale >= 1:
+        return image
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, Image.Resampling.LANCZOS)
+
+
+def to_grayscale(image: Image.Image) -> Image.Image:
+    return image if image.mode == "L" else image.convert("L")
+
+
+def binarize(image: Image.Image) -> Image.Image:
+    return to_grayscale(image).point(
+        lambda value: 255 if value > OCR_BINARIZE_THRESHOLD else 0
+    )
+
+
+def crop_empty_borders(image: Image.Image) -> Image.Image:
+    """Crop near-white borders, keeping OCR_BORDER_MARGIN pixels around the content."""
+    content_mask = to_grayscale(image).point(
+        lambda value: 255 if value < OCR_BORDER_THRESHOLD else 0
+    )
+    bbox = content_mask.getbbox()
+    if not bbox:
+        return image
+    left, top, right, bottom = bbox
+    return image.crop(
+        (
+            max(0, left - OCR_BORDER_MARGIN),
+            max(0, top - OCR_BORDER_MARGIN),
+            min(image.width, right + OCR_BORDER_MARGIN),
+            min(image.height, bottom + OCR_BORDER_MARGIN),
+        )
+    )
+
+
+def enabled_steps() -> list[tuple[str, Callable[[Image.Image], Image.Image]]]:
+    steps: list[tuple[str, bool, Callable[[Image.Image], Image.Image]]] = [
+        ("exif_rotate", OCR_EXIF_ROTATE_ENABLED, exif_rotate),
+        ("downscale", OCR_DOWNSCALE_ENABLED, downscale_to_target_dpi),
+        ("grayscale", OCR_GRAYSCALE_ENABLED, to_grayscale),
+        ("binarize", OCR_BINARIZE_ENABLED, binarize),
+        ("crop_borders", OCR_CROP_BORDERS_ENABLED, crop_empty_borders),
+    ]
+    return [(name, step) for name, enabled, step in steps if enabled]
+
+
+def preprocess_image(image: Image.Image) -> tuple[Image.Image, dict[str, Any]]:
+    """
+    Run the enabled preprocessing steps on an image before OCR.
+
+    Returns the processed image and a record with per-step timings and
+    before/after pixel counts.
+    """
+    record: dict[str, Any] = {
+        "images": 1,
+        "pixels_before": image.width * image.height,
+        "seconds": 0.0,
+        "steps": {},
+    }
+    if IMAGE_PREPROCESSING_ENABLED:
+        for name, step in enabled_steps():
+            pixels_before = image.width * image.height
+            step_start = time.perf_counter()
+            image = step(image)
+            seconds = time.perf_counter() - step_start
+            record["seconds"] += seconds
+            record["steps"][name] = {
+                "seconds": seconds,
+                "pixels_before": pixels_before,
+                "pixels_after": image.width * image.height,
+            }
+    record["pixels_after"] = image.width * image.height
+    return image, record
+
+
+def merge_preprocessing_records(records: list[dict[str, Any]]) -> dict[str, Any]:
+    """Sum preprocessing records of several images (e.g. scanned PDF pages)."""
+    merged: dict[str, Any] = {
+        "images": 0,
+        "pixels_before": 0,
+        "pixels_after": 0,
+        "seconds": 0.0,
+        "ocr_seconds": 0.0,
+        "steps": {},
+    }
+    for record in records:
+        for key in ("images", "pixels_before", "pixels_after", "seconds"):
+            merged[key] += record[key]
+        merged["ocr_seconds"] += record.get("ocr_seconds", 0.0)
+        for name, step in record["steps"].items():
+            totals = merged["steps"].setdefault(
+                name, {"seconds": 0.0, "pixels_before": 0, "pixels_after": 0}
+            )
+            for key in ("seconds", "pixels_before", "pixels_after"):
+                totals[key] += step[key]
+    return merged
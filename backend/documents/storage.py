@@ -1,12 +1,27 @@
+import asyncio
+import os
+import tempfile
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
+from typing import Any, AsyncIterable, Callable, Optional
 
-from .schemas import ALLOWED_EXTENSIONS
+
+STORAGE_IO_WORKERS = int(os.getenv("STORAGE_IO_WORKERS", "8"))
 
 
 class StorageBackend(ABC):
     @abstractmethod
-    async def save(self, file_id: str, content: bytes, file_ext: str) -> str:
+    async def stage(self, chunks: AsyncIterable[bytes]) -> Path:
+        pass
+
+    @abstractmethod
+    async def commit(self, staged_path: Path, file_id: str, file_ext: str) -> str:
+        pass
+
+    @abstractmethod
+    async def discard(self, staged_path: Path) -> None:
         pass
 
     @abstractmethod
@@ -18,38 +33,86 @@ class StorageBackend(ABC):
         pass
 
     @abstractmethod
-    async def find_file(self, file_id: str) -> Path | None:
+    async def find_file(
+        self, file_id: str, file_ext: str, stored_path: Optional[str] = None
+    ) -> Path | None:
         pass
 
 
 class LocalStorage(StorageBackend):
-    def __init__(self, upload_dir: Path):
+    """Local filesystem storage.
+
+    Blocking file I/O runs on a dedicated thread pool so the event loop keeps
+    serving requests while large files are written or read.
+    """
+
+    def __init__(self, upload_dir: Path, io_workers: int = STORAGE_IO_WORKERS):
         self.upload_dir = upload_dir
         self.upload_dir.mkdir(parents=True, exist_ok=True)
+        self._executor = ThreadPoolExecutor(
+            max_workers=io_workers, thread_name_prefix="storage-io"
+        )
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
 
     def get_full_path(self, file_id: str, file_ext: str) -> Path:
         safe_filename = f"{file_id}{file_ext}"
         return self.upload_dir / safe_filename
 
-    async def save(self, file_id: str, content: bytes, file_ext: str) -> str:
+    async def stage(self, chunks: AsyncIterable[bytes]) -> Path:
+        """Write chunks to a temporary file next to the final location.
+
+        The temporary file is removed if consuming the chunks fails.
+        """
+        fd, tmp_name = await self._run(
+            partial(
+                tempfile.mkstemp, dir=self.upload_dir, prefix=".upload-", suffix=".part"
+            )
+        )
+        staged_path = Path(tmp_name)
+        try:
+            f = os.fdopen(fd, "wb")
+            try:
+                async for chunk in chunks:
+                    await self._run(f.write, chunk)
+            finally:
+                await self._run(f.close)
+        except BaseException:
+            await self.discard(staged_path)
+            raise
+        return staged_path
+
+    async def commit(self, staged_path: Path, file_id: str, file_ext: str) -> str:
+        """Atomically move a staged file into its final location."""
         file_path = self.get_full_path(file_id, file_ext)
-        with open(file_path, "wb") as f:
-            f.write(content)
+        await self._run(os.replace, staged_path, file_path)
         return file_path.name
 
+    async def discard(self, staged_path: Path) -> None:
+        await self._run(partial(staged_path.unlink, missing_ok=True))
+
     async def get_file_content(self, file_id: str, file_ext: str) -> bytes:
         file_path = self.get_full_path(file_id, file_ext)
-        with open(file_path, "rb") as f:
-            return f.read()
+        return await self._run(file_path.read_bytes)
 
     async def exists(self, file_id: str, file_ext: str) -> bool:
-        return self.get_full_path(file_id, file_ext).exists()
+        return await self._run(self.get_full_path(file_id, file_ext).exists)
+
+    async def find_file(
+        self, file_id: str, file_ext: str, stored_path: Optional[str] = None
+    ) -> Path | None:
+        """Resolve the file recorded for a processing run with a single lookup.
+
+        `stored_path` takes precedence since deduplicated runs share a file
+        stored under another run's ID.
+        """
+        file_path = Path(stored_path) if stored_path else self.get_full_path(file_id, file_ext)
+        return file_path if await self._run(file_path.exists) else None
 
-    async def find_file(self, file_id: str) -> Path | None:
-        for ext in ALLOWED_EXTENSIONS:
-            if await self.exists(file_id, ext):
-                return self.get_full_path(file_id, ext)
-        return None
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
 
 
 storage = LocalStorage(Path("/app/backend/uploads"))
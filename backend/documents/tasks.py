@@ -2,81 +2,393 @@ from datetime import datetime, UTC
 from pathlib import Path
 from typing import Any, Optional
 import logging
+import os
+import time
 
 from sqlmodel import Session, select
-from celery import shared_task
+from celery import chain, shared_task
+from celery.signals import worker_process_init, worker_process_shutdown
 
 from common.database import engine
-from documents.models import DocumentProcessingRun, RunStatus
-from documents.services.structured_info.parsers import parse_structured_data
+from common.prometheus import observe_queue_wait
+from documents.exceptions import LLMRateLimitedError
+from documents.models import (
+    DocumentProcessingRun,
+    DocumentProcessingRunPayload,
+    PipelineStage,
+    RunStatus,
+)
+from documents.services.deduplication.content_hash import find_reusable_run
+from documents.services.events.run_events import publish_run_event
+from documents.services.latest_run.projection import upsert_latest_run
+from documents.services.run_cache.payloads import build_run_payloads, store_run_payloads
+from documents.services.llm.openai import close_openai_client
+from documents.services.llm.rate_limit import (
+    LLM_RATE_LIMIT_TASK_RETRIES,
+    LLM_RATE_LIMIT_TASK_RETRY_DELAY_SECONDS,
+)
+from documents.services.structured_info.parsers import (
+    DEFAULT_LLM_MODEL,
+    PROMPT_VERSION,
+    parse_structured_data,
+)
 from documents.services.text_extraction.extractors import extract_text_from_file
-from metrics.tasks import create_metrics_task
+from documents.services.text_extraction.ocr import (
+    close_ocr_engine_pool,
+    init_ocr_engine_pool,
+)
+from metrics.tasks import create_metrics_task, record_processing_metrics
 
 
 logger = logging.getLogger("documents.tasks")
 
+# Stage results kept on the run, in pipeline order, used to resume a run
+STAGE_ORDER = [PipelineStage.EXTRACTED, PipelineStage.PARSED, PipelineStage.PERSISTED]
 
-@shared_task
-def process_document_task(
-    file_id: str,
-    file_path_str: str,
+# Run results stored on the separate payload row, not on the run itself
+PAYLOAD_FIELDS = ("extracted_text", "structured_data")
+
+# Compute metrics in the persist stage instead of a separate metrics task
+METRICS_INLINE = os.getenv("METRICS_INLINE", "true").lower() == "true"
+
+
+@worker_process_init.connect
+def reset_worker_db_pool(**kwargs) -> None:
+    """Drop pooled connections inherited from the parent; each child opens its own."""
+    engine.dispose(close=False)
+
+
+@worker_process_init.connect
+def init_worker_ocr_engines(**kwargs) -> None:
+    """Load OCR engines once per worker process so tasks reuse warm engines."""
+    init_ocr_engine_pool()
+
+
+@worker_process_shutdown.connect
+def close_worker_ocr_engines(**kwargs) -> None:
+    close_ocr_engine_pool()
+
+
+@worker_process_shutdown.connect
+def close_worker_openai_client(**kwargs) -> None:
+    close_openai_client()
+
+
+def build_processing_pipeline(file_id: str, file_path_str: str):
+    """
+    Chain the processing stages: extract -> parse -> persist -> metrics.
+
+    Each stage is routed to its own queue (see `task_routes` in
+    common.celery_app) and commits its results on the run, so a failed run
+    resumes from the last finished stage when it is processed again. Stages
+    pass each other only a small context (ids, timings, token counts); the
+    text and structured data are read from the run's payload row, and stage
+    timings are collected under "stage_timings" for the run's metrics. With
+    METRICS_INLINE the persist stage records the metrics itself and the
+    metrics task is left out of the chain.
+    """
+    stages = [
+        extract_text_task.s(file_id, file_path_str, time.time()),
+        parse_structured_data_task.s(),
+        persist_results_task.s(),
+    ]
+    if not METRICS_INLINE:
+        stages.append(record_metrics_task.s())
+    return chain(*stages)
+
+
+def _load_run(session: Session, file_id: str) -> Optional[DocumentProcessingRun]:
+    statement = select(DocumentProcessingRun).where(DocumentProcessingRun.id == file_id)
+    return session.exec(statement).first()
+
+
+def _stage_done(processing_run: DocumentProcessingRun, stage: PipelineStage) -> bool:
+    if processing_run.pipeline_stage is None:
+        return False
+    return STAGE_ORDER.index(processing_run.pipeline_stage) >= STAGE_ORDER.index(stage)
+
+
+def _run_payload(processing_run: DocumentProcessingRun) -> DocumentProcessingRunPayload:
+    return processing_run.payload or DocumentProcessingRunPayload(run_id=processing_run.id)
+
+
+def _save_run(session: Session, processing_run: DocumentProcessingRun, **fields: Any) -> float:
+    """Commit the run (and its payload); return the seconds spent writing it."""
+    payload_fields = {field: fields.pop(field) for field in PAYLOAD_FIELDS if field in fields}
+    if payload_fields:
+        payload = _run_payload(processing_run)
+        for field, value in payload_fields.items():
+            setattr(payload, field, value)
+        processing_run.payload = payload
+    for field, value in fields.items():
+        setattr(processing_run, field, value)
+    processing_run.updated_at = datetime.now(UTC)
+    file_id = processing_run.id
+    status = RunStatus(processing_run.run_status).value
+    stage = processing_run.pipeline_stage.value if processing_run.pipeline_stage else None
+    # Serialized before the commit expires the attributes
+    payloads = build_run_payloads(processing_run)
+    write_start = time.perf_counter()
+    session.add(processing_run)
+    session.flush()
+    upsert_latest_run(session, processing_run)
+    session.commit()
+    write_seconds = time.perf_counter() - write_start
+    store_run_payloads(payloads, status)
+    publish_run_event(file_id, status, stage)
+    return write_seconds
+
+
+def _mark_failed(
+    session: Session, processing_run: DocumentProcessingRun, stage: str, exc: Exception
+) -> None:
+    logger.exception(
+        "Document processing %s stage failed for %s: %s", stage, processing_run.id, exc
+    )
+    session.rollback()
+    _save_run(session, processing_run, run_status=RunStatus.FAILED)
+
+
+def _stage_timings(context: dict[str, Any]) -> dict[str, Any]:
+    # Contexts queued before stage timings existed have none
+    return context.setdefault("stage_timings", {"queue_wait": {}, "db_persist": 0.0})
+
+
+def _start_stage(context: dict[str, Any], stage: str) -> dict[str, Any]:
+    """Record how long the context waited in the queue; return the stage timings."""
+    timings = _stage_timings(context)
+    enqueued_at = context.pop("enqueued_at", None)
+    if enqueued_at is not None:
+        # Wall clock, as the previous stage may have run on another host
+        timings["queue_wait"][stage] = max(0.0, time.time() - enqueued_at)
+        observe_queue_wait(stage, timings["queue_wait"][stage])
+    return timings
+
+
+def _hand_off(context: dict[str, Any]) -> dict[str, Any]:
+    """Stamp the context as it is passed to the next stage."""
+    context["enqueued_at"] = time.time()
+    return context
+
+
+def _metrics_args(context: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "file_path_str": context["file_path"],
+        "prompt_tokens": context.get("prompt_tokens"),
+        "completion_tokens": context.get("completion_tokens"),
+        "model_name": context.get("model_name") or DEFAULT_LLM_MODEL,
+        "processing_time": context.get("extraction_time", 0.0) + context.get("parse_time", 0.0),
+        "llm_cache_hits": context.get("llm_cache_hits"),
+        "llm_cache_misses": context.get("llm_cache_misses"),
+        "image_preprocessing": context.get("image_preprocessing"),
+        "stage_timings": context.get("stage_timings"),
+    }
+
+
+@shared_task(acks_late=True)
+def extract_text_task(
+    file_id: str, file_path_str: str, enqueued_at: Optional[float] = None
 ) -> Optional[dict[str, Any]]:
-    file_path = Path(file_path_str)
+    """Extraction stage (CPU-bound): PDF parsing and OCR."""
+    context: dict[str, Any] = {
+        "file_id": file_id,
+        "file_path": file_path_str,
+        "extraction_time": 0.0,
+        "enqueued_at": enqueued_at,
+    }
+    timings = _start_stage(context, "extract")
 
     with Session(engine) as session:
-        statement = select(DocumentProcessingRun).where(DocumentProcessingRun.id == file_id)
-        processing_run = session.exec(statement).first()
-
+        processing_run = _load_run(session, file_id)
         if not processing_run:
             return None
 
         try:
-            processing_run.run_status = RunStatus.PROCESSING
-            processing_run.updated_at = datetime.now(UTC)
-            session.add(processing_run)
-            session.commit()
+            timings["db_persist"] += _save_run(
+                session, processing_run, run_status=RunStatus.PROCESSING
+            )
+            if _stage_done(processing_run, PipelineStage.EXTRACTED):
+                logger.info("Resuming %s after %s stage", file_id, processing_run.pipeline_stage)
+                return _hand_off(context)
 
-            start_time = datetime.now(UTC).timestamp()
-            extracted_text = extract_text_from_file(file_path)
-            structured_data, prompt_tokens, completion_tokens, model_name = parse_structured_data(
-                extracted_text, logger=logger
+            reusable_run = find_reusable_run(
+                session,
+                processing_run.content_hash,
+                PROMPT_VERSION,
+                exclude_id=file_id,
             )
-            processing_time = datetime.now(UTC).timestamp() - start_time
-
-            processing_run.extracted_text = extracted_text
-            processing_run.structured_data = structured_data
-            processing_run.updated_at = datetime.now(UTC)
-            processing_run.run_status = RunStatus.COMPLETED
-            session.add(processing_run)
-            session.commit()
-            session.refresh(processing_run)
-
-            create_metrics_task.apply_async(
-                args=[
+            if reusable_run:
+                logger.info(
+                    "Reusing results of run %s for %s (same content hash)",
+                    reusable_run.id,
                     file_id,
-                    extracted_text,
-                    structured_data,
-                    str(file_path),
-                    prompt_tokens,
-                    completion_tokens,
-                    model_name,
-                    processing_time,
-                ]
+                )
+                timings["db_persist"] += _save_run(
+                    session,
+                    processing_run,
+                    extracted_text=_run_payload(reusable_run).extracted_text or "",
+                    structured_data=_run_payload(reusable_run).structured_data or {},
+                    prompt_version=reusable_run.prompt_version,
+                    pipeline_stage=PipelineStage.PARSED,
+                )
+                context.update(
+                    prompt_tokens=0, completion_tokens=0, model_name=DEFAULT_LLM_MODEL
+                )
+                return _hand_off(context)
+
+            start_time = time.perf_counter()
+            extraction_stats: dict[str, Any] = {}
+            extracted_text = extract_text_from_file(Path(file_path_str), stats=extraction_stats)
+            context["extraction_time"] = time.perf_counter() - start_time
+            context["image_preprocessing"] = extraction_stats.get("image_preprocessing")
+            page_timings = extraction_stats.get("page_timings", [])
+            log_slowest_pages(file_id, page_timings)
+            file_read = extraction_stats.get("file_read_seconds", 0.0)
+            timings.update(
+                file_read=file_read,
+                text_extraction=context["extraction_time"] - file_read,
+                pages=[_page_seconds(timing) for timing in page_timings],
+            )
+
+            timings["db_persist"] += _save_run(
+                session,
+                processing_run,
+                extracted_text=extracted_text,
+                pipeline_stage=PipelineStage.EXTRACTED,
             )
+            return _hand_off(context)
+        except Exception as exc:
+            _mark_failed(session, processing_run, "extraction", exc)
+            return None
+
+
+@shared_task(bind=True, acks_late=True, max_retries=LLM_RATE_LIMIT_TASK_RETRIES)
+def parse_structured_data_task(
+    self, context: Optional[dict[str, Any]]
+) -> Optional[dict[str, Any]]:
+    """LLM stage (network-bound): structured data parsing."""
+    if context is None:
+        return None
+    timings = _start_stage(context, "parse")
+
+    with Session(engine) as session:
+        processing_run = _load_run(session, context["file_id"])
+        if not processing_run:
+            return None
+        if _stage_done(processing_run, PipelineStage.PARSED):
+            return _hand_off(context)
+
+        try:
+            start_time = time.perf_counter()
+            parse_stats: dict[str, Any] = {}
+            structured_data, prompt_tokens, completion_tokens, model_name = parse_structured_data(
+                _run_payload(processing_run).extracted_text or "",
+                logger=logger,
+                stats=parse_stats,
+            )
+            context.update(
+                parse_time=time.perf_counter() - start_time,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                model_name=model_name,
+                llm_cache_hits=parse_stats.get("llm_cache_hits"),
+                llm_cache_misses=parse_stats.get("llm_cache_misses"),
+            )
+            timings.update(
+                llm_request=parse_stats.get("llm_request_seconds", 0.0),
+                json_decode=parse_stats.get("json_decode_seconds", 0.0),
+            )
+
+            failed_chunks = parse_stats.get("llm_failed_chunks", 0)
+            if failed_chunks:
+                logger.warning(
+                    "%d of %d chunks of %s fell back, storing a partial record",
+                    failed_chunks,
+                    parse_stats["llm_chunks"],
+                    context["file_id"],
+                )
+            # Fallback records (no token usage) and partial records must not be reused later
+            complete = prompt_tokens is not None and not failed_chunks
+            timings["db_persist"] += _save_run(
+                session,
+                processing_run,
+                structured_data=structured_data,
+                prompt_version=PROMPT_VERSION if complete else None,
+                pipeline_stage=PipelineStage.PARSED,
+            )
+            return _hand_off(context)
+        except LLMRateLimitedError as exc:
+            if self.request.retries < self.max_retries:
+                # Still extracted; retry the stage later instead of failing the run
+                logger.warning("LLM rate limited for %s, retrying later", context["file_id"])
+                raise self.retry(exc=exc, countdown=LLM_RATE_LIMIT_TASK_RETRY_DELAY_SECONDS)
+            _mark_failed(session, processing_run, "parse", exc)
+            return None
+        except Exception as exc:
+            _mark_failed(session, processing_run, "parse", exc)
+            return None
+
+
+@shared_task
+def persist_results_task(context: Optional[dict[str, Any]]) -> Optional[dict[str, Any]]:
+    """Persist stage: mark the run completed once all results are stored."""
+    if context is None:
+        return None
+    timings = _start_stage(context, "persist")
 
-            return {
-                "file_id": file_id,
-                "filename": processing_run.filename,
-                "extracted_text": extracted_text,
-                "structured_data": structured_data,
-                "status": processing_run.run_status,
-            }
+    with Session(engine) as session:
+        processing_run = _load_run(session, context["file_id"])
+        if not processing_run:
+            return None
+
+        try:
+            timings["db_persist"] += _save_run(
+                session,
+                processing_run,
+                run_status=RunStatus.COMPLETED,
+                pipeline_stage=PipelineStage.PERSISTED,
+            )
         except Exception as exc:
-            logger.exception("Document processing task failed for %s: %s", file_id, exc)
-            processing_run.run_status = RunStatus.FAILED
-            processing_run.updated_at = datetime.now(UTC)
-            session.add(processing_run)
-            session.commit()
+            _mark_failed(session, processing_run, "persist", exc)
             return None
 
+        if METRICS_INLINE:
+            try:
+                record_processing_metrics(
+                    context["file_id"], processing_run.payload, **_metrics_args(context)
+                )
+            except Exception:
+                # The run is already completed; missing metrics must not fail it
+                logger.exception("Failed to record metrics for %s", context["file_id"])
+
+        return _hand_off(context)
+
+
+@shared_task
+def record_metrics_task(context: Optional[dict[str, Any]]) -> None:
+    """Metrics stage: compute and store metrics for the completed run."""
+    if context is None:
+        return None
+
+    _start_stage(context, "metrics")
+    create_metrics_task(context["file_id"], **_metrics_args(context))
+
+
+def _page_seconds(page_timing: dict[str, Any]) -> Optional[float]:
+    if page_timing["timed_out"]:
+        return None
+    return page_timing["seconds"] + page_timing.get("ocr_seconds", 0.0)
+
 
+def log_slowest_pages(file_id: str, page_timings: list[dict[str, Any]], limit: int = 3) -> None:
+    timed = [timing for timing in page_timings if timing["seconds"] is not None]
+    slowest = sorted(timed, key=lambda timing: timing["seconds"], reverse=True)[:limit]
+    if slowest:
+        logger.info(
+            "Slowest pages for %s: %s",
+            file_id,
+            ", ".join(f"page {t['page']} ({t['seconds']:.3f}s)" for t in slowest),
+        )
+    timed_out = [timing["page"] for timing in page_timings if timing["timed_out"]]
+    if timed_out:
+        logger.warning("Pages timed out for %s: %s", file_id, timed_out)
@@ -3,11 +3,14 @@ from contextlib import asynccontextmanager
 from pathlib import Path
 
 from dotenv import load_dotenv
-from fastapi import APIRouter, FastAPI
+from fastapi import APIRouter, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from common.logging import setup_logging
+from common.prometheus import PrometheusMiddleware, mark_process_dead, render_metrics
 from documents.router import router as documents_router
+from documents.storage import storage
+from metrics.router import router as metrics_router
 
 # Load .env first, then .env.local from backend folder (which overrides .env)
 load_dotenv()  # Load .env from root if it exists
@@ -41,10 +44,13 @@ async def lifespan(app: FastAPI):
     logger.info("Database initialized")
     yield
     # Shutdown
+    storage.close()
+    mark_process_dead()
     logger.info("Application shutdown")
 
 
 app = FastAPI(title="Veterinary Medical Records API", lifespan=lifespan)
+app.add_middleware(PrometheusMiddleware)
 
 
 # Configure CORS
@@ -62,6 +68,7 @@ app.add_middleware(
 
 api_router = APIRouter(prefix="/api")
 api_router.include_router(documents_router)
+api_router.include_router(metrics_router)
 app.include_router(api_router)
 
 
@@ -73,3 +80,11 @@ async def root():
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics of the API and the Celery workers (see common/prometheus.py)."""
+    # Sync handler: merging the metric files reads from disk
+    content, content_type = render_metrics()
+    return Response(content, media_type=content_type)
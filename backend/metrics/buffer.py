@@ -0,0 +1,168 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from common.database import engine
+from metrics.models import DocumentProcessingRunMetrics
+from metrics.rollups import update_rollups
+
+
+# A buffer is flushed once it holds this many rows or its oldest row is this old
+METRICS_BUFFER_MAX_ROWS = int(os.getenv("METRICS_BUFFER_MAX_ROWS", "200"))
+METRICS_BUFFER_MAX_AGE_SECONDS = float(os.getenv("METRICS_BUFFER_MAX_AGE_SECONDS", "5"))
+# Rows kept for the next flush while the database is unavailable; the oldest are dropped beyond it
+METRICS_BUFFER_MAX_PENDING_ROWS = int(os.getenv("METRICS_BUFFER_MAX_PENDING_ROWS", "10000"))
+
+logger = logging.getLogger("metrics.buffer")
+
+_lock = threading.Lock()
+_buffer: Optional["MetricsBuffer"] = None
+_buffer_pid: Optional[int] = None
+
+
+def insert_metrics_rows(rows: list[dict[str, Any]]) -> None:
+    """Insert metrics rows and fold them into the rollups, in one transaction."""
+    with engine.begin() as connection:
+        connection.execute(insert(DocumentProcessingRunMetrics), rows)
+        update_rollups(connection, rows)
+
+
+class MetricsBuffer:
+    """
+    Collects metrics rows in memory and writes them in bulk.
+
+    Rows are written once `max_rows` are buffered or the oldest row is
+    `max_age_seconds` old (checked by a background thread, so a quiet worker
+    still writes its last rows), and on `close()`. A failed write keeps the
+    rows for the next flush, except rows the database rejects: a batch that
+    violates a constraint is retried row by row and the rejected rows are
+    dropped, so one bad row cannot block the buffer.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[list[dict[str, Any]]], None] = insert_metrics_rows,
+        max_rows: int = METRICS_BUFFER_MAX_ROWS,
+        max_age_seconds: float = METRICS_BUFFER_MAX_AGE_SECONDS,
+        max_pending_rows: int = METRICS_BUFFER_MAX_PENDING_ROWS,
+    ):
+        self.writer = writer
+        self.max_rows = max_rows
+        self.max_age_seconds = max_age_seconds
+        self.max_pending_rows = max_pending_rows
+        self._lock = threading.Lock()
+        # Held while writing, so rows are written in order and by one thread at a time
+        self._flush_lock = threading.Lock()
+        self._rows: list[dict[str, Any]] = []
+        self._oldest_at: Optional[float] = None
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+    def add(self, metrics: DocumentProcessingRunMetrics) -> None:
+        row = metrics.model_dump()
+        with self._lock:
+            self._rows.append(row)
+            if self._oldest_at is None:
+                self._oldest_at = time.monotonic()
+            full = len(self._rows) >= self.max_rows
+            self._start_flusher()
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write the buffered rows; return how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows, self._oldest_at = self._rows, [], None
+            if not rows:
+                return 0
+            try:
+                self.writer(rows)
+            except (IntegrityError, DataError):
+                logger.warning("Metrics rows rejected, writing %d rows one by one", len(rows))
+                return self._write_each(rows)
+            except Exception:
+                logger.exception("Failed to write %d metrics rows, keeping them", len(rows))
+                self._requeue(rows)
+                return 0
+            return len(rows)
+
+    def close(self) -> None:
+        """Stop the background flusher and write what is left."""
+        self._closed.set()
+        self.flush()
+
+    def _write_each(self, rows: list[dict[str, Any]]) -> int:
+        written = 0
+        for index, row in enumerate(rows):
+            try:
+                self.writer([row])
+            except (IntegrityError, DataError):
+                logger.exception(
+                    "Dropping metrics row of run %s", row.get("document_processing_runs_id")
+                )
+            except Exception:
+                logger.exception(
+                    "Failed to write %d metrics rows, keeping them", len(rows) - index
+                )
+                self._requeue(rows[index:])
+                break
+            else:
+                written += 1
+        return written
+
+    def _requeue(self, rows: list[dict[str, Any]]) -> None:
+        with self._lock:
+            pending = rows + self._rows
+            dropped = len(pending) - self.max_pending_rows
+            if dropped > 0:
+                logger.error("Metrics buffer full, dropping %d oldest rows", dropped)
+                pending = pending[dropped:]
+            self._rows = pending
+            self._oldest_at = time.monotonic() if pending else None
+
+    def _start_flusher(self) -> None:
+        if self._closed.is_set() or (self._flusher and self._flusher.is_alive()):
+            return
+        self._flusher = threading.Thread(
+            target=self._flush_periodically, name="metrics-buffer-flush", daemon=True
+        )
+        self._flusher.start()
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.wait(self.max_age_seconds / 2):
+            with self._lock:
+                due = (
+                    self._oldest_at is not None
+                    and time.monotonic() - self._oldest_at >= self.max_age_seconds
+                )
+            if due:
+                self.flush()
+
+
+def get_metrics_buffer() -> MetricsBuffer:
+    """Return the metrics buffer of this process (a forked worker gets its own)."""
+    global _buffer, _buffer_pid
+    with _lock:
+        if _buffer is None or _buffer_pid != os.getpid():
+            _buffer = MetricsBuffer()
+            _buffer_pid = os.getpid()
+        return _buffer
+
+
+def flush_metrics_buffer() -> None:
+    """Write the rows buffered by this process and stop its flusher."""
+    global _buffer
+    with _lock:
+        buffer, _buffer = (_buffer, None) if _buffer_pid == os.getpid() else (None, None)
+    if buffer:
+        buffer.close()
@@ -1,7 +1,9 @@
 import uuid
 from datetime import datetime, UTC
-from typing import Optional
-from sqlmodel import SQLModel, Field
+from typing import Any, Dict, List, Optional
+from sqlalchemy import BigInteger, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlmodel import SQLModel, Field, Column, JSON
 
 
 class DocumentProcessingRunMetrics(SQLModel, table=True):
@@ -31,8 +33,56 @@ class DocumentProcessingRunMetrics(SQLModel, table=True):
         default=None, description="Completion tokens used"
     )
     total_tokens: Optional[int] = Field(default=None, description="Total tokens used")
+    model_name: Optional[str] = Field(default=None, description="LLM model used to parse the document")
     document_run_processing_time: Optional[float] = Field(
         default=None, description="Elapsed time for text extraction and structured data parsing in seconds"
     )
+    llm_cache_hits: Optional[int] = Field(
+        default=None, description="LLM response cache hits while parsing structured data"
+    )
+    llm_cache_misses: Optional[int] = Field(
+        default=None, description="LLM response cache misses while parsing structured data"
+    )
+    image_preprocessing: Optional[Dict[str, Any]] = Field(
+        default=None,
+        sa_column=Column(JSON),
+        description="Image preprocessing step timings and before/after pixel counts",
+    )
+    stage_timings: Optional[Dict[str, Any]] = Field(
+        default=None,
+        sa_column=Column(JSON),
+        description=(
+            "Per-stage timings in seconds: queue_wait (per stage), file_read, text_extraction, "
+            "pages, llm_request, json_decode and db_persist"
+        ),
+    )
     created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
 
+
+
+class DocumentProcessingMetricsRollup(SQLModel, table=True):
+    """
+    Hourly and daily aggregates of processing metrics, per model.
+
+    Updated in the same transaction as the metrics rows it covers (see
+    metrics.rollups), so summaries never scan the raw metrics.
+    """
+
+    __tablename__ = "document_processing_metrics_rollups"
+
+    granularity: str = Field(primary_key=True, description="Bucket size: hour or day")
+    bucket_start: datetime = Field(primary_key=True, description="Start of the bucket (UTC)")
+    model_name: str = Field(default="", primary_key=True, description="LLM model, empty if unknown")
+    run_count: int = Field(default=0)
+    processing_time_count: int = Field(default=0, description="Runs with a processing time")
+    processing_time_sum: float = Field(default=0.0)
+    processing_time_histogram: List[int] = Field(
+        sa_column=Column(ARRAY(Integer), nullable=False),
+        description="Run counts per processing time bucket (see PROCESSING_TIME_BOUNDS)",
+    )
+    llm_token_cost_sum: float = Field(default=0.0)
+    filled_fields_sum: int = Field(default=0, description="Filled fields of the runs with an LLM cost")
+    field_fill_rate_sum: float = Field(default=0.0)
+    field_fill_rate_count: int = Field(default=0)
+    prompt_tokens_sum: int = Field(default=0, sa_column=Column(BigInteger, nullable=False))
+    completion_tokens_sum: int = Field(default=0, sa_column=Column(BigInteger, nullable=False))
@@ -0,0 +1,192 @@
+from bisect import bisect_left
+from datetime import UTC, datetime
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection
+
+from metrics.models import DocumentProcessingMetricsRollup
+
+
+GRANULARITIES = ("hour", "day")
+# Upper bounds (seconds) of the processing time histogram, ~19% apart from 0.1s
+# to ~55min, plus an open-ended last bucket. Percentiles read from it are
+# interpolated within a bucket, so they are off by at most that width.
+PROCESSING_TIME_BOUNDS = tuple(0.1 * 2 ** (index / 4) for index in range(57))
+HISTOGRAM_SIZE = len(PROCESSING_TIME_BOUNDS) + 1
+
+SUM_COLUMNS = (
+    "run_count",
+    "processing_time_count",
+    "processing_time_sum",
+    "llm_token_cost_sum",
+    "filled_fields_sum",
+    "field_fill_rate_sum",
+    "field_fill_rate_count",
+    "prompt_tokens_sum",
+    "completion_tokens_sum",
+)
+
+rollups_table = DocumentProcessingMetricsRollup.__table__  # type: ignore[attr-defined]
+
+# Element-wise sum of the stored and the incoming histogram
+MERGE_HISTOGRAMS_SQL = text(
+    "(SELECT array_agg(stored + incoming ORDER BY position) "
+    "FROM unnest(document_processing_metrics_rollups.processing_time_histogram, "
+    "excluded.processing_time_histogram) WITH ORDINALITY AS h(stored, incoming, position))"
+)
+
+
+def truncate_to_bucket(moment: datetime, granularity: str) -> datetime:
+    """Return the start of the hour or day bucket holding `moment` (UTC)."""
+    # Metrics timestamps are stored without a timezone, in UTC
+    moment = moment.astimezone(UTC) if moment.tzinfo else moment.replace(tzinfo=UTC)
+    if granularity == "day":
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _empty_delta(granularity: str, bucket_start: datetime, model_name: str) -> dict[str, Any]:
+    delta: dict[str, Any] = {column: 0 for column in SUM_COLUMNS}
+    delta.update(
+        granularity=granularity,
+        bucket_start=bucket_start,
+        model_name=model_name,
+        processing_time_histogram=[0] * HISTOGRAM_SIZE,
+    )
+    return delta
+
+
+def _add_row(delta: dict[str, Any], row: dict[str, Any]) -> None:
+    delta["run_count"] += 1
+    processing_time = row.get("document_run_processing_time")
+    if processing_time is not None:
+        delta["processing_time_count"] += 1
+        delta["processing_time_sum"] += processing_time
+        delta["processing_time_histogram"][bisect_left(PROCESSING_TIME_BOUNDS, processing_time)] += 1
+    if row.get("llm_token_cost") is not None:
+        delta["llm_token_cost_sum"] += row["llm_token_cost"]
+        delta["filled_fields_sum"] += row.get("filled_fields_count") or 0
+    if row.get("field_fill_rate") is not None:
+        delta["field_fill_rate_sum"] += row["field_fill_rate"]
+        delta["field_fill_rate_count"] += 1
+    delta["prompt_tokens_sum"] += row.get("prompt_tokens") or 0
+    delta["completion_tokens_sum"] += row.get("completion_tokens") or 0
+
+
+def rollup_deltas(rows: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Aggregate metrics rows into one delta per (granularity, bucket, model)."""
+    deltas: dict[tuple[str, datetime, str], dict[str, Any]] = {}
+    for row in rows:
+        model_name = row.get("model_name") or ""
+        for granularity in GRANULARITIES:
+            key = (granularity, truncate_to_bucket(row["created_at"], granularity), model_name)
+            if key not in deltas:
+                deltas[key] = _empty_delta(*key)
+            _add_row(deltas[key], row)
+    # Upserted in key order, so concurrent flushes lock rollup rows in the same order
+    return [deltas[key] for key in sorted(deltas)]
+
+
+def apply_rollup_deltas(connection: Connection, deltas: list[dict[str, Any]]) -> None:
+    """Add the deltas to the rollup rows, creating missing buckets."""
+    if not deltas:
+        return
+    statement = insert(rollups_table).values(deltas)
+    statement = statement.on_conflict_do_update(
+        index_elements=["granularity", "bucket_start", "model_name"],
+        set_={
+            **{column: rollups_table.c[column] + statement.excluded[column] for column in SUM_COLUMNS},
+            "processing_time_histogram": MERGE_HISTOGRAMS_SQL,
+        },
+    )
+    connection.execute(statement)
+
+
+def update_rollups(connection: Connection, rows: list[dict[str, Any]]) -> None:
+    """Fold newly inserted metrics rows into the rollups (same transaction)."""
+    apply_rollup_deltas(connection, rollup_deltas(rows))
+
+
+def histogram_percentile(histogram: list[int], fraction: float) -> Optional[float]:
+    """Estimate a processing time percentile from histogram counts."""
+    total = sum(histogram)
+    if not total:
+        return None
+    rank = fraction * total
+    seen = 0
+    for index, count in enumerate(histogram):
+        if count and seen + count >= rank:
+            lower = PROCESSING_TIME_BOUNDS[index - 1] if index > 0 else 0.0
+            if index == len(PROCESSING_TIME_BOUNDS):
+                # Open-ended last bucket: report its lower bound
+                return lower
+            upper = PROCESSING_TIME_BOUNDS[index]
+            return lower + (upper - lower) * (rank - seen) / count
+        seen += count
+    return PROCESSING_TIME_BOUNDS[-1]
+
+
+def merge_rollups(rollups: Iterable[DocumentProcessingMetricsRollup]) -> dict[str, Any]:
+    """Merge rollup rows (several models or buckets) into one summary."""
+    totals: dict[str, Any] = {column: 0 for column in SUM_COLUMNS}
+    histogram = [0] * HISTOGRAM_SIZE
+    tokens_by_model: dict[str, dict[str, int]] = {}
+    for rollup in rollups:
+        for column in SUM_COLUMNS:
+            totals[column] += getattr(rollup, column)
+        histogram = [total + count for total, count in zip(histogram, rollup.processing_time_histogram)]
+        tokens = tokens_by_model.setdefault(
+            rollup.model_name or "unknown", {"prompt_tokens": 0, "completion_tokens": 0}
+        )
+        tokens["prompt_tokens"] += rollup.prompt_tokens_sum
+        tokens["completion_tokens"] += rollup.completion_tokens_sum
+
+    def ratio(numerator: float, denominator: float) -> Optional[float]:
+        return numerator / denominator if denominator else None
+
+    return {
+        "run_count": totals["run_count"],
+        "processing_time": {
+            "mean": ratio(totals["processing_time_sum"], totals["processing_time_count"]),
+            "p50": histogram_percentile(histogram, 0.50),
+            "p95": histogram_percentile(histogram, 0.95),
+            "p99": histogram_percentile(histogram, 0.99),
+        },
+        "llm_token_cost": {
+            "total": totals["llm_token_cost_sum"],
+            "per_filled_field": ratio(totals["llm_token_cost_sum"], totals["filled_fields_sum"]),
+        },
+        "mean_field_fill_rate": ratio(totals["field_fill_rate_sum"], totals["field_fill_rate_count"]),
+        "tokens_by_model": {
+            model: {**tokens, "total_tokens": tokens["prompt_tokens"] + tokens["completion_tokens"]}
+            for model, tokens in tokens_by_model.items()
+        },
+    }
+
+
+def rebuild_rollups(connection: Connection, batch_size: int = 10_000) -> int:
+    """
+    Recompute every rollup from the raw metrics; return the rows folded in.
+
+    The rollups table is locked against concurrent flushes for the rebuild.
+    A flush that is blocked has not committed its metrics rows yet, so they
+    are not read here and its own rollup update is applied afterwards.
+    """
+    connection.execute(text("LOCK TABLE document_processing_metrics_rollups IN EXCLUSIVE MODE"))
+    connection.execute(text("DELETE FROM document_processing_metrics_rollups"))
+    result = connection.execute(
+        text(
+            "SELECT created_at, model_name, document_run_processing_time, llm_token_cost, "
+            "filled_fields_count, field_fill_rate, prompt_tokens, completion_tokens "
+            "FROM document_processing_run_metrics"
+        ),
+        execution_options={"yield_per": batch_size},
+    )
+    count = 0
+    for batch in result.mappings().partitions():
+        # Several batches can hit the same bucket; the upsert adds them up
+        update_rollups(connection, [dict(row) for row in batch])
+        count += len(batch)
+    return count
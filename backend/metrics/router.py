@@ -0,0 +1,84 @@
+from datetime import UTC, datetime, timedelta
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from common.database import get_async_session
+from common.logging import get_logger
+from metrics.models import DocumentProcessingMetricsRollup
+from metrics.rollups import merge_rollups, truncate_to_bucket
+
+
+BUCKET_SIZE = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+# Window summarized when no start is given, and the most buckets one request may span
+DEFAULT_SUMMARY_WINDOW = {"hour": timedelta(hours=24), "day": timedelta(days=30)}
+MAX_SUMMARY_BUCKETS = 1000
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat datetimes given without a timezone as UTC."""
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
+
+
+@router.get("/summary")
+async def metrics_summary(
+    granularity: Literal["hour", "day"] = Query(default="hour"),
+    start: Optional[datetime] = Query(default=None),
+    end: Optional[datetime] = Query(default=None),
+    model_name: Optional[str] = Query(default=None),
+    session: AsyncSession = Depends(get_async_session),
+    logger=Depends(get_logger),
+):
+    """Summarize processing metrics per hour or day bucket, from the rollups.
+
+    Buckets overlapping [start, end) are returned oldest first, each with the
+    run count, processing time mean and p50/p95/p99, LLM cost (total and per
+    filled field), mean field fill rate and tokens per model, plus the same
+    figures over the whole window. `model_name` restricts it to one model.
+    """
+    end = _as_utc(end) if end else datetime.now(UTC)
+    start = _as_utc(start) if start else end - DEFAULT_SUMMARY_WINDOW[granularity]
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end - start) / BUCKET_SIZE[granularity] > MAX_SUMMARY_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_SUMMARY_BUCKETS} {granularity} buckets per request",
+        )
+
+    statement = (
+        select(DocumentProcessingMetricsRollup)
+        .where(DocumentProcessingMetricsRollup.granularity == granularity)
+        .where(DocumentProcessingMetricsRollup.bucket_start >= truncate_to_bucket(start, granularity))
+        .where(DocumentProcessingMetricsRollup.bucket_start < end)
+        .order_by(col(DocumentProcessingMetricsRollup.bucket_start))
+    )
+    if model_name is not None:
+        statement = statement.where(DocumentProcessingMetricsRollup.model_name == model_name)
+    rollups = (await session.exec(statement)).all()
+
+    by_bucket: dict[datetime, list[DocumentProcessingMetricsRollup]] = {}
+    for rollup in rollups:
+        by_bucket.setdefault(rollup.bucket_start, []).append(rollup)
+    buckets = [
+        {"bucket_start": _as_utc(bucket_start).isoformat(), **merge_rollups(bucket_rollups)}
+        for bucket_start, bucket_rollups in by_bucket.items()
+    ]
+
+    logger.info(f"Summarized {len(buckets)} {granularity} metrics buckets")
+
+    return JSONResponse(
+        status_code=200,
+        content={
+            "granularity": granularity,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "buckets": buckets,
+            "totals": merge_rollups(rollups),
+        },
+    )
@@ -136,6 +136,10 @@ def create_processing_metrics(
     completion_tokens: Optional[int],
     model: str = "gpt-4.1-mini",
     processing_time: Optional[float] = None,
+    llm_cache_hits: Optional[int] = None,
+    llm_cache_misses: Optional[int] = None,
+    image_preprocessing: Optional[Dict[str, Any]] = None,
+    stage_timings: Optional[Dict[str, Any]] = None,
 ) -> DocumentProcessingRunMetrics:
     """
     Create and calculate all processing metrics for a document processing run.
@@ -149,6 +153,10 @@ def create_processing_metrics(
         completion_tokens: Number of completion tokens used
         model: LLM model name used
         processing_time: Elapsed time for text extraction and structured data parsing in seconds
+        llm_cache_hits: LLM response cache hits
+        llm_cache_misses: LLM response cache misses
+        image_preprocessing: Image preprocessing timings and pixel counts before OCR
+        stage_timings: Per-stage timings collected along the processing pipeline
     
     Returns:
         DocumentProcessingRunMetrics object with all calculated metrics
@@ -182,6 +190,11 @@ def create_processing_metrics(
         prompt_tokens=prompt_tokens,
         completion_tokens=completion_tokens,
         total_tokens=total_tokens,
+        model_name=model,
         document_run_processing_time=processing_time,
+        llm_cache_hits=llm_cache_hits,
+        llm_cache_misses=llm_cache_misses,
+        image_preprocessing=image_preprocessing,
+        stage_timings=stage_timings,
     )
 
@@ -2,37 +2,87 @@ from pathlib import Path
 from typing import Any, Dict, Optional
 
 from celery import shared_task
+from celery.signals import worker_process_shutdown, worker_shutdown
 from sqlmodel import Session
 
 from common.database import engine
+from documents.models import DocumentProcessingRunPayload
+from metrics.buffer import flush_metrics_buffer, get_metrics_buffer
 from metrics.services import create_processing_metrics
 
 
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def flush_worker_metrics(**kwargs) -> None:
+    """Write buffered metrics before the worker exits."""
+    # Prefork children send worker_process_shutdown; thread-pool workers run
+    # tasks in the main process, which only sends worker_shutdown
+    flush_metrics_buffer()
+
+
+def record_processing_metrics(
+    document_id: str,
+    payload: Optional[DocumentProcessingRunPayload],
+    file_path_str: str,
+    prompt_tokens: Optional[int],
+    completion_tokens: Optional[int],
+    model_name: str,
+    processing_time: Optional[float],
+    llm_cache_hits: Optional[int] = None,
+    llm_cache_misses: Optional[int] = None,
+    image_preprocessing: Optional[Dict[str, Any]] = None,
+    stage_timings: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Compute the metrics of a processing run and buffer them for a bulk insert."""
+    metrics = create_processing_metrics(
+        document_id=document_id,
+        extracted_text=(payload.extracted_text if payload else None) or "",
+        structured_data=(payload.structured_data if payload else None) or {},
+        file_path=Path(file_path_str),
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        model=model_name,
+        processing_time=processing_time,
+        llm_cache_hits=llm_cache_hits,
+        llm_cache_misses=llm_cache_misses,
+        image_preprocessing=image_preprocessing,
+        stage_timings=stage_timings,
+    )
+    get_metrics_buffer().add(metrics)
+
+
 @shared_task
 def create_metrics_task(
     document_id: str,
-    extracted_text: str,
-    structured_data: Dict[str, Any],
     file_path_str: str,
     prompt_tokens: Optional[int],
     completion_tokens: Optional[int],
     model_name: str,
     processing_time: Optional[float],
+    llm_cache_hits: Optional[int] = None,
+    llm_cache_misses: Optional[int] = None,
+    image_preprocessing: Optional[Dict[str, Any]] = None,
+    stage_timings: Optional[Dict[str, Any]] = None,
 ) -> None:
-    file_path = Path(file_path_str)
+    """
+    Compute the metrics of a processing run and buffer them for a bulk insert.
 
+    The extracted text and structured data are read from the run's payload
+    row instead of being passed in, so task messages stay the same size
+    whatever the size of the document.
+    """
     with Session(engine) as session:
-        metrics = create_processing_metrics(
-            document_id=document_id,
-            extracted_text=extracted_text,
-            structured_data=structured_data,
-            file_path=file_path,
-            prompt_tokens=prompt_tokens,
-            completion_tokens=completion_tokens,
-            model=model_name,
-            processing_time=processing_time,
+        payload = session.get(DocumentProcessingRunPayload, document_id)
+        record_processing_metrics(
+            document_id,
+            payload,
+            file_path_str,
+            prompt_tokens,
+            completion_tokens,
+            model_name,
+            processing_time,
+            llm_cache_hits,
+            llm_cache_misses,
+            image_preprocessing,
+            stage_timings,
         )
-        session.add(metrics)
-        session.commit()
-
-
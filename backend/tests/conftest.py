@@ -6,15 +6,19 @@ from unittest.mock import patch
 
 import pytest
 from sqlalchemy import create_engine as create_sqlalchemy_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
-from common.database import get_session
+from common.database import get_async_session
 from documents.router import router
 from documents.storage import LocalStorage
 from documents.models import DocumentProcessingRun
 from metrics.models import DocumentProcessingRunMetrics
+from metrics.router import router as metrics_router
 
 
 TEST_DATABASE_NAME = "veterinary_test_db"
@@ -51,15 +55,16 @@ def test_engine():
 
 @pytest.fixture
 def test_session(test_engine) -> Generator[Session, None, None]:
-    connection = test_engine.connect()
-    transaction = connection.begin()
-    session = Session(bind=connection)
+    session = Session(test_engine)
 
     yield session
 
     session.close()
-    transaction.rollback()
-    connection.close()
+    # The API uses its own (async) connections, so test data is committed
+    # for real and cleared after each test
+    tables = ", ".join(table.name for table in SQLModel.metadata.sorted_tables)
+    with test_engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE {tables} CASCADE"))
 
 
 @pytest.fixture
@@ -67,14 +72,18 @@ def test_app(test_session: Session) -> FastAPI:
     from fastapi import APIRouter
 
     app = FastAPI()
+    # TestClient runs each request on a new event loop, so connections are not pooled
+    async_engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
 
-    def override_get_session():
-        yield test_session
+    async def override_get_async_session():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
 
-    app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_async_session] = override_get_async_session
 
     api_router = APIRouter(prefix="/api")
     api_router.include_router(router)
+    api_router.include_router(metrics_router)
     app.include_router(api_router)
 
     return app
@@ -0,0 +1,137 @@
+import json
+import logging
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from documents.services.llm.cache import LLMResponseCache
+from documents.services.structured_info import parsers
+from documents.services.structured_info.chunking import (
+    estimate_tokens,
+    merge_structured_records,
+    split_text_into_chunks,
+)
+
+
+def test_split_text_into_chunks_respects_token_limit_and_keeps_text():
+    sections = [f"Visit {index}\n" + "Rex was examined. " * 20 for index in range(10)]
+    text = "\n\n".join(sections)
+
+    chunks = split_text_into_chunks(text, max_tokens=200)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+    assert "".join(chunks).replace("\n", "") == text.replace("\n", "")
+
+
+def test_merge_structured_records_dedupes_by_name_and_date():
+    first = {
+        "pet_name": "Rex",
+        "species": None,
+        "diagnoses": [{"name": "Otitis", "date": "2024-01-02", "icd_code": None, "is_chronic": False}],
+        "procedures": [{"name": "X-ray", "date": "2024-01-02", "cost": None}],
+        "medications": [{"name": "Apoquel", "start_date": "2024-01-02"}],
+        "chronic_conditions": ["Arthritis"],
+        "symptom_onset_date": "2024-01-01",
+        "notes": "First visit",
+        "clinic_info": {"name": "Vet Clinic", "phone": None},
+    }
+    second = {
+        "pet_name": None,
+        "species": "Canine",
+        "diagnoses": [
+            {"name": "otitis ", "date": "2024-01-02", "icd_code": "H60", "is_chronic": True},
+            {"name": "Otitis", "date": "2024-05-01", "icd_code": None, "is_chronic": False},
+        ],
+        "procedures": [{"name": "X-Ray", "date": "2024-01-02", "cost": 120}],
+        "medications": [{"name": "Apoquel", "start_date": "2024-01-02"}],
+        "chronic_conditions": ["arthritis", "Allergies"],
+        "symptom_onset_date": "2023-12-20",
+        "notes": "Follow-up",
+        "clinic_info": {"name": None, "phone": "555-0100"},
+    }
+
+    merged = merge_structured_records([first, second])
+
+    assert merged["pet_name"] == "Rex"
+    assert merged["species"] == "Canine"
+    assert len(merged["diagnoses"]) == 2
+    assert merged["diagnoses"][0]["icd_code"] == "H60"
+    assert merged["diagnoses"][0]["is_chronic"] is True
+    assert merged["procedures"] == [{"name": "X-ray", "date": "2024-01-02", "cost": 120}]
+    assert len(merged["medications"]) == 1
+    assert merged["chronic_conditions"] == ["Arthritis", "Allergies"]
+    assert merged["symptom_onset_date"] == "2023-12-20"
+    assert merged["notes"] == "First visit\nFollow-up"
+    assert merged["clinic_info"]["name"] == "Vet Clinic"
+    assert merged["clinic_info"]["phone"] == "555-0100"
+
+
+def test_parse_structured_data_extracts_long_text_in_chunks(monkeypatch):
+    monkeypatch.setattr(parsers, "LLM_CHUNKED_EXTRACTION_MIN_TOKENS", 50)
+    monkeypatch.setattr(
+        parsers, "split_text_into_chunks", lambda text: text.split("\n\n")
+    )
+    client = MagicMock()
+
+    def create(**kwargs):
+        chunk = kwargs["messages"][1]["content"]
+        name = "Otitis" if "ear" in chunk else "Gastritis"
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(
+                {"diagnoses": [{"name": name, "date": None}]}
+            )))],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=10),
+            model="gpt-4o-mini",
+        )
+
+    client.chat.completions.create.side_effect = create
+    text = "Rex had an ear infection. " * 10 + "\n\n" + "Rex had vomiting. " * 10
+    stats: dict = {}
+
+    result, prompt_tokens, completion_tokens, _ = parsers.parse_structured_data(
+        text,
+        logging.getLogger("tests"),
+        client=client,
+        cache=LLMResponseCache(redis_client=None),
+        stats=stats,
+    )
+
+    assert client.chat.completions.create.call_count == 2
+    assert {diagnosis["name"] for diagnosis in result["diagnoses"]} == {"Otitis", "Gastritis"}
+    assert (prompt_tokens, completion_tokens) == (200, 20)
+    assert stats["llm_chunks"] == 2
+
+
+def test_parse_structured_data_counts_chunks_that_fell_back(monkeypatch):
+    monkeypatch.setattr(parsers, "LLM_CHUNKED_EXTRACTION_MIN_TOKENS", 50)
+    monkeypatch.setattr(
+        parsers, "split_text_into_chunks", lambda text: text.split("\n\n")
+    )
+    client = MagicMock()
+
+    def create(**kwargs):
+        if "vomiting" in kwargs["messages"][1]["content"]:
+            raise TimeoutError("request timed out")
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(
+                {"diagnoses": [{"name": "Otitis", "date": None}]}
+            )))],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=10),
+            model="gpt-4o-mini",
+        )
+
+    client.chat.completions.create.side_effect = create
+    text = "Rex had an ear infection. " * 10 + "\n\n" + "Rex had vomiting. " * 10
+    stats: dict = {}
+
+    result, prompt_tokens, _, _ = parsers.parse_structured_data(
+        text,
+        logging.getLogger("tests"),
+        client=client,
+        cache=LLMResponseCache(redis_client=None),
+        stats=stats,
+    )
+
+    assert [diagnosis["name"] for diagnosis in result["diagnoses"]] == ["Otitis"]
+    assert prompt_tokens == 100
+    assert (stats["llm_chunks"], stats["llm_failed_chunks"]) == (2, 1)
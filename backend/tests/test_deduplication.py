@@ -0,0 +1,51 @@
+from documents.models import DocumentProcessingRun, DocumentProcessingRunPayload, RunStatus
+from documents.schemas import StreamingFileValidator
+from documents.services.deduplication.content_hash import find_reusable_run
+
+
+def _content_hash(content: bytes) -> str:
+    # Hashed the way uploads are, chunk by chunk while they are streamed
+    validator = StreamingFileValidator("record.pdf")
+    validator.update(content)
+    validator.finalize()
+    return validator.content_hash
+
+
+def _add_run(session, **kwargs):
+    run = DocumentProcessingRun(filename="record.pdf", document_type=".pdf", **kwargs)
+    session.add(run)
+    session.commit()
+    return run
+
+
+def test_find_reusable_run_returns_completed_run_with_same_prompt_version(test_session):
+    content_hash = _content_hash(b"%PDF-1.4 same bytes")
+    completed = _add_run(
+        test_session,
+        content_hash=content_hash,
+        prompt_version="v0",
+        run_status=RunStatus.COMPLETED,
+        payload=DocumentProcessingRunPayload(
+            extracted_text="text", structured_data={"pet_name": "Rex"}
+        ),
+    )
+    _add_run(
+        test_session,
+        content_hash=content_hash,
+        prompt_version="v-old",
+        run_status=RunStatus.COMPLETED,
+    )
+    current = _add_run(test_session, content_hash=content_hash)
+
+    reusable = find_reusable_run(test_session, content_hash, "v0", exclude_id=current.id)
+
+    assert reusable is not None
+    assert reusable.id == completed.id
+
+
+def test_find_reusable_run_ignores_unfinished_runs(test_session):
+    content_hash = _content_hash(b"%PDF-1.4 other bytes")
+    _add_run(test_session, content_hash=content_hash, prompt_version="v0")
+
+    assert find_reusable_run(test_session, content_hash, "v0") is None
+    assert find_reusable_run(test_session, None, "v0") is None
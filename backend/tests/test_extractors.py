@@ -56,3 +56,142 @@ def test_extract_text_supported_pdf_file_type(sample_pdf):
 
 def test_extract_text_supported_png_file_type(sample_png):
     extract_text_from_file(sample_png)
+
+
+def test_split_page_ranges_covers_every_page():
+    from documents.services.text_extraction.extractors import split_page_ranges
+
+    assert split_page_ranges(10, 4) == [(0, 4), (4, 8), (8, 10)]
+    assert split_page_ranges(0, 4) == []
+
+
+def test_extract_pdf_pages_in_parallel_keeps_page_order(tmp_path, monkeypatch):
+    from pypdf import PdfWriter
+
+    from documents.services.text_extraction import extractors
+
+    pdf_path = tmp_path / "long.pdf"
+    writer = PdfWriter()
+    for _ in range(5):
+        writer.add_blank_page(width=72, height=72)
+    with pdf_path.open("wb") as f:
+        writer.write(f)
+
+    monkeypatch.setattr(extractors, "PDF_PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(extractors, "PDF_PAGES_PER_TASK", 2)
+    page_texts, page_timings = extractors.extract_pdf_pages(pdf_path, workers=2)
+
+    assert len(page_texts) == 5
+    assert [timing["page"] for timing in page_timings] == [1, 2, 3, 4, 5]
+    assert not any(timing["timed_out"] for timing in page_timings)
+
+
+def _page_range_stuck_on_first_page(file_path_str, start, end):
+    import time
+
+    if start == 0:
+        time.sleep(60)
+    return [(index, f"page {index + 1}", 0.0) for index in range(start, end)]
+
+
+def test_extract_pdf_pages_times_out_a_stuck_page(tmp_path, monkeypatch):
+    from pypdf import PdfWriter
+
+    from documents.services.text_extraction import extractors
+
+    pdf_path = tmp_path / "stuck.pdf"
+    writer = PdfWriter()
+    for _ in range(2):
+        writer.add_blank_page(width=72, height=72)
+    with pdf_path.open("wb") as f:
+        writer.write(f)
+
+    monkeypatch.setattr(extractors, "_extract_page_range", _page_range_stuck_on_first_page)
+    monkeypatch.setattr(extractors, "PDF_PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(extractors, "PDF_PAGES_PER_TASK", 1)
+    page_texts, page_timings = extractors.extract_pdf_pages(pdf_path, workers=2, page_timeout=0.5)
+
+    assert page_texts == ["", "page 2"]
+    assert [timing["timed_out"] for timing in page_timings] == [True, False]
+
+
+def _extract_pages_in_daemon(pdf_path, results):
+    import multiprocessing
+
+    from documents.services.text_extraction import extractors
+
+    extractors.PDF_PARALLEL_MIN_PAGES = 2
+    extractors.PDF_PAGES_PER_TASK = 2
+    page_texts, _ = extractors.extract_pdf_pages(pdf_path, workers=2)
+    results.put((multiprocessing.current_process().daemon, len(page_texts)))
+
+
+def test_extract_pdf_pages_runs_inside_a_daemonic_process(tmp_path):
+    import multiprocessing
+
+    from pypdf import PdfWriter
+
+    pdf_path = tmp_path / "long.pdf"
+    writer = PdfWriter()
+    for _ in range(4):
+        writer.add_blank_page(width=72, height=72)
+    with pdf_path.open("wb") as f:
+        writer.write(f)
+
+    # Like a Celery prefork child, which the stdlib pools refuse to start in
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    process = context.Process(target=_extract_pages_in_daemon, args=(pdf_path, results), daemon=True)
+    process.start()
+    try:
+        assert results.get(timeout=30) == (True, 4)
+    finally:
+        process.join(timeout=10)
+
+
+def test_needs_ocr_detects_missing_or_garbage_text_layer():
+    from documents.services.text_extraction.extractors import needs_ocr
+
+    assert needs_ocr("")
+    assert needs_ocr("\x00\x01\x02\x03\x04\x05\x06\x07\x08\x0b\x0e\x0f\x10\x11\x12\x13\x14\x15\x16\x17")
+    assert not needs_ocr("Patient: Rex, canine. Diagnosis: cruciate ligament rupture.")
+
+
+def test_extract_text_ocrs_only_scanned_pdf_pages(tmp_path, monkeypatch):
+    from PIL import Image
+
+    from documents.services.text_extraction import extractors
+
+    pdf_path = tmp_path / "scanned.pdf"
+    Image.new("RGB", (50, 50), color="white").save(pdf_path, format="PDF")
+    ocr_calls = []
+
+    def fake_ocr_image(image):
+        ocr_calls.append(image.size)
+        return "Scanned invoice text"
+
+    monkeypatch.setattr(extractors, "ocr_image", fake_ocr_image)
+    stats: dict = {}
+
+    text = extract_text_from_file(pdf_path, stats=stats)
+
+    assert text == "Scanned invoice text"
+    assert len(ocr_calls) == 1
+    assert "ocr_seconds" in stats["page_timings"][0]
+
+
+def test_pdf_pages_are_split_into_chunks_at_page_boundaries(sample_pdf, monkeypatch):
+    from documents.services.structured_info.chunking import split_text_into_chunks
+    from documents.services.text_extraction import extractors
+
+    pages = ["Rex, canine.\nVisit one.", "Invoice:\nX-ray 120"]
+    monkeypatch.setattr(
+        extractors,
+        "extract_pdf_pages",
+        lambda file_path, stats=None: (pages, [{"timed_out": False}] * 2),
+    )
+    monkeypatch.setattr(extractors, "PDF_OCR_FALLBACK_ENABLED", False)
+
+    text = extract_text_from_file(sample_pdf)
+
+    assert split_text_into_chunks(text, max_tokens=8) == pages
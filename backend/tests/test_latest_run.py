@@ -0,0 +1,61 @@
+from datetime import UTC, datetime, timedelta
+
+from sqlmodel import Session, select
+
+from documents.models import DocumentLatestRun, DocumentProcessingRun, RunStatus
+from documents.services.latest_run.projection import backfill_latest_runs, upsert_latest_run
+
+
+def _run(index: int, filename: str = "report.pdf", **fields) -> DocumentProcessingRun:
+    return DocumentProcessingRun(
+        id=f"run-{index}",
+        filename=filename,
+        document_type=".pdf",
+        created_at=datetime(2025, 1, 1, tzinfo=UTC) + timedelta(minutes=index),
+        **fields,
+    )
+
+
+def _latest(session: Session) -> dict[str, tuple[str, RunStatus]]:
+    rows = session.exec(select(DocumentLatestRun)).all()
+    return {row.filename: (row.run_id, row.run_status) for row in rows}
+
+
+def test_upsert_keeps_the_newest_run_of_each_document(test_session):
+    older, newer = _run(0), _run(1)
+    test_session.add_all([older, newer])
+    test_session.flush()
+
+    upsert_latest_run(test_session, newer)
+    older.run_status = RunStatus.COMPLETED
+    upsert_latest_run(test_session, older)
+    newer.run_status = RunStatus.PROCESSING
+    upsert_latest_run(test_session, newer)
+
+    assert _latest(test_session) == {"report.pdf": ("run-1", RunStatus.PROCESSING)}
+
+
+def test_upload_records_latest_run(client, test_session):
+    response = client.post(
+        "/api/documents/upload",
+        files={"file": ("latest.pdf", b"%PDF-1.4 latest", "application/pdf")},
+    )
+
+    assert _latest(test_session)["latest.pdf"] == (response.json()["id"], RunStatus.UPLOADED)
+
+
+def test_backfill_builds_latest_runs_from_history(test_session):
+    test_session.add_all(
+        [
+            _run(0, run_status=RunStatus.COMPLETED),
+            _run(1, run_status=RunStatus.FAILED),
+            _run(2, filename="other.pdf", run_status=RunStatus.COMPLETED),
+        ]
+    )
+    test_session.commit()
+
+    assert backfill_latest_runs(test_session) == 2
+    assert _latest(test_session) == {
+        "report.pdf": ("run-1", RunStatus.FAILED),
+        "other.pdf": ("run-2", RunStatus.COMPLETED),
+    }
@@ -0,0 +1,70 @@
+import logging
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from documents.services.llm.cache import LLMResponseCache, LRUCache, build_cache_key
+from documents.services.structured_info.parsers import parse_structured_data
+
+
+logger = logging.getLogger("tests")
+
+
+def _fake_client(content: str = '{"pet_name": "Rex"}'):
+    client = MagicMock()
+    client.chat.completions.create.return_value = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20),
+        model="gpt-4o-mini",
+    )
+    return client
+
+
+def test_cache_key_ignores_whitespace_differences():
+    key = build_cache_key("system", "user {text}", "gpt-4o-mini", "Rex  is\n a dog")
+    same = build_cache_key("system", "user {text}", "gpt-4o-mini", "Rex is\n  a dog ")
+    other_model = build_cache_key("system", "user {text}", "gpt-4.1-mini", "Rex is a dog")
+
+    assert key == same
+    assert key != other_model
+
+
+def test_lru_cache_evicts_least_recently_used_and_expired_entries():
+    cache = LRUCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    cache.get("a")
+    cache.set("c", {"v": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+
+    expired = LRUCache(max_entries=2, ttl_seconds=-1)
+    expired.set("a", {"v": 1})
+    assert expired.get("a") is None
+
+
+def test_parse_structured_data_reuses_cached_response():
+    client = _fake_client()
+    cache = LLMResponseCache(redis_client=None)
+    first_stats: dict = {}
+    second_stats: dict = {}
+
+    first = parse_structured_data(
+        "Rex, canine", logger, client=client, cache=cache, stats=first_stats
+    )
+    second = parse_structured_data(
+        "Rex,  canine", logger, client=client, cache=cache, stats=second_stats
+    )
+
+    assert client.chat.completions.create.call_count == 1
+    assert first == ({"pet_name": "Rex"}, 100, 20, "gpt-4o-mini")
+    assert second == ({"pet_name": "Rex"}, 0, 0, "gpt-4o-mini")
+    assert (first_stats["llm_cache_hits"], first_stats["llm_cache_misses"]) == (0, 1)
+    assert first_stats["llm_request_seconds"] > 0 and first_stats["json_decode_seconds"] > 0
+    # A cached response costs no request time
+    assert second_stats == {
+        "llm_cache_hits": 1,
+        "llm_cache_misses": 0,
+        "llm_request_seconds": 0.0,
+        "json_decode_seconds": 0.0,
+    }
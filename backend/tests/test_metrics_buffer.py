@@ -0,0 +1,96 @@
+import time
+from unittest.mock import patch
+
+from sqlalchemy.exc import IntegrityError
+
+from metrics import buffer as metrics_buffer
+from metrics.buffer import MetricsBuffer
+from metrics.models import DocumentProcessingRunMetrics
+
+
+def _metrics(run_id: str) -> DocumentProcessingRunMetrics:
+    return DocumentProcessingRunMetrics(document_processing_runs_id=run_id, prompt_tokens=10)
+
+
+def test_buffer_writes_all_rows_at_once_when_full():
+    batches = []
+    buffer = MetricsBuffer(writer=batches.append, max_rows=3, max_age_seconds=60)
+
+    buffer.add(_metrics("run-1"))
+    buffer.add(_metrics("run-2"))
+    assert batches == []
+
+    buffer.add(_metrics("run-3"))
+
+    assert [[row["document_processing_runs_id"] for row in batch] for batch in batches] == [
+        ["run-1", "run-2", "run-3"]
+    ]
+    assert len(buffer) == 0
+    buffer.close()
+
+
+def test_buffer_writes_old_rows_without_new_ones_arriving():
+    batches = []
+    buffer = MetricsBuffer(writer=batches.append, max_rows=100, max_age_seconds=0.05)
+
+    buffer.add(_metrics("run-1"))
+    deadline = time.monotonic() + 2
+    while not batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert len(batches) == 1 and batches[0][0]["document_processing_runs_id"] == "run-1"
+    buffer.close()
+
+
+def test_failed_write_keeps_rows_for_next_flush():
+    batches = []
+
+    def writer(rows):
+        if not batches:
+            batches.append(None)
+            raise RuntimeError("database unavailable")
+        batches.append(rows)
+
+    buffer = MetricsBuffer(writer=writer, max_rows=100, max_age_seconds=60, max_pending_rows=2)
+    for run_id in ("run-1", "run-2", "run-3"):
+        buffer.add(_metrics(run_id))
+
+    assert buffer.flush() == 0
+    # Only the newest max_pending_rows rows are kept
+    assert len(buffer) == 2
+    assert buffer.flush() == 2
+    assert [row["document_processing_runs_id"] for row in batches[1]] == ["run-2", "run-3"]
+    buffer.close()
+
+
+def test_rejected_row_is_dropped_without_blocking_the_others():
+    written = []
+
+    def writer(rows):
+        if any(row["document_processing_runs_id"] == "missing-run" for row in rows):
+            raise IntegrityError("INSERT", {}, Exception("foreign key violation"))
+        written.extend(rows)
+
+    buffer = MetricsBuffer(writer=writer, max_rows=100, max_age_seconds=60)
+    for run_id in ("run-1", "missing-run", "run-2"):
+        buffer.add(_metrics(run_id))
+
+    assert buffer.flush() == 2
+    assert [row["document_processing_runs_id"] for row in written] == ["run-1", "run-2"]
+    assert len(buffer) == 0
+    buffer.close()
+
+
+def test_worker_shutdown_flushes_process_buffer():
+    from metrics.tasks import flush_worker_metrics
+
+    batches = []
+    buffer = MetricsBuffer(writer=batches.append, max_rows=100, max_age_seconds=60)
+    with patch.object(metrics_buffer, "_buffer", None), patch.object(
+        metrics_buffer, "MetricsBuffer", return_value=buffer
+    ):
+        metrics_buffer.get_metrics_buffer().add(_metrics("run-1"))
+        flush_worker_metrics()
+
+        assert len(batches) == 1
+        assert metrics_buffer._buffer is None
@@ -0,0 +1,157 @@
+from datetime import UTC, datetime
+
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from documents.models import DocumentProcessingRun
+from metrics.models import DocumentProcessingMetricsRollup, DocumentProcessingRunMetrics
+from metrics.rollups import histogram_percentile, rebuild_rollups, rollup_deltas, update_rollups
+
+
+def _metrics_rows(session: Session, specs: list[tuple[str, float, str]]) -> list[dict]:
+    """Create a run per (created_at, processing_time, model) and its metrics row."""
+    rows = []
+    for index, (created_at, processing_time, model_name) in enumerate(specs):
+        run_id = f"run-{created_at}-{index}"
+        session.add(
+            DocumentProcessingRun(id=run_id, filename=f"{run_id}.pdf", document_type=".pdf")
+        )
+        rows.append(
+            DocumentProcessingRunMetrics(
+                document_processing_runs_id=run_id,
+                document_run_processing_time=processing_time,
+                llm_token_cost=0.01,
+                filled_fields_count=5,
+                field_fill_rate=50.0,
+                prompt_tokens=100,
+                completion_tokens=10,
+                model_name=model_name,
+                created_at=datetime.fromisoformat(created_at).replace(tzinfo=UTC),
+            ).model_dump()
+        )
+    session.commit()
+    return rows
+
+
+def _flush(session: Session, rows: list[dict]) -> None:
+    # What the metrics buffer writes for each flush
+    connection = session.connection()
+    connection.execute(insert(DocumentProcessingRunMetrics), rows)
+    update_rollups(connection, rows)
+    session.commit()
+
+
+def test_histogram_percentile_interpolates_within_buckets():
+    histogram = rollup_deltas(
+        {"created_at": datetime(2025, 1, 1, tzinfo=UTC), "document_run_processing_time": seconds}
+        for seconds in range(1, 101)
+    )[0]["processing_time_histogram"]
+
+    assert abs(histogram_percentile(histogram, 0.50) - 50) < 50 * 0.2
+    assert abs(histogram_percentile(histogram, 0.99) - 99) < 99 * 0.2
+    assert histogram_percentile([0] * len(histogram), 0.5) is None
+
+
+def test_flushes_add_up_in_hour_and_day_rollups(test_session: Session):
+    _flush(
+        test_session,
+        _metrics_rows(
+            test_session,
+            [("2025-01-01T10:05:00", 2.0, "gpt-4o-mini"), ("2025-01-01T11:30:00", 4.0, "gpt-4o")],
+        ),
+    )
+    _flush(test_session, _metrics_rows(test_session, [("2025-01-01T10:45:00", 6.0, "gpt-4o-mini")]))
+
+    rollup = test_session.exec(
+        select(DocumentProcessingMetricsRollup).where(
+            DocumentProcessingMetricsRollup.granularity == "day",
+            DocumentProcessingMetricsRollup.model_name == "gpt-4o-mini",
+        )
+    ).one()
+    assert rollup.run_count == 2
+    assert rollup.processing_time_sum == 8.0
+    assert sum(rollup.processing_time_histogram) == 2
+    assert (rollup.prompt_tokens_sum, rollup.completion_tokens_sum) == (200, 20)
+
+
+def test_summary_endpoint_reads_rollups(client, test_session: Session):
+    _flush(
+        test_session,
+        _metrics_rows(
+            test_session,
+            [
+                ("2025-01-01T10:05:00", 2.0, "gpt-4o-mini"),
+                ("2025-01-01T10:30:00", 4.0, "gpt-4o"),
+                ("2025-01-01T11:30:00", 6.0, "gpt-4o-mini"),
+            ],
+        ),
+    )
+
+    response = client.get(
+        "/api/metrics/summary",
+        params={"granularity": "hour", "start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [bucket["bucket_start"] for bucket in body["buckets"]] == [
+        "2025-01-01T10:00:00+00:00",
+        "2025-01-01T11:00:00+00:00",
+    ]
+    first = body["buckets"][0]
+    assert first["run_count"] == 2
+    assert first["processing_time"]["mean"] == 3.0
+    assert first["llm_token_cost"]["total"] == 0.02
+    assert first["llm_token_cost"]["per_filled_field"] == 0.002
+    assert first["mean_field_fill_rate"] == 50.0
+    assert set(first["tokens_by_model"]) == {"gpt-4o-mini", "gpt-4o"}
+    assert body["totals"]["run_count"] == 3
+    assert body["totals"]["tokens_by_model"]["gpt-4o-mini"]["total_tokens"] == 220
+
+    only_model = client.get(
+        "/api/metrics/summary",
+        params={
+            "granularity": "day",
+            "start": "2025-01-01T00:00:00Z",
+            "end": "2025-01-02T00:00:00Z",
+            "model_name": "gpt-4o",
+        },
+    ).json()
+    assert only_model["totals"]["run_count"] == 1
+
+
+def test_summary_endpoint_rejects_too_many_buckets(client):
+    response = client.get(
+        "/api/metrics/summary",
+        params={"granularity": "hour", "start": "2020-01-01T00:00:00Z", "end": "2025-01-01T00:00:00Z"},
+    )
+
+    assert response.status_code == 400
+
+
+def test_rebuild_matches_incremental_rollups(test_session: Session):
+    _flush(
+        test_session,
+        _metrics_rows(
+            test_session,
+            [("2025-01-01T10:05:00", 2.0, "gpt-4o-mini"), ("2025-01-02T09:00:00", 40.0, "gpt-4o-mini")],
+        ),
+    )
+
+    def snapshot():
+        test_session.expire_all()
+        return [
+            rollup.model_dump()
+            for rollup in test_session.exec(
+                select(DocumentProcessingMetricsRollup).order_by(
+                    DocumentProcessingMetricsRollup.granularity,
+                    DocumentProcessingMetricsRollup.bucket_start,
+                )
+            )
+        ]
+
+    incremental = snapshot()
+    assert rebuild_rollups(test_session.connection(), batch_size=1) == 2
+    test_session.commit()
+
+    assert snapshot() == incremental
@@ -0,0 +1,61 @@
+from PIL import Image
+
+from documents.services.text_extraction.ocr import OCREngine, OCREnginePool
+
+
+class FakeEngine(OCREngine):
+    created = 0
+
+    def __init__(self):
+        FakeEngine.created += 1
+        self.calls = 0
+
+    def image_to_string(self, image):
+        self.calls += 1
+        return f"text from {image.size[0]}x{image.size[1]}"
+
+
+def test_engine_pool_reuses_warm_engines():
+    FakeEngine.created = 0
+    pool = OCREnginePool(size=2, engine_factory=FakeEngine)
+    image = Image.new("L", (10, 20))
+
+    for _ in range(5):
+        with pool.acquire() as engine:
+            assert engine.image_to_string(image) == "text from 10x20"
+
+    assert FakeEngine.created == 2
+    engines = [pool._engines.get_nowait() for _ in range(2)]
+    assert sum(engine.calls for engine in engines) == 5
+
+
+def test_concurrent_first_calls_create_one_engine_pool(monkeypatch):
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    from documents.services.text_extraction import ocr
+
+    def slow_engine():
+        time.sleep(0.05)
+        return FakeEngine()
+
+    FakeEngine.created = 0
+    monkeypatch.setattr(
+        ocr, "OCREnginePool", lambda size: OCREnginePool(size=size, engine_factory=slow_engine)
+    )
+    ocr.close_ocr_engine_pool()
+    start = threading.Barrier(4)
+
+    def first_call():
+        start.wait()
+        return ocr.init_ocr_engine_pool(size=1)
+
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            pools = list(executor.map(lambda _: first_call(), range(4)))
+    finally:
+        ocr.close_ocr_engine_pool()
+
+    assert len({id(pool) for pool in pools}) == 1
+    assert FakeEngine.created == 1
@@ -0,0 +1,34 @@
+from documents.services.llm import openai as openai_clients
+
+
+def test_openai_client_is_shared_per_process(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(openai_clients, "LLM_RATE_LIMIT_ENABLED", True)
+    openai_clients.close_openai_client()
+
+    client = openai_clients.get_openai_client()
+
+    assert client is openai_clients.get_openai_client()
+    # The rate limiter owns 429 handling, so the SDK does not retry
+    assert client.max_retries == 0
+    openai_clients.close_openai_client()
+    assert openai_clients.get_openai_client() is not client
+    openai_clients.close_openai_client()
+
+
+def test_openai_client_requires_api_key(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+    assert openai_clients.get_openai_client() is None
+
+
+def test_openai_client_retries_without_rate_limiter(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(openai_clients, "LLM_RATE_LIMIT_ENABLED", False)
+    openai_clients.close_openai_client()
+
+    try:
+        client = openai_clients.get_openai_client()
+        assert client.max_retries == openai_clients.OPENAI_MAX_RETRIES
+    finally:
+        openai_clients.close_openai_client()
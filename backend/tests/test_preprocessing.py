@@ -0,0 +1,43 @@
+from PIL import Image, ImageDraw
+
+from documents.services.text_extraction.preprocessing import (
+    merge_preprocessing_records,
+    preprocess_image,
+)
+
+
+def _phone_photo(width: int = 4000, height: int = 3000) -> Image.Image:
+    image = Image.new("RGB", (width, height), color="white")
+    ImageDraw.Draw(image).rectangle((1000, 1000, 2000, 1500), fill="black")
+    return image
+
+
+def test_preprocess_image_downscales_converts_and_crops():
+    image, record = preprocess_image(_phone_photo())
+
+    assert image.mode == "L"
+    assert max(image.size) < 4000
+    assert record["pixels_before"] == 4000 * 3000
+    assert record["pixels_after"] == image.width * image.height
+    assert record["pixels_after"] < record["pixels_before"]
+    assert set(record["steps"]) == {"exif_rotate", "downscale", "grayscale", "crop_borders"}
+    assert record["steps"]["downscale"]["pixels_after"] < 4000 * 3000
+
+
+def test_preprocess_image_keeps_small_images_resolution():
+    image = _phone_photo(800, 600)
+
+    _, record = preprocess_image(image)
+
+    assert record["steps"]["downscale"]["pixels_after"] == 800 * 600
+
+
+def test_merge_preprocessing_records_sums_steps():
+    _, first = preprocess_image(_phone_photo(800, 600))
+    _, second = preprocess_image(_phone_photo(800, 600))
+
+    merged = merge_preprocessing_records([first, second])
+
+    assert merged["images"] == 2
+    assert merged["pixels_before"] == 2 * 800 * 600
+    assert merged["steps"]["grayscale"]["pixels_before"] == 2 * 800 * 600
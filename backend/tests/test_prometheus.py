@@ -0,0 +1,78 @@
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from common import prometheus
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _sample(name: str, labels: dict[str, str]) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+    app.add_middleware(prometheus.PrometheusMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: str):
+        return {"id": item_id}
+
+    labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+    before = _sample("http_request_duration_seconds_count", labels)
+
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+
+    assert _sample("http_request_duration_seconds_count", labels) == before + 2
+    assert _sample(
+        "http_request_duration_seconds_count",
+        {"method": "GET", "route": "unmatched", "status": "404"},
+    ) >= 1
+
+
+def test_render_metrics_sums_processes_of_every_directory(tmp_path):
+    record_lookups = (
+        "from common.prometheus import count_cache_lookup\n"
+        "for _ in range(3): count_cache_lookup('llm_response', True)\n"
+    )
+    # Two containers (own directories) whose processes may share a pid
+    for directory in ("api", "io-worker"):
+        subprocess.run(
+            [sys.executable, "-c", record_lookups],
+            cwd=BACKEND_DIR,
+            env={"PROMETHEUS_MULTIPROC_DIR": str(tmp_path / directory), "PATH": ""},
+            check=True,
+        )
+
+    with patch.object(prometheus, "PROMETHEUS_METRICS_ROOT", str(tmp_path)):
+        content, content_type = prometheus.render_metrics()
+
+    assert content_type.startswith("text/plain")
+    assert 'cache_lookups_total{cache="llm_response",result="hit"} 6.0' in content.decode()
+
+
+def test_engine_pool_reports_checked_out_connections(test_engine):
+    engine = create_engine(test_engine.url, pool_size=2, max_overflow=0)
+    prometheus.instrument_engine_pool(engine, "test", 2)
+
+    def connections(state: str) -> float:
+        return _sample("db_pool_connections", {"engine": "test", "state": state})
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        assert (connections("open"), connections("checked_out")) == (1, 1)
+    assert connections("checked_out") == 0
+
+    engine.dispose()
+    assert (connections("open"), connections("capacity")) == (0, 2)
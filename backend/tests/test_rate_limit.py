@@ -0,0 +1,110 @@
+import logging
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import httpx
+import openai
+import pytest
+
+from documents.exceptions import LLMRateLimitedError
+from documents.services.llm.cache import LLMResponseCache
+from documents.services.llm.rate_limit import (
+    AdaptiveConcurrencyLimiter,
+    LLMRateLimiter,
+    parse_reset_duration,
+)
+from documents.services.structured_info.parsers import parse_structured_data
+
+
+logger = logging.getLogger("tests")
+
+
+def _rate_limit_error(retry_after: str = "0") -> openai.RateLimitError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def _limiter(max_retries: int = 2) -> LLMRateLimiter:
+    buckets = MagicMock()
+    buckets.try_acquire.return_value = 0.0
+    return LLMRateLimiter(buckets, AdaptiveConcurrencyLimiter(initial=4), max_retries=max_retries)
+
+
+def test_parse_reset_duration():
+    assert parse_reset_duration("6m0s") == 360
+    assert parse_reset_duration("1.5s") == 1.5
+    assert parse_reset_duration("120ms") == pytest.approx(0.12)
+    assert parse_reset_duration(None) is None
+
+
+def test_concurrency_limit_grows_on_fast_calls_and_halves_when_throttled():
+    limiter = AdaptiveConcurrencyLimiter(initial=4, min_limit=1, max_limit=8, target_latency=1)
+
+    for _ in range(4):
+        limiter.acquire()
+    assert not limiter.try_acquire()
+
+    limiter.release(latency=0.1)
+    assert limiter.limit == pytest.approx(4.25)
+    limiter.release(throttled=True)
+    assert limiter.limit == pytest.approx(2.125)
+    assert limiter.in_flight == 2
+
+
+def test_rate_limited_call_pauses_workers_and_retries():
+    limiter = _limiter()
+    request = MagicMock(side_effect=[_rate_limit_error("3"), "response"])
+
+    assert limiter.call(request, estimated_tokens=500) == "response"
+    limiter.buckets.pause.assert_called_once_with(3.0)
+    assert limiter.concurrency.in_flight == 0
+
+
+def test_rate_limited_call_raises_when_retries_are_exhausted():
+    limiter = _limiter(max_retries=1)
+    request = MagicMock(side_effect=_rate_limit_error())
+
+    with pytest.raises(LLMRateLimitedError):
+        limiter.call(request, estimated_tokens=500)
+    assert request.call_count == 2
+
+
+def test_call_refunds_unused_estimated_tokens():
+    limiter = _limiter()
+    response = SimpleNamespace(usage=SimpleNamespace(total_tokens=300))
+
+    limiter.call(lambda: response, estimated_tokens=500)
+
+    limiter.buckets.adjust.assert_called_once_with(token_delta=200)
+
+
+def test_observe_headers_caps_buckets_and_backs_off_near_the_limit():
+    limiter = _limiter()
+
+    limiter.observe_headers(
+        {
+            "x-ratelimit-limit-requests": "500",
+            "x-ratelimit-remaining-requests": "20",
+            "x-ratelimit-remaining-tokens": "9000",
+        }
+    )
+
+    limiter.buckets.adjust.assert_called_once_with(
+        remaining_requests=20, remaining_tokens=9000
+    )
+    assert limiter.concurrency.limit == pytest.approx(3.6)
+
+
+def test_parse_structured_data_does_not_fall_back_when_rate_limited():
+    client = MagicMock()
+    client.chat.completions.create.side_effect = _rate_limit_error()
+
+    with pytest.raises(LLMRateLimitedError):
+        parse_structured_data(
+            "Rex is a dog",
+            logger,
+            client=client,
+            cache=LLMResponseCache(redis_client=None),
+            rate_limiter=_limiter(max_retries=0),
+        )
@@ -1,7 +1,7 @@
 
 
 def test_upload_valid_file(client):
-    content = b"test pdf content"
+    content = b"%PDF-1.4 test pdf content"
     response = client.post(
         "/api/documents/upload",
         files={"file": ("test.pdf", content, "application/pdf")},
@@ -32,10 +32,34 @@ def test_upload_empty_file(client):
     assert "empty" in response.json()["detail"].lower()
 
 
+def test_upload_content_not_matching_extension(client):
+    response = client.post(
+        "/api/documents/upload",
+        files={"file": ("test.pdf", b"\x89PNG\r\n\x1a\n not a pdf", "application/pdf")},
+    )
+    assert response.status_code == 400
+    assert "does not match" in response.json()["detail"].lower()
+
+
+def test_upload_does_not_leave_staged_files(client, temp_storage):
+    client.post(
+        "/api/documents/upload",
+        files={"file": ("test.pdf", b"not a pdf at all", "application/pdf")},
+    )
+    client.post(
+        "/api/documents/upload",
+        files={"file": ("stored.pdf", b"%PDF-1.4 stored", "application/pdf")},
+    )
+
+    stored = [path.name for path in temp_storage.upload_dir.iterdir()]
+    assert len(stored) == 1
+    assert stored[0].endswith(".pdf")
+
+
 def test_list_documents_includes_uploaded_file(client):
     upload_resp = client.post(
         "/api/documents/upload",
-        files={"file": ("list-test.pdf", b"content", "application/pdf")},
+        files={"file": ("list-test.pdf", b"%PDF-1.4 list", "application/pdf")},
     )
     assert upload_resp.status_code == 200
     file_id = upload_resp.json()["id"]
@@ -50,10 +74,72 @@ def test_list_documents_includes_uploaded_file(client):
     )
 
 
+def _add_runs(session, runs, structured_data=None, extracted_text=None):
+    from datetime import UTC, datetime, timedelta
+
+    from documents.models import DocumentProcessingRun, DocumentProcessingRunPayload
+    from documents.services.latest_run.projection import upsert_latest_run
+
+    start = datetime(2025, 1, 1, tzinfo=UTC)
+    for index, (filename, status) in enumerate(runs):
+        processing_run = DocumentProcessingRun(
+            id=f"run-{index}",
+            filename=filename,
+            document_type=".pdf",
+            run_status=status,
+            created_at=start + timedelta(minutes=index),
+        )
+        if index in (structured_data or {}) or index in (extracted_text or {}):
+            processing_run.payload = DocumentProcessingRunPayload(
+                structured_data=(structured_data or {}).get(index),
+                extracted_text=(extracted_text or {}).get(index),
+            )
+        session.add(processing_run)
+        session.flush()
+        upsert_latest_run(session, processing_run)
+    session.commit()
+
+
+def test_list_documents_paginates_latest_runs_with_cursor(client, test_session):
+    _add_runs(
+        test_session,
+        [("a.pdf", "completed"), ("b.pdf", "completed"), ("a.pdf", "failed"), ("c.pdf", "uploaded")],
+    )
+
+    first = client.get("/api/documents", params={"limit": 2}).json()
+    second = client.get(
+        "/api/documents", params={"limit": 2, "cursor": first["next_cursor"]}
+    ).json()
+
+    assert [doc["id"] for doc in first["documents"]] == ["run-3", "run-2"]
+    assert [doc["id"] for doc in second["documents"]] == ["run-1"]
+    assert second["next_cursor"] is None
+
+
+def test_list_documents_filters_latest_runs_by_status_and_date(client, test_session):
+    _add_runs(
+        test_session,
+        [("a.pdf", "completed"), ("b.pdf", "completed"), ("a.pdf", "failed")],
+    )
+
+    completed = client.get("/api/documents", params={"status": "completed"}).json()
+    recent = client.get(
+        "/api/documents", params={"created_after": "2025-01-01T00:01:00"}
+    ).json()
+
+    assert [doc["id"] for doc in completed["documents"]] == ["run-1"]
+    assert [doc["id"] for doc in recent["documents"]] == ["run-2", "run-1"]
+
+
+def test_list_documents_rejects_invalid_cursor(client):
+    response = client.get("/api/documents", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
 def test_retrieve_document_returns_details(client):
     upload_resp = client.post(
         "/api/documents/upload",
-        files={"file": ("detail-test.pdf", b"content", "application/pdf")},
+        files={"file": ("detail-test.pdf", b"%PDF-1.4 detail", "application/pdf")},
     )
     assert upload_resp.status_code == 200
     file_id = upload_resp.json()["id"]
@@ -72,3 +158,135 @@ def test_retrieve_document_not_found(client):
     resp = client.get("/api/documents/non-existent-id")
     assert resp.status_code == 404
     assert "not found" in resp.json()["detail"].lower()
+
+
+def test_upload_identical_content_reuses_stored_file(client):
+    content = b"%PDF-1.4 duplicate pdf content"
+    first = client.post(
+        "/api/documents/upload",
+        files={"file": ("first.pdf", content, "application/pdf")},
+    ).json()
+    second = client.post(
+        "/api/documents/upload",
+        files={"file": ("second.pdf", content, "application/pdf")},
+    ).json()
+
+    assert first["deduplicated"] is False
+    assert second["deduplicated"] is True
+    assert second["id"] != first["id"]
+    assert second["content_hash"] == first["content_hash"]
+    assert second["saved_filename"] == first["saved_filename"]
+
+
+def _add_searchable_runs(session):
+    _add_runs(
+        session,
+        [("a.pdf", "completed"), ("b.pdf", "completed"), ("c.pdf", "completed"), ("a.pdf", "completed")],
+        structured_data={
+            0: {"species": "Dog", "diagnoses": [{"name": "Gastritis", "icd_code": "K29.0"}]},
+            1: {
+                "pet_name": "Tom",
+                "species": "cat",
+                "diagnoses": [{"name": "Gastritis", "icd_code": "K29.0"}],
+                "chronic_conditions": ["arthritis"],
+            },
+            2: {"pet_name": "Rex", "species": "dog", "chronic_conditions": ["arthritis"]},
+            3: {"pet_name": "Max", "species": "dog", "diagnoses": []},
+        },
+    )
+
+
+def test_search_documents_filters_latest_runs_by_structured_data(client, test_session):
+    _add_searchable_runs(test_session)
+
+    by_icd_code = client.get("/api/documents/search", params={"icd_code": "K29.0"}).json()
+    by_species = client.get("/api/documents/search", params={"species": "DOG"}).json()
+    combined = client.get(
+        "/api/documents/search", params={"species": "dog", "chronic_condition": "arthritis"}
+    ).json()
+
+    # run-0 is no longer the latest run of a.pdf
+    assert [doc["id"] for doc in by_icd_code["documents"]] == ["run-1"]
+    assert [doc["id"] for doc in by_species["documents"]] == ["run-3", "run-2"]
+    assert combined["documents"][0]["pet_name"] == "Rex"
+    assert [doc["id"] for doc in combined["documents"]] == ["run-2"]
+
+
+def test_search_documents_paginates_with_cursor(client, test_session):
+    _add_searchable_runs(test_session)
+
+    first = client.get("/api/documents/search", params={"species": "dog", "limit": 1}).json()
+    second = client.get(
+        "/api/documents/search",
+        params={"species": "dog", "limit": 1, "cursor": first["next_cursor"]},
+    ).json()
+
+    assert [doc["id"] for doc in first["documents"]] == ["run-3"]
+    assert [doc["id"] for doc in second["documents"]] == ["run-2"]
+    assert second["next_cursor"] is None
+
+
+def test_search_documents_requires_a_filter(client):
+    response = client.get("/api/documents/search")
+
+    assert response.status_code == 400
+
+
+def _add_text_runs(session):
+    _add_runs(
+        session,
+        [("a.pdf", "completed"), ("b.pdf", "completed"), ("c.pdf", "completed")],
+        structured_data={0: {"species": "dog"}, 1: {"species": "cat"}, 2: {"species": "dog"}},
+        extracted_text={
+            0: "Lameness of the left hind limb. Cranial cruciate ligament rupture suspected.",
+            1: "Cruciate ligament rupture confirmed. Cruciate repair (TPLO) scheduled.",
+            2: "Routine vaccination. Microchip 985112004567890 scanned.",
+        },
+    )
+
+
+def test_search_documents_ranks_text_hits_with_snippets(client, test_session):
+    _add_text_runs(test_session)
+
+    response = client.get("/api/documents/search", params={"q": "cruciate"}).json()
+    microchip = client.get("/api/documents/search", params={"q": "985112004567890"}).json()
+    with_species = client.get(
+        "/api/documents/search", params={"q": "cruciate", "species": "dog"}
+    ).json()
+
+    assert [doc["id"] for doc in response["documents"]] == ["run-1", "run-0"]
+    assert response["documents"][0]["rank"] > response["documents"][1]["rank"]
+    assert "<mark>Cruciate</mark>" in response["documents"][0]["snippet"]
+    assert [doc["id"] for doc in microchip["documents"]] == ["run-2"]
+    assert [doc["id"] for doc in with_species["documents"]] == ["run-0"]
+
+
+def test_search_snippets_escape_extracted_text(client, test_session):
+    _add_runs(
+        test_session,
+        [("a.pdf", "completed")],
+        structured_data={0: {"species": "dog"}},
+        extracted_text={0: "Cruciate <img src=x onerror=alert(1)> rupture & \ue000repair"},
+    )
+
+    response = client.get("/api/documents/search", params={"q": "cruciate"}).json()
+
+    snippet = response["documents"][0]["snippet"]
+    assert "<mark>Cruciate</mark>" in snippet
+    assert "&lt;img" in snippet and "<img" not in snippet
+    assert "&amp;" in snippet
+    assert snippet.count("<mark>") == 1
+
+
+def test_search_documents_paginates_ranked_hits_with_cursor(client, test_session):
+    _add_text_runs(test_session)
+
+    first = client.get("/api/documents/search", params={"q": "cruciate", "limit": 1}).json()
+    second = client.get(
+        "/api/documents/search",
+        params={"q": "cruciate", "limit": 1, "cursor": first["next_cursor"]},
+    ).json()
+
+    assert [doc["id"] for doc in first["documents"]] == ["run-1"]
+    assert [doc["id"] for doc in second["documents"]] == ["run-0"]
+    assert second["next_cursor"] is None
@@ -0,0 +1,110 @@
+import json
+from unittest.mock import MagicMock, patch
+
+from sqlmodel import Session
+
+from documents.models import DocumentProcessingRun, DocumentProcessingRunPayload, RunStatus
+from documents.services.run_cache.payloads import (
+    RUN_CACHE_ACTIVE_TTL_SECONDS,
+    RUN_CACHE_TTL_SECONDS,
+    build_run_payloads,
+    detail_key,
+    status_key,
+    store_run_payloads,
+)
+
+
+class FakeAsyncRedis:
+    def __init__(self, values: dict[str, bytes] | None = None):
+        self.values = values or {}
+
+    async def get(self, key: str):
+        return self.values.get(key)
+
+    async def set(self, key: str, value: bytes, ex: int, nx: bool = False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+
+def _create_run(session: Session) -> DocumentProcessingRun:
+    processing_run = DocumentProcessingRun(
+        id="run-1",
+        filename="report.pdf",
+        document_type=".pdf",
+        payload=DocumentProcessingRunPayload(
+            run_id="run-1", extracted_text="Pet: Rex", structured_data={"pet_name": "Rex"}
+        ),
+        run_status=RunStatus.COMPLETED,
+    )
+    session.add(processing_run)
+    session.commit()
+    return processing_run
+
+
+def test_retrieve_document_fills_cache_and_serves_from_it(client, test_session):
+    processing_run = _create_run(test_session)
+    redis_client = FakeAsyncRedis()
+
+    with patch("documents.router.get_async_redis", return_value=redis_client):
+        first = client.get("/api/documents/run-1")
+        processing_run.payload.extracted_text = "changed in the database"
+        test_session.add(processing_run)
+        test_session.commit()
+        second = client.get("/api/documents/run-1")
+
+    assert first.json() == {
+        "file_id": "run-1",
+        "filename": "report.pdf",
+        "extracted_text": "Pet: Rex",
+        "structured_data": {"pet_name": "Rex"},
+        "status": "completed",
+    }
+    assert second.json() == first.json()
+    assert detail_key("run-1") in redis_client.values
+
+
+def test_retrieve_status_served_from_cached_payload(client):
+    payload = b'{"file_id": "run-2", "status": "processing"}'
+    redis_client = FakeAsyncRedis({status_key("run-2"): payload})
+
+    with patch("documents.router.get_async_redis", return_value=redis_client):
+        response = client.get("/api/documents/run-2/status")
+
+    assert response.status_code == 200
+    assert response.content == payload
+
+
+def test_store_run_payloads_uses_longer_ttl_for_completed_runs(test_session):
+    processing_run = _create_run(test_session)
+    redis_client = MagicMock()
+    pipe = redis_client.pipeline.return_value
+
+    payloads = build_run_payloads(processing_run)
+    store_run_payloads(payloads, "completed", redis_client=redis_client)
+    store_run_payloads(payloads, "processing", redis_client=redis_client)
+
+    ttls = [call.kwargs["ex"] for call in pipe.set.call_args_list]
+    assert ttls == [RUN_CACHE_TTL_SECONDS] * 2 + [RUN_CACHE_ACTIVE_TTL_SECONDS] * 2
+    assert json.loads(payloads[status_key("run-1")]) == {"file_id": "run-1", "status": "completed"}
+
+
+def test_retrieve_document_without_payload_row(client, test_session):
+    test_session.add(
+        DocumentProcessingRun(id="run-3", filename="new.pdf", document_type=".pdf")
+    )
+    test_session.commit()
+
+    with patch("documents.router.get_async_redis", return_value=FakeAsyncRedis()):
+        detail = client.get("/api/documents/run-3")
+        status = client.get("/api/documents/run-3/status")
+
+    assert detail.json() == {
+        "file_id": "run-3",
+        "filename": "new.pdf",
+        "extracted_text": None,
+        "structured_data": None,
+        "status": "uploaded",
+    }
+    assert status.json() == {"file_id": "run-3", "status": "uploaded"}
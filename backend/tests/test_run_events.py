@@ -0,0 +1,99 @@
+import json
+from unittest.mock import patch
+
+from documents.services.events.run_events import build_run_event, stream_run_events
+
+
+class FakePubSub:
+    def __init__(self, messages: list[dict]):
+        self.messages = messages
+        self.closed = False
+
+    async def subscribe(self, channel: str) -> None:
+        self.channel = channel
+
+    async def get_message(self, ignore_subscribe_messages: bool, timeout: float):
+        if not self.messages:
+            return None
+        return {"type": "message", "data": json.dumps(self.messages.pop(0))}
+
+    async def unsubscribe(self) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+class FakeAsyncRedis:
+    def __init__(self, snapshot: dict | None = None, messages: list[dict] | None = None):
+        self.snapshot = snapshot
+        self.pubsub_client = FakePubSub(messages or [])
+
+    async def get(self, key: str):
+        return json.dumps(self.snapshot) if self.snapshot else None
+
+    def pubsub(self) -> FakePubSub:
+        return self.pubsub_client
+
+
+def _events(body: str) -> list[dict]:
+    return [
+        json.loads(line.removeprefix("data: "))
+        for line in body.splitlines()
+        if line.startswith("data: ")
+    ]
+
+
+async def test_stream_sends_snapshot_and_stage_events_until_completed():
+    redis_client = FakeAsyncRedis(
+        snapshot=build_run_event("run-1", "processing"),
+        messages=[
+            build_run_event("run-1", "processing", "extracted"),
+            build_run_event("run-1", "completed", "persisted"),
+            build_run_event("run-1", "processing"),
+        ],
+    )
+
+    chunks = [
+        chunk
+        async for chunk in stream_run_events("run-1", redis_client, heartbeat_seconds=0.01)
+    ]
+
+    events = _events("".join(chunks))
+    assert [(e["status"], e["stage"]) for e in events] == [
+        ("processing", None),
+        ("processing", "extracted"),
+        ("completed", "persisted"),
+    ]
+    assert redis_client.pubsub_client.closed
+
+
+async def test_stream_stops_at_terminal_snapshot():
+    redis_client = FakeAsyncRedis(snapshot=build_run_event("run-1", "failed", "extracted"))
+
+    chunks = [chunk async for chunk in stream_run_events("run-1", redis_client)]
+
+    assert [e["status"] for e in _events("".join(chunks))] == ["failed"]
+
+
+def test_events_endpoint_reads_status_from_db_without_snapshot(client):
+    upload = client.post(
+        "/api/documents/upload",
+        files={"file": ("report.pdf", b"%PDF-1.4 report", "application/pdf")},
+    )
+    file_id = upload.json()["id"]
+    redis_client = FakeAsyncRedis(messages=[build_run_event(file_id, "completed", "persisted")])
+
+    with patch("documents.router.get_async_redis", return_value=redis_client):
+        response = client.get(f"/api/documents/{file_id}/events")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert [e["status"] for e in _events(response.text)] == ["uploaded", "completed"]
+
+
+def test_events_endpoint_unknown_run(client):
+    with patch("documents.router.get_async_redis", return_value=FakeAsyncRedis()):
+        response = client.get("/api/documents/does-not-exist/events")
+
+    assert response.status_code == 404
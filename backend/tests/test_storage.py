@@ -17,18 +17,13 @@ def storage(temp_dir):
     return LocalStorage(temp_dir)
 
 
-@pytest.mark.asyncio
-async def test_save_creates_file(storage, temp_dir):
-    file_id = "test-123"
-    content = b"test content"
-    file_ext = ".txt"
+async def _chunks(*parts):
+    for part in parts:
+        yield part
 
-    filename = await storage.save(file_id, content, file_ext)
 
-    assert filename == f"{file_id}{file_ext}"
-    file_path = temp_dir / filename
-    assert file_path.exists()
-    assert file_path.read_bytes() == content
+async def _store(storage, file_id, content, file_ext):
+    return await storage.commit(await storage.stage(_chunks(content)), file_id, file_ext)
 
 
 @pytest.mark.asyncio
@@ -37,7 +32,7 @@ async def test_get_file_content_returns_content(storage, temp_dir):
     content = b"test file content"
     file_ext = ".pdf"
 
-    await storage.save(file_id, content, file_ext)
+    await _store(storage, file_id, content, file_ext)
     retrieved = await storage.get_file_content(file_id, file_ext)
 
     assert retrieved == content
@@ -47,3 +42,35 @@ async def test_get_file_content_returns_content(storage, temp_dir):
 async def test_get_file_content_raises_on_missing_file(storage):
     with pytest.raises(FileNotFoundError):
         await storage.get_file_content("nonexistent", ".txt")
+
+
+@pytest.mark.asyncio
+async def test_stage_and_commit_moves_file_into_place(storage, temp_dir):
+    staged_path = await storage.stage(_chunks(b"first ", b"second"))
+
+    filename = await storage.commit(staged_path, "test-789", ".pdf")
+
+    assert not staged_path.exists()
+    assert (temp_dir / filename).read_bytes() == b"first second"
+
+
+@pytest.mark.asyncio
+async def test_stage_removes_partial_file_on_error(storage, temp_dir):
+    async def failing_chunks():
+        yield b"partial"
+        raise ValueError("stream interrupted")
+
+    with pytest.raises(ValueError):
+        await storage.stage(failing_chunks())
+
+    assert list(temp_dir.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_find_file_uses_recorded_path(storage, temp_dir):
+    await _store(storage, "original-run", b"content", ".pdf")
+    stored_path = str(temp_dir / "original-run.pdf")
+
+    assert await storage.find_file("duplicate-run", ".pdf", stored_path) == Path(stored_path)
+    assert await storage.find_file("original-run", ".pdf") == Path(stored_path)
+    assert await storage.find_file("original-run", ".png") is None
@@ -0,0 +1,160 @@
+import copy
+import time
+from contextlib import nullcontext
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlmodel import Session, select
+
+from documents import tasks
+from documents.models import (
+    DocumentProcessingRun,
+    DocumentProcessingRunPayload,
+    PipelineStage,
+    RunStatus,
+)
+
+
+@pytest.fixture
+def task_session(test_session: Session):
+    # Savepoints let the tasks commit and roll back inside the test transaction
+    session = Session(bind=test_session.connection(), join_transaction_mode="create_savepoint")
+    with patch.object(tasks, "Session", lambda engine: nullcontext(session)):
+        yield session
+    session.close()
+
+
+def _create_run(session: Session, **fields) -> DocumentProcessingRun:
+    processing_run = DocumentProcessingRun(
+        id="run-1",
+        filename="report.pdf",
+        document_type=".pdf",
+        file_path="/tmp/run-1.pdf",
+        content_hash="hash-1",
+        **fields,
+    )
+    session.add(processing_run)
+    session.commit()
+    return processing_run
+
+
+def test_pipeline_stages_commit_intermediate_results(task_session):
+    processing_run = _create_run(task_session)
+
+    with patch.object(tasks, "extract_text_from_file", return_value="Pet: Rex"), patch.object(
+        tasks, "parse_structured_data", return_value=({"pet_name": "Rex"}, 10, 5, "gpt-4o-mini")
+    ):
+        context = tasks.extract_text_task("run-1", "/tmp/run-1.pdf", time.time())
+        assert processing_run.pipeline_stage == PipelineStage.EXTRACTED
+        assert processing_run.payload.extracted_text == "Pet: Rex"
+
+        context = tasks.parse_structured_data_task(context)
+        assert processing_run.pipeline_stage == PipelineStage.PARSED
+        assert processing_run.payload.structured_data == {"pet_name": "Rex"}
+
+    with patch.object(tasks, "METRICS_INLINE", True), patch.object(
+        tasks, "record_processing_metrics"
+    ) as record_processing_metrics, patch.object(tasks, "create_metrics_task") as create_metrics_task:
+        context = tasks.persist_results_task(context)
+        # Celery hands each stage its own deserialized copy
+        tasks.record_metrics_task(copy.deepcopy(context))
+
+    assert processing_run.run_status == RunStatus.COMPLETED
+    assert processing_run.pipeline_stage == PipelineStage.PERSISTED
+    # Metrics are computed inline from the payload already loaded by the persist stage
+    args, kwargs = record_processing_metrics.call_args
+    assert args[0] == "run-1" and args[1].structured_data == {"pet_name": "Rex"}
+    assert kwargs["file_path_str"] == "/tmp/run-1.pdf" and kwargs["prompt_tokens"] == 10
+    timings = kwargs["stage_timings"]
+    assert set(timings["queue_wait"]) == {"extract", "parse", "persist"}
+    assert timings["db_persist"] > 0
+    assert {"file_read", "text_extraction", "pages", "llm_request", "json_decode"} <= set(timings)
+    assert create_metrics_task.call_args.args == ("run-1",)
+    # Only ids and counters travel between stages, never the document payload
+    assert "extracted_text" not in context and "structured_data" not in context
+
+
+def test_failed_run_resumes_after_last_finished_stage(task_session):
+    processing_run = _create_run(
+        task_session,
+        payload=DocumentProcessingRunPayload(extracted_text="Pet: Rex"),
+        pipeline_stage=PipelineStage.EXTRACTED,
+        run_status=RunStatus.FAILED,
+    )
+    extract = MagicMock()
+
+    with patch.object(tasks, "extract_text_from_file", extract), patch.object(
+        tasks, "parse_structured_data", side_effect=RuntimeError("LLM unavailable")
+    ):
+        context = tasks.extract_text_task("run-1", "/tmp/run-1.pdf")
+        assert tasks.parse_structured_data_task(context) is None
+
+    extract.assert_not_called()
+    assert processing_run.run_status == RunStatus.FAILED
+    assert processing_run.pipeline_stage == PipelineStage.EXTRACTED
+    assert tasks.persist_results_task(None) is None
+
+
+def test_partial_chunked_record_is_not_marked_reusable(task_session):
+    processing_run = _create_run(
+        task_session,
+        payload=DocumentProcessingRunPayload(extracted_text="Pet: Rex"),
+        pipeline_stage=PipelineStage.EXTRACTED,
+    )
+
+    def parse_with_failed_chunk(text, logger, stats):
+        stats.update(llm_chunks=3, llm_failed_chunks=1)
+        return {"pet_name": "Rex"}, 200, 20, "gpt-4o-mini"
+
+    with patch.object(tasks, "parse_structured_data", side_effect=parse_with_failed_chunk):
+        tasks.parse_structured_data_task({"file_id": "run-1"})
+
+    assert processing_run.pipeline_stage == PipelineStage.PARSED
+    assert processing_run.payload.structured_data == {"pet_name": "Rex"}
+    assert processing_run.prompt_version is None
+
+
+def test_processing_pipeline_routes_stages_to_queues():
+    from common.celery_app import celery_app
+
+    def queues(metrics_inline: bool) -> list[str]:
+        with patch.object(tasks, "METRICS_INLINE", metrics_inline):
+            pipeline = tasks.build_processing_pipeline("run-1", "/tmp/run-1.pdf")
+        return [
+            celery_app.amqp.router.route({}, signature.task)["queue"].name
+            for signature in pipeline.tasks
+        ]
+
+    assert queues(metrics_inline=False) == ["extraction", "llm", "persist", "metrics"]
+    assert queues(metrics_inline=True) == ["extraction", "llm", "persist"]
+
+
+def test_create_metrics_task_reads_payload_of_the_run(task_session):
+    from sqlalchemy import insert
+
+    from metrics import tasks as metrics_tasks
+    from metrics.buffer import MetricsBuffer
+    from metrics.models import DocumentProcessingRunMetrics
+
+    _create_run(
+        task_session,
+        payload=DocumentProcessingRunPayload(
+            extracted_text="Pet: Rex", structured_data={"pet_name": "Rex", "species": "dog"}
+        ),
+    )
+
+    buffer = MetricsBuffer(
+        writer=lambda rows: task_session.execute(insert(DocumentProcessingRunMetrics), rows)
+    )
+    with patch.object(metrics_tasks, "Session", lambda engine: nullcontext(task_session)), patch.object(
+        metrics_tasks, "get_metrics_buffer", return_value=buffer
+    ):
+        metrics_tasks.create_metrics_task("run-1", "/tmp/run-1.pdf", 10, 5, "gpt-4o-mini", 1.5)
+
+    # Buffered until a threshold or shutdown, then written with one multi-row insert
+    assert task_session.exec(select(DocumentProcessingRunMetrics)).all() == []
+    assert buffer.flush() == 1
+
+    metrics = task_session.exec(select(DocumentProcessingRunMetrics)).one()
+    assert metrics.filled_fields_count == 2
+    assert metrics.total_tokens == 15
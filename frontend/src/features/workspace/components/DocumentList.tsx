@@ -10,22 +10,32 @@ export function DocumentList({ onDocumentSelect, refreshKey }: DocumentListProps
   const [documents, setDocuments] = useState<Document[]>([]);
   const [loading, setLoading] = useState<boolean>(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState<boolean>(false);
+
+  const apiUrl = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+
+  const fetchPage = async (cursor?: string): Promise<{ documents: Document[]; next_cursor: string | null }> => {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    const response = await fetch(`${apiUrl}/api/documents${query}`);
+    if (!response.ok) {
+      throw new Error(`Failed to fetch documents: ${response.statusText}`);
+    }
+    return response.json();
+  };
 
   useEffect(() => {
     const fetchDocuments = async (): Promise<void> => {
       try {
         setLoading(true);
-        const apiUrl = import.meta.env.VITE_API_URL || 'http://localhost:8000';
-        const response = await fetch(`${apiUrl}/api/documents`);
-        if (!response.ok) {
-          throw new Error(`Failed to fetch documents: ${response.statusText}`);
-        }
-        const data = await response.json();
+        const data = await fetchPage();
         setDocuments(data.documents || []);
+        setNextCursor(data.next_cursor || null);
         setError(null);
       } catch (err) {
         setError(err instanceof Error ? err.message : 'Failed to load documents');
         setDocuments([]);
+        setNextCursor(null);
       } finally {
         setLoading(false);
       }
@@ -34,6 +44,20 @@ export function DocumentList({ onDocumentSelect, refreshKey }: DocumentListProps
     fetchDocuments();
   }, [refreshKey]);
 
+  const handleLoadMore = async (): Promise<void> => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const data = await fetchPage(nextCursor);
+      setDocuments((prev) => [...prev, ...(data.documents || [])]);
+      setNextCursor(data.next_cursor || null);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : 'Failed to load documents');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) {
     return (
       <div className="document-list-section">
@@ -87,6 +111,11 @@ export function DocumentList({ onDocumentSelect, refreshKey }: DocumentListProps
             ))}
           </ul>
         )}
+        {nextCursor && (
+          <button type="button" className="load-more-button" onClick={handleLoadMore} disabled={loadingMore}>
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        )}
       </div>
     </div>
   );
@@ -177,6 +177,45 @@ export function DocumentsPage({ onStatusChange, uploadHandlerRef }: DocumentsPag
 
       const fileId: string = uploadData.id;
       const statusPath: string = processData.status_url || `/api/documents/${fileId}/status`;
+      const eventsPath: string | undefined = processData.events_url;
+
+      const loadCompletedDocument = async (): Promise<void> => {
+        const detailResponse = await fetch(`${apiUrl}/api/documents/${fileId}`);
+        if (!detailResponse.ok) {
+          throw new Error(`Detail fetch failed: ${detailResponse.statusText}`);
+        }
+        const detailData = await detailResponse.json();
+
+        setFileName(detailData.filename || file.name);
+        if (detailData.extracted_text) {
+          setExtractedText(detailData.extracted_text);
+        }
+        if (detailData.structured_data) {
+          const sd = detailData.structured_data;
+          setStructuredData({
+            petName: sd.pet_name || '',
+            species: sd.species || '',
+            breed: sd.breed || '',
+            weight: sd.weight || '',
+            diagnoses: sd.diagnoses || [],
+            past_medical_issues: sd.past_medical_issues || [],
+            chronic_conditions: sd.chronic_conditions || [],
+            procedures: sd.procedures || [],
+            medications: sd.medications || [],
+            symptom_onset_date: sd.symptom_onset_date || null,
+            notes: sd.notes || '',
+            clinic_info: sd.clinic_info || {
+              name: null,
+              address: null,
+              phone: null,
+              veterinarian: null,
+            },
+          });
+        }
+
+        setDocumentsRefreshKey((prev) => prev + 1);
+        if (onStatusChange) onStatusChange('Completed');
+      };
 
       const pollStatus = async (): Promise<void> => {
         const maxAttempts = 30;
@@ -192,41 +231,7 @@ export function DocumentsPage({ onStatusChange, uploadHandlerRef }: DocumentsPag
           const currentStatus = String(statusData.status || '').toLowerCase();
 
           if (currentStatus === 'completed') {
-            const detailResponse = await fetch(`${apiUrl}/api/documents/${fileId}`);
-            if (!detailResponse.ok) {
-              throw new Error(`Detail fetch failed: ${detailResponse.statusText}`);
-            }
-            const detailData = await detailResponse.json();
-
-            setFileName(detailData.filename || file.name);
-            if (detailData.extracted_text) {
-              setExtractedText(detailData.extracted_text);
-            }
-            if (detailData.structured_data) {
-              const sd = detailData.structured_data;
-              setStructuredData({
-                petName: sd.pet_name || '',
-                species: sd.species || '',
-                breed: sd.breed || '',
-                weight: sd.weight || '',
-                diagnoses: sd.diagnoses || [],
-                past_medical_issues: sd.past_medical_issues || [],
-                chronic_conditions: sd.chronic_conditions || [],
-                procedures: sd.procedures || [],
-                medications: sd.medications || [],
-                symptom_onset_date: sd.symptom_onset_date || null,
-                notes: sd.notes || '',
-                clinic_info: sd.clinic_info || {
-                  name: null,
-                  address: null,
-                  phone: null,
-                  veterinarian: null,
-                },
-              });
-            }
-
-            setDocumentsRefreshKey((prev) => prev + 1);
-            if (onStatusChange) onStatusChange('Completed');
+            await loadCompletedDocument();
             return;
           }
 
@@ -240,7 +245,41 @@ export function DocumentsPage({ onStatusChange, uploadHandlerRef }: DocumentsPag
         throw new Error('Document processing timed out');
       };
 
-      await pollStatus();
+      // Resolves with the final status pushed by the server, or rejects when the
+      // stream is unavailable so we can fall back to polling.
+      const waitForStatusEvents = (path: string): Promise<string> =>
+        new Promise((resolve, reject) => {
+          const source = new EventSource(`${apiUrl}${path}`);
+          source.addEventListener('status', (event) => {
+            const statusData = JSON.parse((event as MessageEvent).data);
+            const currentStatus = String(statusData.status || '').toLowerCase();
+            if (currentStatus === 'completed' || currentStatus === 'failed') {
+              source.close();
+              resolve(currentStatus);
+            }
+          });
+          source.onerror = () => {
+            source.close();
+            reject(new Error('Status stream unavailable'));
+          };
+        });
+
+      let finalStatus: string | null = null;
+      if (eventsPath && typeof EventSource !== 'undefined') {
+        try {
+          finalStatus = await waitForStatusEvents(eventsPath);
+        } catch (error) {
+          console.warn('Falling back to status polling:', error);
+        }
+      }
+
+      if (finalStatus === 'completed') {
+        await loadCompletedDocument();
+      } else if (finalStatus === 'failed') {
+        throw new Error('Document processing failed');
+      } else {
+        await pollStatus();
+      }
     } catch (error) {
       console.error('Upload/process error:', error);
       if (onStatusChange) onStatusChange('Ready');